@@ -10,15 +10,18 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 # asgi.py
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-from community_connect import routing  # Import your routing configuration
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'your_project_name.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'community_connect.settings')
+django_asgi_app = get_asgi_application()  # Sets up Django before anything imports models
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from events import routing  # Import your routing configuration
+from events.static_asgi import PrecompressedStaticFiles
+from events.ws_auth import CachedAuthMiddlewareStack
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
+    "http": PrecompressedStaticFiles(django_asgi_app),  # Serves STATIC_ROOT, then Django
+    "websocket": CachedAuthMiddlewareStack(  # Caches the session's user across reconnects
         URLRouter(
             routing.websocket_urlpatterns  # Use the URL patterns defined in your routing
         )
@@ -51,6 +51,7 @@ SITE_ID = 1  # Make sure this matches the site in the Django admin for your doma
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'events.middleware.CompressionMiddleware',  # gzip/brotli; keep above anything that edits the body
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,6 +62,44 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',  # Add this line
 ]
 
+# Response compression (events.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = 200  # Bytes; smaller non-streaming responses are sent as-is
+COMPRESSION_LEVEL = 6  # zlib level, also used as the brotli quality
+# BREACH: pages rendering the CSRF token or setting cookies are never compressed; signed-in users' HTML only
+# when this is True
+COMPRESSION_AUTHENTICATED_HTML = False
+
+# Foreign-key autocomplete (events/autocomplete.py)
+AUTOCOMPLETE_INDEX_TTL = 300  # Seconds before a worker rebuilds its index to pick up other workers' changes
+AUTOCOMPLETE_CACHE_SIZE = 256  # Prefix results kept per source
+
+# Calendar timeline (events/timeline.py)
+TIMELINE_CACHE_TTL = 3600  # Seconds a calendar month stays cached; saves and deletes drop it sooner
+
+# Partnership graph (events/partnership_graph.py)
+PARTNERSHIP_GRAPH_TTL = 600  # Seconds before a worker reloads the graph to pick up other workers' changes
+PARTNERSHIP_GRAPH_OVERLAY_LIMIT = 10000  # Changed edges kept beside the arrays before they are rebuilt
+
+# Support request queue (events/support_queue.py)
+SUPPORT_QUEUE_CANDIDATES = 20  # Open requests read per attempt by the optimistic claim used without SKIP LOCKED
+
+# Analytics rollups (events/rollups.py); update_rollups should also run every few minutes
+ROLLUP_SETTLE_SECONDS = 5  # Rows younger than this are left for the next catch-up, so late commits aren't skipped
+ROLLUP_CATCH_UP_INTERVAL = 10  # Minimum seconds between catch-ups triggered by saves, per worker
+
+# Event reminders (events/reminders.py), sent by the run_reminders command
+REMINDER_OFFSETS = {'event': 24 * 3600, 'rsvp': 6 * 3600}  # Seconds before Event.date / Event.rsvp_deadline
+REMINDER_WINDOW = 3600  # Seconds of upcoming reminders kept in the timing wheel
+REMINDER_BATCH_SIZE = 200
+REMINDER_WORKERS = 4  # Threads sending reminder emails
+
+# Resource link checks (events/linkcheck.py), run by the check_links command
+LINK_CHECK_INTERVAL = 24 * 3600  # Seconds before a checked link is due again
+LINK_CHECK_CONCURRENCY = 50  # Checks running at once
+LINK_CHECK_PER_HOST = 4  # Keep-alive connections to one host
+LINK_CHECK_RATE = 5  # Requests a second to one host; 0 for no limit
+LINK_CHECK_TIMEOUT = 10  # Seconds allowed for connecting and for each response
+
 ROOT_URLCONF = 'community_connect.urls'
 
 TEMPLATES = [
@@ -83,6 +122,10 @@ WSGI_APPLICATION = 'community_connect.wsgi.application'
 
 ASGI_APPLICATION = 'community_connect.asgi.application'  # Replace 'your_project_name' with the name of your project
 
+# Serve home, index, event/community detail, event list and interfaith networking
+# with the async views in events/async_views.py (only worth it under ASGI)
+ASYNC_READ_VIEWS = False
+
 # Optional: Configure Channels to use an in-memory channel layer (for development)
 CHANNEL_LAYERS = {
     'default': {
@@ -90,6 +133,12 @@ CHANNEL_LAYERS = {
     },
 }
 
+WS_AUTH_CACHE_TTL = 60  # Seconds a WebSocket connect reuses the user resolved for its session key
+WS_AUTH_CACHE_ALIAS = 'default'
+PRESENCE_TTL = 60  # Seconds without a heartbeat before a chat connection counts as gone (clients ping every ~25s)
+CHAT_OUTBOUND_QUEUE_SIZE = 100  # Frames a chat connection may have waiting to be sent
+CHAT_OUTBOUND_POLICY = 'coalesce'  # When that queue is full: 'drop_oldest', 'coalesce' or 'disconnect'
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -97,9 +146,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WAL lets readers and a writer work at once, which concurrent support-queue claims need
+        'OPTIONS': {'init_command': 'PRAGMA journal_mode=WAL;'},
+        # On disk rather than in memory, so the threaded tests in events/tests.py get real concurrent connections
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Cache used for sessions (cached_db mode) and one-time passwords.
+# Point this at Redis/Memcached when running more than one worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Session storage: 'db' (Django default), 'cached_db' (reads served from the cache,
+# writes still persisted) or 'signed_cookies' (no session table at all)
+SESSION_MODE = os.environ.get('SESSION_MODE', 'cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+
+# One-time passwords for 2FA logins (see events/otp.py)
+OTP_CACHE_ALIAS = 'default'
+OTP_TTL = 300  # Seconds a code stays valid
+OTP_MAX_ATTEMPTS = 5  # Wrong guesses before the code is discarded
+
+# Token-bucket limits for login/register/OTP POSTs, per IP and, in the *_user entries, per username from any IP
+# (see events/ratelimit.py). Each entry is (burst capacity, seconds to refill an empty bucket).
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_BACKEND = 'memory'  # 'cache' shares buckets between workers via RATE_LIMIT_CACHE_ALIAS
+RATE_LIMIT_CACHE_ALIAS = 'default'
+RATE_LIMITS = {
+    'login': (10, 60),
+    'register': (5, 300),
+    'otp': (10, 300),
+    'login_user': (5, 300),
+    'register_user': (5, 300),
+    'otp_user': (5, 300),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -139,8 +228,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # Optional: if you want to include additional directories with static files
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'events', 'static'),  # Global static folder
+    os.path.join(BASE_DIR, 'static'),
 ]
 
+# collectstatic fingerprints file names and writes .gz/.br variants next to them;
+# community_connect/asgi.py serves those with far-future cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'events.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')  # Media files directory
 
@@ -18,7 +18,7 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from events.views import home  # Import the home view
+from events.urls import home, index  # Sync or async versions, depending on ASYNC_READ_VIEWS
 from events import views  # Import views from the 'events' app
 
 urlpatterns = [
@@ -26,7 +26,7 @@ urlpatterns = [
     path('communities/', include('events.urls')),
     path('events/', include('events.urls')),
     path('', home, name='home'),  # Set the home view for the root URL
-    path('', views.index, name='index'),  # Make sure this matches your form action
+    path('', index, name='index'),  # Make sure this matches your form action
     path('login/', views.user_login, name='user_login'),  # Add this for login URL
     path('features/', include('features.urls')),
     path('about/', views.about_us, name='about_us'),  # Add the about us path
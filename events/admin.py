@@ -1,9 +1,263 @@
-# events/admin.py
-
-from django.contrib import admin
-from .models import Community
-
-@admin.register(Community)
-class CommunityAdmin(admin.ModelAdmin):
-    list_display = ('name', 'created_by', 'is_interfaith')  # Fields to display
-    search_fields = ('name', 'created_by__username')  # Fields to search in the admin interface
+# events/admin.py
+
+import io
+
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connection
+from django.shortcuts import redirect, render
+from django.urls import path
+from django.utils.functional import cached_property
+
+from .forms import BulkImportForm
+from .importers import IMPORTERS, iter_rows
+from .models import (
+    Activity, ActivityRollup, Community, CommunitySimilarity, Event, Feedback, Notification, Partnership, Resource,
+    ReminderWatermark, RollupWatermark, SupportRequest, UnifiedNight, UserProfile,
+)
+
+MAX_REPORTED_ERRORS = 20  # Rejected rows listed in the admin after an import
+EXACT_COUNT_THRESHOLD = 10000  # Below this estimate the paginator still counts exactly
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids COUNT(*) on large, unfiltered changelists.
+
+    On PostgreSQL the planner's row estimate is used; elsewhere the highest
+    primary key (an index lookup) serves as an upper bound. Changelists with a
+    search or filter applied and small tables are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is None or self._is_filtered(queryset):
+            return super().count
+        estimate = self._estimate(queryset.model)
+        if estimate is None or estimate < EXACT_COUNT_THRESHOLD:
+            return super().count
+        return estimate
+
+    @staticmethod
+    def _is_filtered(queryset):
+        # Default managers add conditions of their own (soft-deleted communities), which don't count as filtering
+        return queryset.query.where != queryset.model._default_manager.all().query.where
+
+    def page(self, number):
+        page = super().page(number)
+        if page.number > 1 and not page.object_list:
+            # The estimate overshot the table (deleted rows leave gaps below MAX(pk)); count exactly and show
+            # the real last page instead of an empty one
+            self.__dict__.pop('num_pages', None)
+            self.__dict__['count'] = super().count
+            page = super().page(min(number, self.num_pages))
+        return page
+
+    @staticmethod
+    def _estimate(model):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            else:
+                cursor.execute(
+                    f'SELECT MAX({connection.ops.quote_name(model._meta.pk.column)}) '
+                    f'FROM {connection.ops.quote_name(model._meta.db_table)}'
+                )
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    # Shared settings for changelists that may grow to millions of rows
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # Skip the second, unfiltered COUNT(*) when filtering
+    list_per_page = 50
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        if changelist.page_num > changelist.paginator.num_pages:
+            # EstimatedCountPaginator moved an overshooting last page back to the real one
+            changelist.page_num = changelist.paginator.num_pages
+            changelist.result_count = changelist.paginator.count
+        return changelist
+
+
+class _ErrorCollector:
+    # Minimal csv.writer stand-in that keeps the first few errors for display
+    def __init__(self, limit):
+        self.limit = limit
+        self.rows = []
+
+    def writerow(self, row):
+        if len(self.rows) < self.limit:
+            self.rows.append(row)
+
+
+class BulkImportAdminMixin:
+    """Adds an "Import" page to a changelist that feeds uploads to ``events.importers``."""
+    change_list_template = 'admin/events/change_list_import.html'
+    importer_key = None
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view),
+                 name=f'{opts.app_label}_{opts.model_name}_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:index')
+
+        form = BulkImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            errors = _ErrorCollector(MAX_REPORTED_ERRORS)
+            importer = IMPORTERS[self.importer_key](default_user=request.user, error_writer=errors)
+            try:
+                report = importer.run(iter_rows(upload, form.cleaned_data['format']))
+            except ValueError as e:
+                messages.error(request, f'Import aborted: {e}')
+            else:
+                messages.success(request, f'Imported {report.created} rows ({report.rows_per_second:.0f} rows/sec).')
+                if report.failed:
+                    messages.warning(request, f'{report.failed} rows were rejected.')
+                for position, message in errors.rows:
+                    messages.warning(request, f'Row {position}: {message}')
+            return redirect(f'admin:{self.model._meta.app_label}_{self.model._meta.model_name}_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': f'Import {self.model._meta.verbose_name_plural}',
+        }
+        return render(request, 'admin/events/bulk_import.html', context)
+
+
+@admin.register(Community)
+class CommunityAdmin(BulkImportAdminMixin, ScalableAdmin):
+    list_display = ('name', 'created_by', 'is_interfaith', 'event_count')  # Fields to display
+    list_select_related = ('created_by',)
+    list_filter = ('is_interfaith',)
+    # Prefix match on the unique name index and exact username match instead of LIKE '%...%' across a join
+    search_fields = ('^name', '=created_by__username')
+    autocomplete_fields = ('created_by',)
+    importer_key = 'community'
+
+
+@admin.register(Event)
+class EventAdmin(BulkImportAdminMixin, ScalableAdmin):
+    list_display = ('title', 'community', 'date', 'type')
+    list_select_related = ('community',)
+    list_filter = ('type',)
+    search_fields = ('^title',)
+    autocomplete_fields = ('community', 'created_by')
+    importer_key = 'event'
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(ScalableAdmin):
+    list_display = ('user', 'is_2fa_enabled')
+    list_select_related = ('user',)
+    search_fields = ('=user__username',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(UnifiedNight)
+class UnifiedNightAdmin(ScalableAdmin):
+    list_display = ('name', 'date', 'location')
+    search_fields = ('^name',)
+    date_hierarchy = 'date'
+
+
+@admin.register(Activity)
+class ActivityAdmin(ScalableAdmin):
+    list_display = ('name', 'date')
+    search_fields = ('^name',)
+    date_hierarchy = 'date'
+
+
+@admin.register(Partnership)
+class PartnershipAdmin(ScalableAdmin):
+    list_display = ('partner_name', 'community', 'partner', 'partnership_date')
+    list_select_related = ('community', 'partner')
+    search_fields = ('^partner_name',)
+    autocomplete_fields = ('community', 'partner')
+    date_hierarchy = 'partnership_date'
+
+
+@admin.register(SupportRequest)
+class SupportRequestAdmin(ScalableAdmin):
+    list_display = ('user_name', 'community', 'request_date', 'status', 'priority', 'assignee')
+    list_select_related = ('community', 'assignee')
+    list_filter = ('status', 'priority')
+    search_fields = ('=user_name',)
+    autocomplete_fields = ('community',)
+    raw_id_fields = ('assignee',)
+    date_hierarchy = 'request_date'
+
+
+@admin.register(Resource)
+class ResourceAdmin(ScalableAdmin):
+    list_display = ('title', 'community', 'link', 'link_status', 'link_checked_at')
+    list_select_related = ('community',)
+    list_filter = ('link_status',)
+    search_fields = ('^title',)
+    autocomplete_fields = ('community',)
+    readonly_fields = ('link_status', 'link_error', 'link_checked_at')  # Set by the check_links command
+
+
+@admin.register(Notification)
+class NotificationAdmin(ScalableAdmin):
+    list_display = ('__str__', 'community', 'created_at')
+    list_select_related = ('community',)
+    autocomplete_fields = ('community',)
+    date_hierarchy = 'created_at'
+
+
+@admin.register(Feedback)
+class FeedbackAdmin(ScalableAdmin):
+    list_display = ('user_name', 'community', 'feedback_date')
+    list_select_related = ('community',)
+    search_fields = ('=user_name',)
+    autocomplete_fields = ('community',)
+    date_hierarchy = 'feedback_date'
+
+
+@admin.register(CommunitySimilarity)
+class CommunitySimilarityAdmin(ScalableAdmin):
+    # Rebuilt wholesale by build_recommendations; read-only here
+    list_display = ('community', 'neighbour', 'score')
+    list_select_related = ('community', 'neighbour')
+    raw_id_fields = ('community', 'neighbour')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(ScalableAdmin):
+    # Maintained by events/rollups.py; use update_rollups --rebuild to correct it
+    list_display = ('source', 'community', 'month', 'count')
+    list_select_related = ('community',)
+    list_filter = ('source',)
+    date_hierarchy = 'month'
+    raw_id_fields = ('community',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RollupWatermark, ReminderWatermark)
+class WatermarkAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'high_water', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
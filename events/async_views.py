@@ -0,0 +1,120 @@
+# events/async_views.py
+#
+# Async versions of the read-heavy pages for the ASGI deployment. Under ASGI a
+# sync view is run through sync_to_async(thread_sensitive=True), so every
+# request queues for the same thread; these views stay on the event loop and
+# only hand the individual queries to the async ORM, running independent ones
+# together with asyncio.gather. Enabled with ASYNC_READ_VIEWS = True.
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render
+
+from features.models import Feature  # Import your Feature model
+from .models import Activity, Community, Event, UnifiedNight
+from .presence import CHAT_ROOM, presence
+from .recommender import recommend_events
+from .views import _nearby_from_request
+
+
+async def _alist(queryset):
+    # Evaluate a queryset with the async ORM; templates must not trigger lazy queries
+    return [obj async for obj in queryset]
+
+
+async def _arender(request, template_name, context):
+    # The auth context processor reads request.user, which would hit the DB synchronously
+    request.user = await request.auser()
+    return render(request, template_name, context)
+
+
+async def home(request):
+    communities = Community.objects.all()
+    events = Event.objects.select_related('community')
+
+    search_query = request.GET.get('search', '')
+    if search_query:
+        communities = communities.filter(name__icontains=search_query)
+        events = events.filter(title__icontains=search_query)
+
+    communities, unified_nights, events, features, activities = await asyncio.gather(
+        _alist(communities),
+        _alist(UnifiedNight.objects.all()),
+        _alist(events),
+        _alist(Feature.objects.all()),
+        _alist(Activity.objects.all()),
+    )
+    context = {
+        'communities': communities,
+        'unified_nights': unified_nights,
+        'events': events,
+        'features': features,
+        'activities': activities,
+        'search_query': search_query,
+    }
+    return await _arender(request, 'events/home.html', context)
+
+
+async def index(request):
+    query = request.GET.get('search', '')
+    communities = Community.objects.all()
+    events = Event.objects.select_related('community')
+
+    if query:
+        communities = communities.filter(name__icontains=query)
+        events = events.filter(title__icontains=query)
+
+    communities, events = await asyncio.gather(_alist(communities), _alist(events))
+    context = {
+        'communities': communities,
+        'events': events,
+        'search_query': query,
+    }
+    return await _arender(request, 'events/index.html', context)
+
+
+async def community_details_view(request, community_id):
+    community, events = await asyncio.gather(
+        aget_object_or_404(Community.objects.select_related('next_event__community'), id=community_id),
+        _alist(Event.objects.filter(community_id=community_id).select_related('community')),
+    )
+    return await _arender(request, 'events/community_details.html', {'community': community, 'events': events})
+
+
+async def event_list_view(request):
+    events = Event.objects.select_related('community')
+    context = {}
+    nearby = await sync_to_async(_nearby_from_request)(request, events)
+    if nearby is not None:
+        context['events'], context['near'] = nearby
+    else:
+        context['events'] = await _alist(events)
+    return await _arender(request, 'events/event_list.html', context)
+
+
+async def event_details_view(request, event_id):
+    event = await aget_object_or_404(Event.objects.select_related('community'), id=event_id)
+    return await _arender(request, 'events/event_details.html', {'event': event})
+
+
+async def interfaith_networking(request):
+    events = Event.objects.filter(type='interfaith').select_related('community').order_by('date')
+    nearby = await sync_to_async(_nearby_from_request)(request, events)
+    user = await request.auser()
+
+    context = {
+        'title': 'Interfaith Networking',
+        'description': 'Connect with people from different religious backgrounds to share experiences and insights.',
+    }
+    if nearby is not None:
+        context['communities'] = await _alist(Community.objects.filter(is_interfaith=True))
+        context['events'], context['near'] = nearby
+    else:
+        context['communities'], context['events'] = await asyncio.gather(
+            _alist(Community.objects.filter(is_interfaith=True)),
+            _alist(events),
+        )
+    context['recommended_events'] = await sync_to_async(recommend_events)(user)
+    context['online_count'] = presence.count(CHAT_ROOM)
+    return await _arender(request, 'events/interfaith_networking.html', context)
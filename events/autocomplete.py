@@ -0,0 +1,89 @@
+# events/autocomplete.py
+#
+# Type-ahead lookups for foreign-key fields, so forms don't render a <select>
+# holding every community or user. Each source keeps a sorted list of
+# (casefolded label, pk) pairs and answers a prefix with two bisects; recent
+# answers sit in a small LRU. The index is rebuilt lazily after a save/delete
+# signal marks it stale, or after AUTOCOMPLETE_INDEX_TTL seconds so changes
+# made by other workers show up too.
+
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+
+from .models import Community
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+CACHE_SIZE = 256  # Prefixes remembered per source
+
+
+class PrefixIndex:
+    def __init__(self, queryset, label_field, login_required=False):
+        self.queryset = queryset
+        self.label_field = label_field
+        self.login_required = login_required
+        self._keys = []
+        self._entries = []  # (pk, label), in the same order as _keys
+        self._built_at = None
+        self._cache = OrderedDict()  # (prefix, limit) -> results
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+            self._cache.clear()
+
+    def _ensure_built(self):
+        ttl = getattr(settings, 'AUTOCOMPLETE_INDEX_TTL', 300)
+        if self._built_at is not None and time.monotonic() - self._built_at < ttl:
+            return
+        rows = self.queryset.all().order_by().values_list(self.label_field, 'pk').iterator(chunk_size=5000)
+        entries = sorted((label.casefold(), pk, label) for label, pk in rows)
+        self._keys = [key for key, _, _ in entries]
+        self._entries = [(pk, label) for _, pk, label in entries]
+        self._built_at = time.monotonic()
+        self._cache.clear()
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """Up to ``limit`` {'id', 'text'} dicts whose label starts with ``prefix`` (case-insensitive)."""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        with self._lock:
+            self._ensure_built()
+            cache_key = (prefix, limit)
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+
+            start = bisect_left(self._keys, prefix)
+            results = []
+            for position in range(start, min(start + limit, len(self._keys))):
+                if not self._keys[position].startswith(prefix):
+                    break
+                pk, label = self._entries[position]
+                results.append({'id': pk, 'text': label})
+
+            self._cache[cache_key] = results
+            if len(self._cache) > getattr(settings, 'AUTOCOMPLETE_CACHE_SIZE', CACHE_SIZE):
+                self._cache.popitem(last=False)
+            return results
+
+    def label(self, pk):
+        # The one row a bound widget needs to show its current value; None for a submitted value that isn't a key
+        try:
+            return self.queryset.filter(pk=pk).values_list(self.label_field, flat=True).first()
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+
+SOURCES = {
+    'communities': PrefixIndex(Community.objects.all(), 'name'),
+    'users': PrefixIndex(User.objects.filter(is_active=True), 'username', login_required=True),
+}
@@ -0,0 +1,78 @@
+# consumers.py
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from . import wire
+from .outbound import OutboundQueue
+from .presence import CHAT_ROOM, presence, user_key
+
+class ChatConsumer(AsyncWebsocketConsumer):
+    async def connect(self):
+        self.room_name = CHAT_ROOM  # Use a room name for the chat
+        self.room_group_name = 'chat_%s' % self.room_name
+        self.presence_key = user_key(self.scope, self.channel_name)
+
+        # Join the room group
+        await self.channel_layer.group_add(
+            self.room_group_name,
+            self.channel_name
+        )
+
+        # chat.msgpack or chat.json if the client asked for one (see events/wire.py)
+        self.protocol = wire.negotiate(self.scope.get('subprotocols', []))
+        await self.accept(subprotocol=self.protocol)
+        # Group messages go through a bounded queue so a slow reader can't stall this consumer (events/outbound.py)
+        self.outbound = OutboundQueue(self.send, self.close)
+        self.outbound.start()
+        await self.broadcast_presence(presence.join(self.room_name, self.presence_key, self.channel_name))
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'outbound'):
+            self.outbound.stop()
+        # Leave the room group
+        await self.channel_layer.group_discard(
+            self.room_group_name,
+            self.channel_name
+        )
+        await self.broadcast_presence(presence.leave(self.room_name, self.presence_key, self.channel_name))
+
+    async def receive(self, text_data=None, bytes_data=None):
+        # Any frame proves the connection is alive; {"type": "heartbeat"} exists only for that
+        changed = presence.heartbeat(self.room_name, self.presence_key, self.channel_name)
+        await self.broadcast_presence(changed)
+        try:
+            text_data_json = wire.decode(text_data, bytes_data)
+        except ValueError:
+            return  # Malformed, not an object or mistyped fields; dropped rather than ending the connection
+        if text_data_json.get('type') == 'heartbeat':
+            return
+        message = text_data_json.get('message')
+        if message is None:
+            return
+
+        # Send message to room group, already encoded for every subprotocol
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'chat_message',
+                'frames': wire.encode_frames({'message': message})
+            }
+        )
+
+    async def chat_message(self, event):
+        # Send message to WebSocket
+        await self.outbound.put(wire.frame(event['frames'], self.protocol))
+
+    async def broadcast_presence(self, rooms):
+        # Only sent when a room's count actually changed (first tab opened, last tab closed, expiry)
+        for room in rooms:
+            await self.channel_layer.group_send(
+                'chat_%s' % room,
+                {
+                    'type': 'presence_update',
+                    'frames': wire.encode_frames({'type': 'presence', 'online': presence.count(room)}),
+                }
+            )
+
+    async def presence_update(self, event):
+        # Only the latest count matters, so a queued one is replaced rather than sent twice
+        await self.outbound.put(wire.frame(event['frames'], self.protocol), key='presence')
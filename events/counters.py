@@ -0,0 +1,111 @@
+# events/counters.py
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Community, Event, Feedback, Resource
+
+# Child model -> denormalized counter column on Community
+COUNTER_FIELDS = {
+    Event: 'event_count',
+    Resource: 'resource_count',
+    Feedback: 'feedback_count',
+}
+
+_paused = ContextVar('counters_paused', default=False)
+
+
+@contextmanager
+def paused():
+    """Skip counter maintenance, e.g. while purging a community that is going away."""
+    token = _paused.set(True)
+    try:
+        yield
+    finally:
+        _paused.reset(token)
+
+
+def is_paused():
+    return _paused.get()
+
+
+def adjust_counts(model, deltas):
+    """Apply {community_id: delta} to the counter for ``model`` with F() updates, never going below zero."""
+    field = COUNTER_FIELDS[model]
+    for community_id, delta in deltas.items():
+        if delta:
+            # A counter that drifted to zero must not fail the delete that decrements it
+            Community.objects.filter(pk=community_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def bump_for_instances(instances):
+    """Count freshly bulk-created rows, which bypass the post_save signals."""
+    by_model = {}
+    for instance in instances:
+        by_model.setdefault(type(instance), Counter())[instance.community_id] += 1
+    for model, deltas in by_model.items():
+        adjust_counts(model, deltas)
+    if Event in by_model:
+        refresh_next_event(by_model[Event].keys())
+
+
+def _next_event_subquery(now):
+    return Subquery(
+        Event.all_objects.filter(community=OuterRef('pk'), date__gte=now).order_by('date', 'pk').values('pk')[:1]
+    )
+
+
+def refresh_next_event(community_ids):
+    now = timezone.now()
+    Community.objects.filter(pk__in=list(community_ids)).update(next_event=_next_event_subquery(now))
+
+
+def counter_annotations():
+    """Exact values for every denormalized column, as annotations on a Community queryset."""
+    annotations = {}
+    for model, field in COUNTER_FIELDS.items():
+        subquery = (
+            model.all_objects.filter(community=OuterRef('pk'))
+            .order_by()
+            .values('community')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        annotations[f'actual_{field}'] = Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+    annotations['actual_next_event'] = _next_event_subquery(timezone.now())
+    return annotations
+
+
+def reconcile(batch_size=1000):
+    """Recompute the counters and next event for all communities, fixing drifted rows.
+
+    Returns the number of communities that were updated.
+    """
+    fields = list(COUNTER_FIELDS.values())
+    queryset = Community.objects.order_by('pk').annotate(**counter_annotations()).only('pk', 'next_event', *fields)
+
+    repaired = 0
+    batch = []
+    for community in queryset.iterator(chunk_size=batch_size):
+        changed = community.next_event_id != community.actual_next_event
+        community.next_event_id = community.actual_next_event
+        for field in fields:
+            actual = getattr(community, f'actual_{field}')
+            if getattr(community, field) != actual:
+                setattr(community, field, actual)
+                changed = True
+        if changed:
+            batch.append(community)
+        if len(batch) >= batch_size:
+            Community.objects.bulk_update(batch, fields + ['next_event'])
+            repaired += len(batch)
+            batch = []
+    if batch:
+        Community.objects.bulk_update(batch, fields + ['next_event'])
+        repaired += len(batch)
+    return repaired
@@ -0,0 +1,107 @@
+# events/exports.py
+
+import csv
+import datetime
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Event, Feedback, Partnership, SupportRequest
+
+ITERATOR_CHUNK_SIZE = 2000  # Rows fetched per round trip from the (server-side) cursor
+OUTPUT_CHUNK_SIZE = 64 * 1024  # Bytes of output gathered before yielding to the client
+
+# Dataset name -> (model, projected columns). Only these columns are fetched,
+# through values_list(), so no model instances are built while exporting.
+EXPORTS = {
+    'feedback': (Feedback, [
+        'id', 'community_id', 'community__name', 'user_name', 'feedback_date', 'feedback_text',
+    ]),
+    'support_requests': (SupportRequest, [
+        'id', 'community_id', 'community__name', 'user_name', 'request_date', 'request_details',
+    ]),
+    'events': (Event, [
+        'id', 'community_id', 'community__name', 'title', 'date', 'location', 'organizer',
+        'max_participants', 'rsvp_deadline', 'type', 'created_by__username',
+    ]),
+    'partnerships': (Partnership, [
+        'id', 'community_id', 'community__name', 'partner_name', 'partnership_date', 'description',
+    ]),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    # csv.writer needs a file-like object; this one just hands the line back
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_export_rows(dataset):
+    model, fields = EXPORTS[dataset]
+    queryset = model.objects.order_by('pk').values_list(*fields)
+    return queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+
+
+def iter_csv(dataset):
+    _, fields = EXPORTS[dataset]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in iter_export_rows(dataset):
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def iter_jsonl(dataset):
+    _, fields = EXPORTS[dataset]
+    encoder = DjangoJSONEncoder()
+    for row in iter_export_rows(dataset):
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def _buffered(lines, size=OUTPUT_CHUNK_SIZE):
+    # Join small per-row strings into bigger byte chunks before they hit the socket
+    parts = []
+    length = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        parts.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(parts)
+            parts = []
+            length = 0
+    if parts:
+        yield b''.join(parts)
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress an iterable of byte chunks into a gzip stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(dataset, fmt='csv', compress=False):
+    """Return an iterator of byte chunks for ``dataset`` in ``fmt``, optionally gzipped."""
+    if dataset not in EXPORTS:
+        raise ValueError(f'Unknown dataset: {dataset}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Unsupported export format: {fmt}')
+
+    lines = iter_csv(dataset) if fmt == 'csv' else iter_jsonl(dataset)
+    chunks = _buffered(lines)
+    return gzip_chunks(chunks) if compress else chunks
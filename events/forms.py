@@ -3,12 +3,42 @@
 from django import forms
 from django.contrib.auth.models import User  # Import User model
 from django.contrib.auth.forms import UserCreationForm  # Import UserCreationForm
+from django.urls import reverse_lazy
+from .autocomplete import SOURCES
 from .models import Community, Event, User, Partnership, SupportRequest, Feedback  # Ensure all necessary models are imported
 
+class AutocompleteWidget(forms.Widget):
+    # Renders only the selected row; options are fetched from the autocomplete endpoint as the user types
+    template_name = 'events/widgets/autocomplete.html'
+
+    class Media:
+        js = ['events/js/autocomplete.js']
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['url'] = reverse_lazy('autocomplete', args=[self.source])
+        # A re-rendered form may carry an invalid value; the field shows its own validation error for it
+        context['widget']['label'] = (SOURCES[self.source].label(value) or '') if value not in (None, '') else ''
+        return context
+
 class CommunityForm(forms.ModelForm):
     class Meta:
         model = Community
         fields = ['name', 'description', 'created_by']  # Adjust based on your Community model fields
+        widgets = {
+            'created_by': AutocompleteWidget('users'),
+        }
+
+    def clean_name(self):
+        # The default manager hides soft-deleted communities, but their names stay taken until purged
+        name = self.cleaned_data.get('name')
+        if Community.all_objects.filter(name=name, is_deleted=True).exists():
+            raise forms.ValidationError("A community with that name is being deleted. Please choose another name.")
+        return name
 
 class EventForm(forms.ModelForm):
     class Meta:
@@ -23,6 +53,9 @@ class EventForm(forms.ModelForm):
             'max_participants', 
             'rsvp_deadline'
         ]  # Ensure these fields exist in your Event model
+        widgets = {
+            'community': AutocompleteWidget('communities'),
+        }
 
 class UserRegistrationForm(UserCreationForm):
     class Meta:
@@ -39,8 +72,10 @@ class UserRegistrationForm(UserCreationForm):
 class PartnershipForm(forms.ModelForm):
     class Meta:
         model = Partnership
-        fields = ['community', 'partner_name', 'partnership_date', 'description']
+        fields = ['community', 'partner', 'partner_name', 'partnership_date', 'description']
         widgets = {
+            'community': AutocompleteWidget('communities'),
+            'partner': AutocompleteWidget('communities'),
             'description': forms.Textarea(attrs={'rows': 4}),
             'partnership_date': forms.DateInput(attrs={'type': 'date'}),
         }
@@ -48,14 +83,28 @@ class PartnershipForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super(PartnershipForm, self).__init__(*args, **kwargs)
         self.fields['partner_name'].widget.attrs.update({'placeholder': 'Enter partner name'})
+        self.fields['partner_name'].required = False  # Taken from the partner community when one is chosen
         self.fields['description'].widget.attrs.update({'placeholder': 'Enter description'})
 
+    def clean(self):
+        cleaned_data = super().clean()
+        community, partner = cleaned_data.get('community'), cleaned_data.get('partner')
+        if partner is not None and partner == community:
+            self.add_error('partner', 'A community cannot partner with itself.')
+        if not cleaned_data.get('partner_name'):
+            if partner is not None:
+                cleaned_data['partner_name'] = partner.name
+            else:
+                self.add_error('partner_name', 'Enter a partner name or choose a partner community.')
+        return cleaned_data
+
 
 class SupportForm(forms.ModelForm):
     class Meta:
         model = SupportRequest
         fields = ['community', 'user_name', 'request_details']
         widgets = {
+            'community': AutocompleteWidget('communities'),
             'request_details': forms.Textarea(attrs={'rows': 4}),
         }
 
@@ -70,6 +119,7 @@ class FeedbackForm(forms.ModelForm):
         model = Feedback
         fields = ['community', 'user_name', 'feedback_text']
         widgets = {
+            'community': AutocompleteWidget('communities'),
             'feedback_text': forms.Textarea(attrs={'rows': 4}),
         }
 
@@ -77,3 +127,14 @@ class FeedbackForm(forms.ModelForm):
         super(FeedbackForm, self).__init__(*args, **kwargs)
         self.fields['user_name'].widget.attrs.update({'placeholder': 'Enter your name'})
         self.fields['feedback_text'].widget.attrs.update({'placeholder': 'Enter your feedback'})
+
+
+class BulkImportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('json', 'JSON array'),
+        ('jsonl', 'JSON Lines'),
+    ]
+
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, initial='csv')
@@ -0,0 +1,195 @@
+# events/geo.py
+
+import csv
+import math
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32  # Length of one degree of latitude
+GEOHASH_PRECISION = 6  # Stored cell size, roughly 1.2km x 0.6km
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+
+# Gazetteer / geocoding
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """Read the offline gazetteer (name,latitude,longitude) once per process."""
+    path = getattr(settings, 'GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH)
+    places = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            places[_normalize(row['name'])] = (float(row['latitude']), float(row['longitude']))
+    return places
+
+
+def _normalize(name):
+    return ' '.join(name.lower().split())
+
+
+@lru_cache(maxsize=4096)
+def geocode(location):
+    """Return (latitude, longitude) for a free-text location, or None if unknown.
+
+    Tries the whole string first, then each comma-separated part, so
+    "Banjara Hills, Hyderabad, India" resolves to Hyderabad.
+    """
+    if not location:
+        return None
+    places = load_gazetteer()
+    normalized = _normalize(location)
+    if normalized in places:
+        return places[normalized]
+    for part in normalized.split(','):
+        part = part.strip()
+        if part in places:
+            return places[part]
+    return None
+
+
+def apply_geocode(event, previous=None):
+    """Fill in latitude/longitude (from the gazetteer if needed) and the grid cell of an event.
+
+    ``previous`` is the stored (location, latitude, longitude) of an existing
+    event: when the location changed but the coordinates didn't, they belong
+    to the old location and are looked up again.
+    """
+    if previous is not None and event.location != previous[0] and (event.latitude, event.longitude) == previous[1:]:
+        event.latitude = event.longitude = None
+    if event.latitude is None or event.longitude is None:
+        coords = geocode(event.location)
+        if coords:
+            event.latitude, event.longitude = coords
+    if event.latitude is not None and event.longitude is not None:
+        event.geo_cell = encode_geohash(event.latitude, event.longitude)
+    else:
+        event.geo_cell = None
+    return event
+
+
+# Geohash grid
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves longitude bits first
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    # (latitude degrees, longitude degrees) covered by one cell of this precision
+    lon_bits = math.ceil(5 * precision / 2)
+    lat_bits = math.floor(5 * precision / 2)
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the circle around a point.
+
+    Picks the finest precision whose cells are at least as large as the radius,
+    then returns the cell containing the point plus its eight neighbours.
+    An empty list means the radius is too large to prune by cell.
+    """
+    lat_radius = radius_km / KM_PER_DEGREE
+    lon_radius = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+
+    precision = 0
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        lat_size, lon_size = _cell_size(candidate)
+        if lat_size >= lat_radius and lon_size >= lon_radius:
+            precision = candidate
+            break
+    if not precision:
+        return []
+
+    lat_size, lon_size = _cell_size(precision)
+    cells = set()
+    for dlat in (-lat_size, 0, lat_size):
+        lat = latitude + dlat
+        if not -90 <= lat <= 90:
+            continue
+        for dlon in (-lon_size, 0, lon_size):
+            lon = (longitude + dlon + 180) % 360 - 180  # Wrap around the antimeridian
+            cells.add(encode_geohash(lat, lon, precision))
+    return sorted(cells)
+
+
+# Queries
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Vectorized great-circle distance from one point to arrays of points."""
+    import numpy as np  # Deferred so worker start-up doesn't pay for NumPy
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - np.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def nearby_events(queryset, latitude, longitude, radius_km, limit=None):
+    """Events from ``queryset`` within ``radius_km`` of a point, nearest first.
+
+    Candidates are pruned with indexed range scans on ``geo_cell`` and only
+    their coordinates are fetched; exact distances are then computed in one
+    NumPy pass. Each returned event has a ``distance_km`` attribute.
+    """
+    cells = covering_cells(latitude, longitude, radius_km)
+    candidates = queryset.filter(geo_cell__isnull=False)
+    if cells:
+        cell_filter = Q()
+        for cell in cells:
+            # A range rather than startswith: SQLite won't use an index for LIKE ... ESCAPE
+            cell_filter |= Q(geo_cell__gte=cell, geo_cell__lt=cell[:-1] + chr(ord(cell[-1]) + 1))
+        candidates = candidates.filter(cell_filter)
+
+    rows = list(candidates.values_list('id', 'latitude', 'longitude'))
+    if not rows:
+        return []
+    import numpy as np
+    ids, latitudes, longitudes = (np.asarray(column) for column in zip(*rows))
+
+    distances = haversine_km(latitude, longitude, latitudes.astype(float), longitudes.astype(float))
+    inside = np.flatnonzero(distances <= radius_km)
+    inside = inside[np.argsort(distances[inside], kind='stable')]
+    if limit is not None:
+        inside = inside[:limit]
+
+    events = queryset.in_bulk([int(ids[i]) for i in inside])
+    nearest = []
+    for i in inside:
+        event = events[int(ids[i])]
+        event.distance_km = float(distances[i])
+        nearest.append(event)
+    return nearest
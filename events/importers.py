@@ -0,0 +1,351 @@
+# events/importers.py
+
+import abc
+import csv
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import timeline
+from .autocomplete import SOURCES
+from .counters import bump_for_instances
+from .geo import apply_geocode
+from .models import Community, Event
+
+DEFAULT_BATCH_SIZE = 500  # Rows validated and inserted per transaction
+JSON_CHUNK_SIZE = 64 * 1024  # Characters read at a time when streaming a JSON array
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+
+def iter_rows(stream, fmt):
+    """Yield (position, row) pairs from a text stream without loading it into memory.
+
+    Rows that cannot be decoded are yielded as exceptions so the importer can
+    record them in the error report and carry on with the rest of the file.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, e
+    elif fmt == 'json':
+        yield from _iter_json_array(stream)
+    else:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+
+def _iter_json_array(stream):
+    # Decode one object at a time from a top-level JSON array, reading the
+    # stream in fixed-size chunks instead of calling json.load() on the whole file.
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    position = 0
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = stream.read(JSON_CHUNK_SIZE)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    while True:
+        buffer = buffer.lstrip()
+        if buffer:
+            break
+        if eof:
+            return  # Empty file
+        fill()
+    if buffer[0] != '[':
+        raise ValueError('JSON imports must contain a top-level array.')
+    buffer = buffer[1:]
+
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if not buffer:
+            if eof:
+                raise ValueError('JSON array is not terminated.')
+            fill()
+            continue
+        if buffer[0] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError(f'Malformed JSON after item {position}.')
+            fill()  # Object spans the chunk boundary, read more
+            continue
+        position += 1
+        yield position, obj
+        buffer = buffer[end:]
+
+
+def _blank_to_none(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def _parse_datetime(value):
+    value = _blank_to_none(value)
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValidationError(f'Invalid date/time: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _format_error(error):
+    if hasattr(error, 'error_dict'):
+        return '; '.join(
+            f'{field}: {message}' for field, messages in error.message_dict.items() for message in messages
+        )
+    return '; '.join(error.messages)
+
+
+def _raw_row(row):
+    # The rejected row as it was read, so it can be fixed and imported again: objects as JSON, undecodable lines as-is
+    if row is None:
+        return ''
+    if isinstance(row, json.JSONDecodeError):
+        return row.doc
+    if isinstance(row, Exception):
+        return ''
+    return json.dumps(row, ensure_ascii=False, default=str)
+
+
+class ImportReport:
+    """Running totals for an import; errors are streamed to ``error_writer`` as (position, error, raw row)."""
+
+    def __init__(self, error_writer=None):
+        self.created = 0
+        self.failed = 0
+        self.error_writer = error_writer
+        self.started = time.monotonic()
+        self.finished = None
+
+    def add_error(self, position, message, row=None):
+        self.failed += 1
+        if self.error_writer is not None:
+            self.error_writer.writerow([position, message, _raw_row(row)])
+
+    @property
+    def processed(self):
+        return self.created + self.failed
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed else 0.0
+
+
+class BulkImporter(abc.ABC):
+    """Validate rows in batches and insert them with ``bulk_create``.
+
+    Lookups needed for validation (community names, usernames, ...) are resolved
+    once per batch by ``prepare_batch`` so that building each instance does not
+    touch the database. A batch the database rejects (a duplicate inserted by
+    someone else meanwhile, say) is retried one row at a time, so only the
+    offending rows are reported.
+    """
+    model = None
+
+    def __init__(self, default_user=None, batch_size=DEFAULT_BATCH_SIZE, error_writer=None):
+        self.default_user = default_user
+        self.batch_size = batch_size
+        self.report = ImportReport(error_writer)
+
+    def run(self, rows):
+        batch = []
+        for position, row in rows:
+            batch.append((position, row))
+            if len(batch) >= self.batch_size:
+                self._process_batch(batch)
+                batch = []
+        if batch:
+            self._process_batch(batch)
+        self.report.finished = time.monotonic()
+        return self.report
+
+    def _process_batch(self, batch):
+        valid_rows = []
+        for position, row in batch:
+            if isinstance(row, Exception):
+                self.report.add_error(position, f'Malformed row: {row}', row)
+            elif not isinstance(row, dict):
+                self.report.add_error(position, 'Row must be an object.', row)
+            else:
+                valid_rows.append((position, row))
+
+        lookups = self.prepare_batch([row for _, row in valid_rows])
+        instances = []
+        for position, row in valid_rows:
+            try:
+                instances.append((position, row, self.build(row, lookups)))
+            except ValidationError as e:
+                self.report.add_error(position, _format_error(e), row)
+            except (KeyError, TypeError, ValueError) as e:
+                self.report.add_error(position, f'Invalid row: {e}', row)
+
+        if not instances:
+            return
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create([instance for _, _, instance in instances], batch_size=self.batch_size)
+                self.after_insert([instance for _, _, instance in instances])
+            self.report.created += len(instances)
+        except IntegrityError:
+            self._insert_one_by_one(instances)
+
+    def _insert_one_by_one(self, instances):
+        inserted = []
+        for position, row, instance in instances:
+            instance.pk = None  # bulk_create may have set it before the batch was rolled back
+            instance._state.adding = True
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([instance])
+            except IntegrityError as e:
+                self.report.add_error(position, f'Rejected by the database: {e}', row)
+            else:
+                inserted.append(instance)
+        if inserted:
+            with transaction.atomic():
+                self.after_insert(inserted)
+            self.report.created += len(inserted)
+
+    def prepare_batch(self, rows):
+        return {}
+
+    def after_insert(self, instances):
+        pass
+
+    @abc.abstractmethod
+    def build(self, row, lookups):
+        """An unsaved model instance for ``row``; raise ValidationError to reject the row."""
+
+    def resolve_users(self, rows):
+        # One query for every username referenced in the batch
+        usernames = {_blank_to_none(row.get('created_by')) for row in rows} - {None}
+        return dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+    def creator_id(self, row, lookups):
+        username = _blank_to_none(row.get('created_by'))
+        if username:
+            if username not in lookups['users']:
+                raise ValidationError(f'Unknown user: {username}')
+            return lookups['users'][username]
+        if self.default_user is None:
+            raise ValidationError('No created_by user given for this row.')
+        return self.default_user.id
+
+
+class CommunityImporter(BulkImporter):
+    model = Community
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_names = set()  # Names inserted earlier in this file
+
+    def prepare_batch(self, rows):
+        names = {str(row.get('name') or '').strip() for row in rows}
+        return {
+            'users': self.resolve_users(rows),
+            # Soft-deleted communities still hold their (unique) name until purged
+            'existing_names': set(Community.all_objects.filter(name__in=names).values_list('name', flat=True)),
+        }
+
+    def build(self, row, lookups):
+        name = str(row.get('name') or '').strip()
+        if name in lookups['existing_names'] or name in self.seen_names:
+            raise ValidationError(f'Community "{name}" already exists.')
+
+        community = Community(
+            name=name,
+            description=row.get('description') or '',
+            is_interfaith=_parse_bool(row.get('is_interfaith')),
+            created_by_id=self.creator_id(row, lookups),
+        )
+        community.clean_fields(exclude=['created_by'])  # FK already resolved above
+        community.clean()
+        self.seen_names.add(name)
+        return community
+
+    def after_insert(self, instances):
+        SOURCES['communities'].invalidate()  # bulk_create skips the post_save signal
+
+
+class EventImporter(BulkImporter):
+    model = Event
+
+    def prepare_batch(self, rows):
+        # Communities may be referenced by name or by id; resolve both in one query
+        refs = {str(row.get('community') or '').strip() for row in rows}
+        ids = {int(ref) for ref in refs if ref.isdigit()}
+        communities = {}
+        matches = Community.objects.filter(Q(name__in=refs) | Q(id__in=ids)).values_list('id', 'name')
+        for community_id, name in matches:
+            communities[name] = community_id
+            communities[str(community_id)] = community_id
+        return {'users': self.resolve_users(rows), 'communities': communities}
+
+    def build(self, row, lookups):
+        community_ref = str(row.get('community') or '').strip()
+        if community_ref not in lookups['communities']:
+            raise ValidationError(f'Unknown community: {community_ref}')
+
+        event = Event(
+            community_id=lookups['communities'][community_ref],
+            title=row.get('title') or '',
+            date=_parse_datetime(row.get('date')),
+            location=row.get('location') or '',
+            description=row.get('description') or '',
+            organizer=row.get('organizer') or '',
+            max_participants=_blank_to_none(row.get('max_participants')),
+            rsvp_deadline=_parse_datetime(row.get('rsvp_deadline')),
+            type=_blank_to_none(row.get('type')) or 'public',
+            created_by_id=self.creator_id(row, lookups),
+        )
+        event.clean_fields(exclude=['community', 'created_by'])  # FKs already resolved above
+        event.clean()  # Same date/RSVP rules as the event forms
+        return apply_geocode(event)  # bulk_create skips the pre_save signal
+
+    def after_insert(self, instances):
+        bump_for_instances(instances)  # bulk_create skips the counter signals too
+        timeline.invalidate(*(timeline.month_of_value(event.date) for event in instances))  # And the calendar's
+
+
+IMPORTERS = {
+    'community': CommunityImporter,
+    'event': EventImporter,
+}
@@ -0,0 +1,279 @@
+# events/linkcheck.py
+#
+# Concurrent health checks for Resource.link, used by the check_links command.
+# Links are checked with asyncio over plain HTTP/1.1 keep-alive connections:
+# at most LINK_CHECK_CONCURRENCY checks run at once, each host gets at most
+# LINK_CHECK_PER_HOST connections (reused between checks) and
+# LINK_CHECK_RATE requests a second, so a catalogue full of links to one site
+# doesn't hammer it. A HEAD request is tried first; servers that reject or
+# mishandle HEAD get a GET, whose body is drained only up to a small limit.
+# Redirects are followed. Distinct URLs are checked once however many
+# resources share them, and the outcome is stored on Resource. Any failure,
+# malformed responses included, becomes that link's stored error rather than
+# ending the run.
+
+import asyncio
+import socket
+import ssl
+from datetime import timedelta
+from urllib.parse import quote, urljoin, urlsplit
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Resource
+
+USER_AGENT = 'CommunityConnect-LinkChecker/1.0'
+MAX_REDIRECTS = 5
+MAX_DRAIN = 64 * 1024  # Body bytes read to keep a GET connection reusable; larger bodies close it instead
+REDIRECTS = {301, 302, 303, 307, 308}
+URL_SAFE = "/%:@!$&'()*+,;=-._~?"  # Left as they are when percent-encoding a request target
+SAVE_BATCH = 200  # Results written to the database at a time
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class CheckError(Exception):
+    """The link could not be fetched at all; the message is stored as Resource.link_error."""
+
+
+def _parse(url):
+    """(scheme, ASCII host, port, request target) of an http(s) URL; CheckError for anything unusable."""
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            raise CheckError('Not an http(s) URL')
+        host = parts.hostname.encode('idna').decode('ascii')  # URLField accepts internationalized domains
+        port = parts.port or (443 if scheme == 'https' else 80)
+    except ValueError as exc:  # Bad port, bracket or IDNA label (UnicodeError)
+        raise CheckError('Invalid URL') from exc
+    # Non-ASCII paths are valid in URLField too, but a request line must be ASCII
+    target = quote(parts.path or '/', safe=URL_SAFE) + (f'?{quote(parts.query, safe=URL_SAFE)}' if parts.query else '')
+    return scheme, host, port, target
+
+
+class HostPool:
+    """Idle keep-alive connections, a connection limit and a request rate limit for one scheme://host:port."""
+
+    def __init__(self, scheme, host, port, connections, rate):
+        self.scheme, self.host, self.port = scheme, host, port
+        self._idle = []  # (reader, writer)
+        self._slots = asyncio.Semaphore(connections)
+        self._interval = 1 / rate if rate else 0
+        self._next_start = 0.0
+        self.opened = 0
+
+    async def _turn(self):
+        # Spaces request starts _interval apart; the check holding a slot waits for its turn
+        loop = asyncio.get_running_loop()
+        start = max(loop.time(), self._next_start)
+        self._next_start = start + self._interval
+        delay = start - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _open(self):
+        context = ssl.create_default_context() if self.scheme == 'https' else None
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=context,
+                                             server_hostname=self.host if context else None)
+
+    async def request(self, method, target, timeout):
+        """(status, headers) of one request, reusing an idle connection when there is one."""
+        async with self._slots:
+            await self._turn()
+            reused = bool(self._idle)
+            connection = self._idle.pop() if reused else await asyncio.wait_for(self._open(), timeout)
+            try:
+                try:
+                    status, headers, reusable = await asyncio.wait_for(
+                        self._exchange(connection, method, target), timeout)
+                except (ConnectionError, CheckError):
+                    connection[1].close()
+                    if not reused:
+                        raise
+                    # The server closed the idle connection meanwhile; try once on a fresh one
+                    connection = await asyncio.wait_for(self._open(), timeout)
+                    status, headers, reusable = await asyncio.wait_for(
+                        self._exchange(connection, method, target), timeout)
+            except BaseException:
+                connection[1].close()
+                raise
+            if reusable:
+                self._idle.append(connection)
+            else:
+                connection[1].close()
+            return status, headers
+
+    async def _exchange(self, connection, method, target):
+        try:
+            return await self._exchange_once(connection, method, target)
+        except asyncio.IncompleteReadError as exc:
+            raise CheckError('Connection closed mid-response') from exc
+        except (ValueError, EOFError, asyncio.LimitOverrunError) as exc:
+            # Oversized lines, bad chunk sizes and the like; one broken server must not end the whole run
+            raise CheckError('Malformed response') from exc
+
+    async def _exchange_once(self, connection, method, target):
+        reader, writer = connection
+        host = f'[{self.host}]' if ':' in self.host else self.host  # IPv6 literal
+        if self.port not in (80, 443):
+            host = f'{host}:{self.port}'
+        writer.write(
+            f'{method} {target} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\nAccept: */*\r\n'
+            f'Connection: keep-alive\r\n\r\n'.encode('latin-1')
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        parts = status_line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+            raise CheckError('Not an HTTP response')
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        reusable = parts[0] != 'HTTP/1.0' and headers.get('connection', '').lower() != 'close'
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            return status, headers, reusable
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            return status, headers, reusable and await self._drain_chunked(reader)
+        length = headers.get('content-length', '')
+        if length.isdigit() and int(length) <= MAX_DRAIN:
+            await reader.readexactly(int(length))
+            return status, headers, reusable
+        return status, headers, False  # Body too long or delimited by close; not worth reading
+
+    @staticmethod
+    async def _drain_chunked(reader):
+        drained = 0
+        while drained <= MAX_DRAIN:
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass  # Trailers
+                return True
+            await reader.readexactly(size + 2)
+            drained += size
+        return False
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+class LinkChecker:
+    def __init__(self, concurrency=None, per_host=None, rate=None, timeout=None):
+        self.concurrency = concurrency or _setting('LINK_CHECK_CONCURRENCY', 50)
+        self.per_host = per_host or _setting('LINK_CHECK_PER_HOST', 4)
+        self.rate = rate if rate is not None else _setting('LINK_CHECK_RATE', 5)
+        self.timeout = timeout or _setting('LINK_CHECK_TIMEOUT', 10)
+        self._pools = {}
+        self.stats = {'checked': 0, 'ok': 0, 'broken': 0, 'failed': 0, 'get_fallbacks': 0, 'redirects': 0}
+
+    def _pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        if key not in self._pools:
+            self._pools[key] = HostPool(scheme, host, port, self.per_host, self.rate)
+        return self._pools[key]
+
+    @property
+    def connections_opened(self):
+        return sum(pool.opened for pool in self._pools.values())
+
+    async def check(self, url):
+        """(status, error) for ``url``: the final HTTP status after redirects, or None and why it failed."""
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                scheme, host, port, target = _parse(url)
+                pool = self._pool(scheme, host, port)
+                status, headers = await pool.request('HEAD', target, self.timeout)
+                if status >= 400:
+                    # 405/501 mean no HEAD support, and some servers answer HEAD wrongly; GET decides
+                    self.stats['get_fallbacks'] += 1
+                    status, headers = await pool.request('GET', target, self.timeout)
+                if status in REDIRECTS and headers.get('location'):
+                    self.stats['redirects'] += 1
+                    url = urljoin(url, headers['location'])
+                    continue
+                return status, ''
+            raise CheckError('Too many redirects')
+        except CheckError as exc:
+            return None, str(exc)
+        except asyncio.TimeoutError:
+            return None, 'Timed out'
+        except ssl.SSLError as exc:
+            return None, f'TLS error: {exc.reason or exc}'[:100]
+        except socket.gaierror:
+            return None, 'Host not found'
+        except ConnectionRefusedError:
+            return None, 'Connection refused'
+        except OSError as exc:
+            return None, (exc.strerror or exc.__class__.__name__)[:100]
+        except Exception as exc:  # Anything unforeseen is this link's result, not the end of the run
+            return None, f'Check failed: {exc.__class__.__name__}'
+
+    async def run(self, urls, on_result=None):
+        """Check every URL, calling ``await on_result(url, status, error)`` as each finishes."""
+        queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+
+        async def worker():
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                status, error = await self.check(url)
+                self.stats['checked'] += 1
+                if status is None:
+                    self.stats['failed'] += 1
+                else:
+                    self.stats['ok' if status < 400 else 'broken'] += 1
+                if on_result is not None:
+                    await on_result(url, status, error)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, queue.qsize()) or 1)))
+        finally:
+            for pool in self._pools.values():
+                pool.close()
+
+
+def links_due(interval=None, limit=None):
+    """Distinct links never checked or last checked more than ``interval`` seconds ago, stalest first."""
+    interval = _setting('LINK_CHECK_INTERVAL', 24 * 3600) if interval is None else interval
+    cutoff = timezone.now() - timedelta(seconds=interval)
+    resources = Resource.objects.filter(Q(link_checked_at__isnull=True) | Q(link_checked_at__lt=cutoff))
+    resources = resources.order_by(F('link_checked_at').asc(nulls_first=True), 'pk')
+    links, seen = [], set()
+    for link in resources.values_list('link', flat=True).iterator(chunk_size=2000):
+        if link not in seen:
+            seen.add(link)
+            links.append(link)
+            if limit and len(links) >= limit:
+                break
+    return links
+
+
+def store_results(results):
+    """Save [(url, status, error)] on every resource with that link, one UPDATE per distinct outcome."""
+    checked_at = timezone.now()
+    outcomes = {}
+    for url, status, error in results:
+        outcomes.setdefault((status, error), []).append(url)
+    for (status, error), urls in outcomes.items():
+        for start in range(0, len(urls), SAVE_BATCH):
+            Resource.objects.filter(link__in=urls[start:start + SAVE_BATCH]).update(
+                link_status=status, link_error=error, link_checked_at=checked_at)
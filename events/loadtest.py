@@ -0,0 +1,225 @@
+# events/loadtest.py
+#
+# In-process load test for ChatConsumer: thousands of simulated WebSocket
+# clients talk to the consumer through asgiref's ApplicationCommunicator and
+# the configured channel layer, with no server or network involved. Used by
+# the loadtest_chat and benchmark_chat_backpressure commands.
+
+import asyncio
+import random
+import time
+import tracemalloc
+
+from asgiref.testing import ApplicationCommunicator
+from channels.routing import URLRouter
+from django.contrib.auth.models import AnonymousUser
+
+from . import routing, wire
+from .outbound import queue_metrics
+
+CHAT_PATH = '/ws/interfaith/'
+MARKER = 'loadtest:'  # Prefix of the messages the harness sends, followed by the send time
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _SlowCommunicator(ApplicationCommunicator):
+    # Holds one unread frame at a time, so the consumer's send blocks like it does on a full TCP window
+    @property
+    def output_queue(self):
+        if self._output_queue is None:
+            self._output_queue = asyncio.Queue(maxsize=1)
+        return self._output_queue
+
+
+class SimulatedClient:
+    def __init__(self, application, number, protocol=None, read_delay=0):
+        self.number = number
+        self.protocol = protocol
+        self.read_delay = read_delay  # Seconds spent on every frame received; makes a slow consumer
+        scope = {
+            'type': 'websocket',
+            'path': CHAT_PATH,
+            'headers': [],
+            'query_string': b'',
+            'subprotocols': [protocol] if protocol else [],
+            'user': AnonymousUser(),
+        }
+        communicator_class = _SlowCommunicator if read_delay else ApplicationCommunicator
+        self.communicator = communicator_class(application, scope)
+        self.latencies = []  # Seconds from send to delivery of each chat message received
+        self.presence_frames = 0
+        self.closed = False
+        self._reader = None
+
+    async def connect(self):
+        started = time.perf_counter()
+        await self.communicator.send_input({'type': 'websocket.connect'})
+        message = await self.communicator.receive_output(timeout=30)
+        if message['type'] != 'websocket.accept':
+            raise RuntimeError(f'Client {self.number} was not accepted: {message}')
+        self._reader = asyncio.create_task(self._read())
+        return time.perf_counter() - started
+
+    async def send(self):
+        payload = {'message': f'{MARKER}{time.perf_counter()!r}'}
+        frames = wire.encode_frames(payload)
+        if self.protocol == wire.MSGPACK:
+            await self.communicator.send_input({'type': 'websocket.receive', 'bytes': frames[wire.MSGPACK]})
+        else:
+            await self.communicator.send_input({'type': 'websocket.receive', 'text': frames[wire.JSON]})
+
+    async def _read(self):
+        while True:
+            message = await self.communicator.output_queue.get()
+            received = time.perf_counter()
+            if message['type'] == 'websocket.close':
+                self.closed = True
+                return
+            payload = wire.decode(message.get('text'), message.get('bytes'))
+            text = payload.get('message')
+            if isinstance(text, str) and text.startswith(MARKER):
+                self.latencies.append(received - float(text[len(MARKER):]))
+            else:
+                self.presence_frames += 1
+            if self.read_delay:
+                await asyncio.sleep(self.read_delay)
+
+    async def disconnect(self):
+        if self._reader:
+            self._reader.cancel()
+        await self.communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        try:
+            await self.communicator.wait(timeout=5)
+        except asyncio.TimeoutError:
+            pass
+
+
+class ChatLoadTest:
+    """Connect ``clients`` simulated clients, send ``rate`` messages a second for ``duration`` seconds.
+
+    The first ``slow_clients`` of them read a frame every ``slow_delay`` seconds and never send; they are
+    reported separately so their backlog doesn't skew the delivery figures of the others.
+    """
+
+    def __init__(self, clients=1000, rate=50, duration=10, protocol=None, connect_concurrency=100,
+                 drain=2.0, seed=0, slow_clients=0, slow_delay=0.5, trace_memory=False):
+        self.clients = clients
+        self.slow_clients = min(slow_clients, clients - 1)
+        self.slow_delay = slow_delay
+        self.trace_memory = trace_memory  # Keep tracemalloc on while sending, to see if memory keeps growing
+        self.rate = rate
+        self.duration = duration
+        self.protocol = protocol
+        self.connect_concurrency = connect_concurrency
+        self.drain = drain
+        self.random = random.Random(seed)
+
+    async def run(self):
+        application = URLRouter(routing.websocket_urlpatterns)
+        clients = [
+            SimulatedClient(application, n, self.protocol, self.slow_delay if n < self.slow_clients else 0)
+            for n in range(self.clients)
+        ]
+        slow, fast = clients[:self.slow_clients], clients[self.slow_clients:]
+        queue_metrics.reset()
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        connect_latencies = []
+        started = time.perf_counter()
+        for start in range(0, len(clients), self.connect_concurrency):
+            batch = clients[start:start + self.connect_concurrency]
+            connect_latencies.extend(await asyncio.gather(*(client.connect() for client in batch)))
+        connect_seconds = time.perf_counter() - started
+        memory_connected = tracemalloc.get_traced_memory()[0]
+        memory_per_connection = (memory_connected - memory_before) / max(len(clients), 1)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.stop()
+
+        sent = 0
+        started = time.perf_counter()
+        while True:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.duration:
+                break
+            due = int(elapsed * self.rate) + 1 - sent
+            for _ in range(due):
+                await self.random.choice(fast).send()
+                sent += 1
+            await asyncio.sleep(min(1 / self.rate, 0.01) if self.rate else 0.01)
+        send_seconds = time.perf_counter() - started
+        memory_growth = memory_peak_growth = None
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            memory_growth, memory_peak_growth = current - memory_connected, peak - memory_connected
+            tracemalloc.stop()
+        await asyncio.sleep(self.drain)  # Let queued deliveries arrive
+
+        latencies = [latency for client in fast for latency in client.latencies]
+        presence_frames = sum(client.presence_frames for client in clients)
+        closed = sum(client.closed for client in fast)
+        outbound = queue_metrics.snapshot()  # Before disconnecting, while the slow clients' backlog is still queued
+        await asyncio.gather(*(client.disconnect() for client in clients))
+
+        return {
+            'clients': len(clients),
+            'connect_seconds': connect_seconds,
+            'connect_p50': percentile(connect_latencies, 0.50),
+            'connect_p95': percentile(connect_latencies, 0.95),
+            'connect_p99': percentile(connect_latencies, 0.99),
+            'memory_per_connection': memory_per_connection,
+            'sent': sent,
+            'sent_per_second': sent / send_seconds if send_seconds else 0.0,
+            'expected_deliveries': sent * len(fast),
+            'delivered': len(latencies),
+            'delivered_per_second': len(latencies) / (send_seconds + self.drain),
+            'delivery_p50': percentile(latencies, 0.50),
+            'delivery_p95': percentile(latencies, 0.95),
+            'delivery_p99': percentile(latencies, 0.99),
+            'delivery_max': max(latencies, default=float('nan')),
+            'presence_frames': presence_frames,
+            'closed_by_server': closed,
+            'memory_growth': memory_growth,
+            'memory_peak_growth': memory_peak_growth,
+            'slow_clients': len(slow),
+            'slow_received': sum(len(client.latencies) for client in slow),
+            'slow_closed': sum(client.closed for client in slow),
+            'outbound': outbound,
+        }
+
+
+def format_report(result):
+    delivered = result['delivered'] / result['expected_deliveries'] if result['expected_deliveries'] else 1.0
+    lines = [
+        f"clients                {result['clients']}",
+        f"connect                {result['connect_seconds']:.2f}s total   p50 {result['connect_p50'] * 1000:.1f} ms   "
+        f"p95 {result['connect_p95'] * 1000:.1f} ms   p99 {result['connect_p99'] * 1000:.1f} ms",
+        f"memory/connection      {result['memory_per_connection'] / 1024:.1f} KiB (Python allocations)",
+        f"sent                   {result['sent']} ({result['sent_per_second']:.1f}/s)",
+        f"delivered              {result['delivered']} of {result['expected_deliveries']} ({delivered:.1%}), "
+        f"{result['delivered_per_second']:.0f}/s",
+        f"delivery latency       p50 {result['delivery_p50'] * 1000:.1f} ms   p95 {result['delivery_p95'] * 1000:.1f} ms   "
+        f"p99 {result['delivery_p99'] * 1000:.1f} ms   max {result['delivery_max'] * 1000:.1f} ms",
+        f"presence frames        {result['presence_frames']}",
+        f"closed by server       {result['closed_by_server']}",
+    ]
+    if result['memory_growth'] is not None:
+        lines.append(f"memory while sending   +{result['memory_growth'] / 1024:.1f} KiB at the end, "
+                     f"+{result['memory_peak_growth'] / 1024:.1f} KiB peak")
+    if result['slow_clients']:
+        lines.append(f"slow clients           {result['slow_clients']}: received {result['slow_received']} chat "
+                     f"messages, {result['slow_closed']} closed by server")
+    outbound = result['outbound']
+    lines.append(f"outbound queues        {outbound['policy']}, size {outbound['size']}: "
+                 f"high water {outbound['high_water']}, deepest now {outbound['deepest_now']}, "
+                 f"dropped {outbound['dropped']}, coalesced {outbound['coalesced']}, "
+                 f"disconnected {outbound['disconnected']}")
+    return '\n'.join(lines)
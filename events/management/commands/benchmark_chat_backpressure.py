@@ -0,0 +1,58 @@
+# events/management/commands/benchmark_chat_backpressure.py
+
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from events.loadtest import ChatLoadTest
+from events.outbound import POLICIES
+
+
+class Command(BaseCommand):
+    help = ('Run the chat with a deliberately slow client under each outbound queue policy and check that its '
+            'backlog, and the worker\'s memory, stay bounded')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', choices=POLICIES, action='append', help='Policies to run (default: all)')
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--slow-clients', type=int, default=1)
+        parser.add_argument('--slow-delay', type=float, default=0.5, help='Seconds a slow client takes per frame')
+        parser.add_argument('--rate', type=float, default=30, help='Chat messages per second across all clients')
+        parser.add_argument('--duration', type=float, default=8)
+        parser.add_argument('--size', type=int, default=100, help='CHAT_OUTBOUND_QUEUE_SIZE to run with')
+
+    def handle(self, *args, **options):
+        if options['slow_clients'] < 1:
+            raise CommandError('--slow-clients must be at least 1')
+        failures = []
+        self.stdout.write(
+            f"{options['clients']} clients, {options['slow_clients']} reading a frame every "
+            f"{options['slow_delay']}s, {options['rate']:.0f} messages/s for {options['duration']}s, "
+            f"queue size {options['size']}\n"
+        )
+        for policy in options['policy'] or POLICIES:
+            with override_settings(CHAT_OUTBOUND_POLICY=policy, CHAT_OUTBOUND_QUEUE_SIZE=options['size']):
+                result = asyncio.run(ChatLoadTest(
+                    clients=options['clients'],
+                    rate=options['rate'],
+                    duration=options['duration'],
+                    drain=1.0,
+                    slow_clients=options['slow_clients'],
+                    slow_delay=options['slow_delay'],
+                    trace_memory=True,
+                ).run())
+            outbound = result['outbound']
+            delivered = result['delivered'] / result['expected_deliveries'] if result['expected_deliveries'] else 1.0
+            self.stdout.write(
+                f"{policy:12} high water {outbound['high_water']:5}   dropped {outbound['dropped']:6}   "
+                f"coalesced {outbound['coalesced']:5}   slow closed {result['slow_closed']}/{result['slow_clients']}   "
+                f"others got {delivered:6.1%} (p99 {result['delivery_p99'] * 1000:.0f} ms)   "
+                f"memory +{result['memory_peak_growth'] / 1024:.0f} KiB peak"
+            )
+            if outbound['high_water'] > options['size']:
+                failures.append(f'{policy}: a queue reached {outbound["high_water"]} frames')
+            if policy == 'disconnect' and result['slow_closed'] < result['slow_clients']:
+                failures.append(f'{policy}: a slow client was never disconnected')
+        if failures:
+            raise CommandError('Outbound queues were not bounded: ' + '; '.join(failures))
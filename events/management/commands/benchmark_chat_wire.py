@@ -0,0 +1,77 @@
+# events/management/commands/benchmark_chat_wire.py
+
+import json
+import random
+import time
+import zlib
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events import wire
+
+WORDS = ('peace community prayer dinner interfaith welcome neighbours volunteers meeting together '
+         'service friday sunday temple church mosque synagogue gurdwara shared meal evening').split()
+
+
+def sample_messages(count, seed=0):
+    rng = random.Random(seed)
+    messages = []
+    for n in range(count):
+        if n % 10 == 0:
+            messages.append({'type': 'presence', 'online': rng.randint(1, 5000)})
+        else:
+            messages.append({'message': ' '.join(rng.choices(WORDS, k=rng.randint(3, 40)))})
+    return messages
+
+
+class _Deflate:
+    # permessage-deflate as servers run it: raw deflate, context kept across frames, tail stripped
+    def __init__(self):
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    def frame(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)[:-4]
+
+
+class Command(BaseCommand):
+    help = 'Compare bytes on the wire and CPU per chat message for the JSON and MessagePack encodings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--recipients', type=int, default=200, help='Connections each message fans out to')
+
+    def handle(self, *args, **options):
+        if wire.msgpack is None:
+            self.stderr.write('msgpack is not installed; only the JSON encodings are measured')
+        messages = sample_messages(options['messages'])
+        recipients = options['recipients']
+        if recipients < 1:
+            raise CommandError('--recipients must be at least 1')
+
+        self.stdout.write(f'{len(messages)} messages x {recipients} recipients\n')
+        self.stdout.write('CPU per message fanned out to every recipient:')
+        self.cpu('json, per recipient (old)', lambda payload: [json.dumps(payload) for _ in range(recipients)],
+                 messages)
+        self.cpu('encode once (all formats)', lambda payload: [wire.encode_frames(payload)] * recipients, messages)
+
+        self.stdout.write('\nBytes per message on one connection:')
+        for protocol in wire.available_protocols():
+            frames = [wire.encode_frames(payload)[protocol] for payload in messages]
+            raw = sum(len(data.encode() if isinstance(data, str) else data) for data in frames)
+            deflate = _Deflate()
+            started = time.process_time()
+            compressed = sum(len(deflate.frame(data)) for data in frames)
+            deflate_cpu = time.process_time() - started
+            self.stdout.write(
+                f'  {protocol:14} {raw / len(frames):7.1f} B raw   {compressed / len(frames):7.1f} B deflated   '
+                f'{deflate_cpu / len(frames) * 1e6:6.1f} us deflate/frame'
+            )
+
+    def cpu(self, label, fan_out, messages):
+        started = time.process_time()
+        for payload in messages:
+            fan_out(payload)
+        elapsed = time.process_time() - started
+        self.stdout.write(f'  {label:28} {elapsed / len(messages) * 1e6:9.1f} us/message')
@@ -0,0 +1,172 @@
+# events/management/commands/benchmark_link_checker.py
+
+import asyncio
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.linkcheck import LinkChecker
+
+KINDS = ('ok', 'redirect', 'missing', 'no-head', 'slow')
+EXPECTED = {'ok': 200, 'redirect': 200, 'missing': 404, 'no-head': 200, 'slow': 200}
+
+
+class StubServer:
+    """Keep-alive HTTP/1.1 server on 127.0.0.1 answering by the first path segment, after ``latency`` seconds."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.connections = 0
+        self.requests = []  # loop time of each request
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                method, target = request_line.decode('latin-1').split()[:2]
+                self.requests.append(asyncio.get_running_loop().time())
+                kind = target.strip('/').split('/')[0]
+                await asyncio.sleep(self.latency * (10 if kind == 'slow' else 1))
+                if kind == 'hang':
+                    await asyncio.sleep(3600)
+                if method == 'GET' and kind == 'bad-chunk':
+                    writer.write(b'HTTP/1.1 200 Stub\r\nTransfer-Encoding: chunked\r\n\r\nnot-hex\r\n')
+                    await writer.drain()
+                    continue
+                if method == 'GET' and kind == 'short-body':
+                    writer.write(b'HTTP/1.1 200 Stub\r\nContent-Length: 100\r\n\r\nshort')
+                    await writer.drain()
+                    return  # Closes before the promised body is complete
+                status, headers, body = {
+                    'ok': (200, '', b'ok'),
+                    'redirect': (301, f'Location: /ok{target[len("/redirect"):]}\r\n', b''),
+                    'missing': (404, '', b'not found'),
+                    'no-head': ((405, '', b'') if method == 'HEAD' else (200, '', b'ok')),
+                    'slow': (200, '', b'ok'),
+                    'bad-chunk': (405, '', b''),  # HEAD; the GET answers above
+                    'short-body': (405, '', b''),
+                }.get(kind, (404, '', b''))
+                writer.write(f'HTTP/1.1 {status} Stub\r\nContent-Length: {len(body)}\r\n{headers}\r\n'.encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class Command(BaseCommand):
+    help = 'Check links against local stub HTTP servers, verify the results and report checks per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--links', type=int, default=2000)
+        parser.add_argument('--hosts', type=int, default=4, help='Stub servers, each a separate host:port')
+        parser.add_argument('--latency', type=float, default=0.02, help='Seconds each stub response takes')
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--per-host', type=int, default=8)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        servers = [StubServer(options['latency']) for _ in range(options['hosts'])]
+        for server in servers:
+            await server.start()
+        try:
+            urls = {
+                f'http://127.0.0.1:{servers[n % len(servers)].port}/{KINDS[n % len(KINDS)]}/{n}':
+                    EXPECTED[KINDS[n % len(KINDS)]]
+                for n in range(options['links'])
+            }
+            await self.throughput(servers, urls, options)
+            await self.sequential(urls, options)
+            await self.failures(servers[0], options)
+            await self.rate_limit(servers[0])
+        finally:
+            for server in servers:
+                await server.stop()
+
+    async def throughput(self, servers, urls, options):
+        checker = LinkChecker(concurrency=options['concurrency'], per_host=options['per_host'], rate=0, timeout=5)
+        results = {}
+
+        async def on_result(url, status, error):
+            results[url] = (status, error)
+
+        started = time.perf_counter()
+        await checker.run(urls, on_result)
+        elapsed = time.perf_counter() - started
+        wrong = [url for url, expected in urls.items() if results.get(url, (None,))[0] != expected]
+        accepted = sum(server.connections for server in servers)
+        self.stdout.write(f'{len(urls)} links on {len(servers)} hosts in {elapsed:.2f}s '
+                          f'({len(urls) / elapsed:.0f} checks/s)')
+        self.stdout.write(f"  ok {checker.stats['ok']}, broken {checker.stats['broken']}, "
+                          f"GET fallbacks {checker.stats['get_fallbacks']}, redirects {checker.stats['redirects']}")
+        self.stdout.write(f'  connections opened {checker.connections_opened} '
+                          f'(at most {options["per_host"]} per host), accepted by stubs {accepted}')
+        if wrong:
+            raise CommandError(f'{len(wrong)} links got the wrong status, e.g. {wrong[0]}: {results.get(wrong[0])}')
+        if checker.connections_opened > options['per_host'] * len(servers):
+            raise CommandError('Connections were not reused')
+
+    async def sequential(self, urls, options):
+        sample = dict(list(urls.items())[:50])
+        checker = LinkChecker(concurrency=1, per_host=1, rate=0, timeout=5)
+        started = time.perf_counter()
+        await checker.run(sample)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'one at a time: {len(sample)} links in {elapsed:.2f}s ({len(sample) / elapsed:.0f} checks/s)')
+
+    async def failures(self, server, options):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            closed_port = sock.getsockname()[1]  # Nothing listens here once the socket is closed
+        checker = LinkChecker(concurrency=4, per_host=2, rate=0, timeout=0.5)
+        base = f'http://127.0.0.1:{server.port}'
+        checks = {  # url -> (status, part of the error)
+            f'{base}/hang/': (None, 'Timed out'),
+            f'http://127.0.0.1:{closed_port}/': (None, 'refused'),
+            'ftp://example.com/file': (None, 'Not an http(s) URL'),
+            'http://127.0.0.1:99999/': (None, 'Invalid URL'),
+            'http://[::1/': (None, 'Invalid URL'),
+            f'{base}/ok/caf\u4e2d?q=\u00e9': (200, ''),  # Accepted by URLField; percent-encoded on the wire
+            f'{base}/bad-chunk/': (None, 'Malformed response'),
+            f'{base}/short-body/': (None, 'closed mid-response'),
+        }
+        results = {}
+
+        async def on_result(url, status, error):
+            results[url] = (status, error)
+
+        # Through run(), so a link that raised would end the whole batch here
+        await checker.run(checks, on_result)
+        for url, (expected_status, expected_error) in checks.items():
+            status, error = results[url]
+            if status != expected_status or expected_error.lower() not in error.lower():
+                raise CommandError(f'{url}: expected {expected_status} "{expected_error}", got {status} {error!r}')
+        self.stdout.write(f'failures: {len(checks)} unusual links and servers reported without ending the run')
+
+    async def rate_limit(self, server):
+        rate, count = 20, 30
+        checker = LinkChecker(concurrency=count, per_host=count, rate=rate, timeout=5)
+        server.requests.clear()
+        await checker.run([f'http://127.0.0.1:{server.port}/ok/rate-{n}' for n in range(count)])
+        span = server.requests[-1] - server.requests[0]
+        self.stdout.write(f'rate limit: {count} requests at {rate}/s to one host spread over {span:.2f}s')
+        if span < (count - 1) / rate * 0.9:
+            raise CommandError('The per-host rate limit was not applied')
@@ -0,0 +1,72 @@
+# events/management/commands/benchmark_login.py
+
+import re
+import time
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from events.models import UserProfile
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+BENCHMARK_USERNAME = 'otp-benchmark'
+BENCHMARK_PASSWORD = 'otp-benchmark-password'
+
+
+class Command(BaseCommand):
+    help = 'Measure DB queries and time per login + OTP round trip for each session backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50)
+        parser.add_argument('--mode', choices=sorted(SESSION_ENGINES), action='append',
+                            help='Session modes to compare (default: all)')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=BENCHMARK_USERNAME).first()
+        if user is None:
+            user = User.objects.create_user(BENCHMARK_USERNAME, 'otp-benchmark@example.com', BENCHMARK_PASSWORD)
+        UserProfile.objects.update_or_create(user=user, defaults={'is_2fa_enabled': True})
+
+        try:
+            for mode in options['mode'] or sorted(SESSION_ENGINES):
+                with override_settings(
+                    SESSION_ENGINE=SESSION_ENGINES[mode],
+                    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                    RATE_LIMIT_ENABLED=False,  # Every login comes from the same IP and username
+                ):
+                    self.benchmark(mode, options['logins'])
+        finally:
+            user.delete()
+
+    def benchmark(self, mode, logins):
+        mail.outbox = []
+        queries = writes = 0
+        started = time.perf_counter()
+        for _ in range(logins):
+            client = Client()
+            with CaptureQueriesContext(connection) as captured:
+                client.post(reverse('login'), {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD})
+                code = re.search(r'\d+', mail.outbox[-1].body).group()
+                response = client.post(reverse('verify_otp'), {'otp': code})
+            if response.status_code != 302 or '_auth_user_id' not in client.session:
+                self.stderr.write(f'{mode}: login did not complete')
+                return
+            queries += len(captured.captured_queries)
+            writes += sum(
+                1 for query in captured.captured_queries if query['sql'].lstrip().upper().startswith(WRITE_PREFIXES)
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{mode:15} {queries / logins:5.1f} queries/login   {writes / logins:5.1f} writes/login   '
+            f'{elapsed / logins * 1000:7.1f} ms/login'
+        )
@@ -0,0 +1,97 @@
+# events/management/commands/benchmark_partnership_graph.py
+
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.partnership_graph import CompactGraph
+
+
+def synthetic_edges(communities, partnerships, seed=0):
+    # Mostly local partnerships plus some long-range ones, roughly how real networks cluster
+    rng = random.Random(seed)
+    edges = []
+    for _ in range(partnerships):
+        a = rng.randrange(communities)
+        if rng.random() < 0.8:
+            b = min(communities - 1, max(0, a + rng.randint(-50, 50)))
+        else:
+            b = rng.randrange(communities)
+        edges.append((a + 1, b + 1))
+    return edges
+
+
+class Command(BaseCommand):
+    help = 'Build the partnership graph from a synthetic edge list and time its queries and incremental updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--communities', type=int, default=100000)
+        parser.add_argument('--partnerships', type=int, default=300000)
+        parser.add_argument('--queries', type=int, default=1000, help='Random lookups per query type')
+        parser.add_argument('--updates', type=int, default=5000, help='Partnerships added and removed incrementally')
+
+    def handle(self, *args, **options):
+        communities = options['communities']
+        if communities < 2:
+            raise CommandError('--communities must be at least 2')
+        edges = synthetic_edges(communities, options['partnerships'])
+        rng = random.Random(1)
+        self.stdout.write(f'{communities} communities, {len(edges)} partnerships\n')
+
+        started = time.perf_counter()
+        graph = CompactGraph(edges)
+        build = time.perf_counter() - started
+
+        # Memory is measured on a second build, as tracing slows it down several times
+        tracemalloc.start()
+        traced = CompactGraph(edges)
+        compact_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del traced
+
+        tracemalloc.start()
+        adjacency = {}
+        for a, b in edges:
+            if a != b:
+                adjacency.setdefault(a, set()).add(b)
+                adjacency.setdefault(b, set()).add(a)
+        sets_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del adjacency
+
+        stats = graph.stats()
+        self.stdout.write(f"build                  {build:.2f}s, {stats['partnered_pairs']} distinct pairs")
+        self.stdout.write(f'memory                 {compact_bytes / 2 ** 20:.1f} MiB (dict of sets: '
+                          f'{sets_bytes / 2 ** 20:.1f} MiB)')
+
+        nodes = [rng.randrange(communities) + 1 for _ in range(options['queries'])]
+        self.time('neighbours', lambda: [graph.neighbours(node) for node in nodes], len(nodes))
+        pairs = list(zip(nodes, reversed(nodes)))
+        found = []
+        self.time('separation (<= 6)', lambda: found.extend(graph.separation(a, b) for a, b in pairs), len(pairs))
+        reached = [hops for hops in found if hops is not None]
+        if reached:
+            self.stdout.write(f'  {len(reached)} of {len(pairs)} pairs within 6 hops, '
+                              f'mean {sum(reached) / len(reached):.2f} hops')
+
+        started = time.perf_counter()
+        groups = graph.components()
+        self.stdout.write(f'components             {time.perf_counter() - started:.2f}s, {len(groups)} groups, '
+                          f'largest {len(groups[0]) if groups else 0}')
+
+        updates = [(rng.randrange(communities) + 1, rng.randrange(communities) + 1) for _ in range(options['updates'])]
+        self.time('add partnership', lambda: [graph.change(a, b, 1) for a, b in updates], len(updates))
+        self.time('neighbours (overlay)', lambda: [graph.neighbours(a) for a, _ in updates], len(updates))
+        self.time('remove partnership', lambda: [graph.change(a, b, -1) for a, b in updates], len(updates))
+        graph.change(*updates[0], 1)
+        started = time.perf_counter()
+        graph.compact()
+        self.stdout.write(f'compact                {time.perf_counter() - started:.2f}s')
+
+    def time(self, label, run, count):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label:22} {elapsed / count * 1e6:9.1f} us each')
@@ -0,0 +1,119 @@
+# events/management/commands/benchmark_support_queue.py
+
+import random
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from events import support_queue
+from events.models import Community, SupportRequest
+
+BENCHMARK_NAME = 'support-queue-benchmark'
+BENCHMARK_USERNAME = 'queue-benchmark-{}'
+
+
+class Command(BaseCommand):
+    help = ('Let many volunteers claim support requests at the same time and check that every request is '
+            'claimed exactly once, and close to queue order')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--claimers', type=int, default=16, help='Volunteers claiming concurrently')
+        parser.add_argument('--strategy', choices=[support_queue.SKIP_LOCKED, support_queue.OPTIMISTIC],
+                            help='Default: skip_locked where the database supports it')
+
+    def handle(self, *args, **options):
+        strategy = options['strategy'] or support_queue.default_strategy()
+        if strategy == support_queue.SKIP_LOCKED and not connection.features.has_select_for_update_skip_locked:
+            raise CommandError(f'{connection.vendor} has no SELECT ... FOR UPDATE SKIP LOCKED')
+        community = Community.objects.order_by('pk').first()
+        if community is None:
+            raise CommandError('Benchmark needs at least one community')
+        if SupportRequest.objects.filter(status=support_queue.OPEN).exclude(user_name=BENCHMARK_NAME).exists():
+            raise CommandError('There are real open support requests; the claimers would take them too')
+
+        self.cleanup()  # Left by an aborted run
+        rng = random.Random(0)
+        SupportRequest.objects.bulk_create([
+            SupportRequest(community=community, user_name=BENCHMARK_NAME, request_details=f'Request {n}',
+                           priority=rng.choice(SupportRequest.PRIORITY_CHOICES)[0])
+            for n in range(options['requests'])
+        ])
+        User.objects.bulk_create([
+            User(username=BENCHMARK_USERNAME.format(n), password=make_password(None))
+            for n in range(options['claimers'])
+        ])
+        users = list(User.objects.filter(username__startswith=BENCHMARK_USERNAME.format('')))
+        try:
+            self.run(users, strategy, options['requests'])
+        finally:
+            self.cleanup()
+
+    def run(self, users, strategy, expected):
+        claims = {user.pk: [] for user in users}
+        errors = []
+        start = threading.Barrier(len(users))
+        conflicts_before = support_queue.get_metrics()['conflicts']
+
+        def volunteer(user):
+            try:
+                start.wait()
+                while True:
+                    claimed = support_queue.claim(user, strategy=strategy)
+                    if claimed is None:
+                        return
+                    claims[user.pk].append(claimed.pk)
+            except Exception as exc:  # Reported below; a failed claimer must not hang the others
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=volunteer, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise CommandError(f'{len(errors)} claimers failed, first: {errors[0]!r}')
+
+        claimed_ids = [pk for items in claims.values() for pk in items]
+        per_claimer = [len(items) for items in claims.values()]
+        rows = SupportRequest.objects.filter(user_name=BENCHMARK_NAME, status=support_queue.CLAIMED)
+        assigned = dict(rows.values_list('pk', 'assignee_id'))
+        mismatched = sum(1 for user_pk, items in claims.items() for pk in items if assigned.get(pk) != user_pk)
+
+        # How many more urgent requests were still open when each one was claimed
+        rank = {pk: n for n, pk in enumerate(rows.order_by(*support_queue.QUEUE_ORDER).values_list('pk', flat=True))}
+        claimed_later, overtaken = [], 0
+        for pk in reversed(rows.order_by('claimed_at', 'pk').values_list('pk', flat=True)):
+            overtaken = max(overtaken, bisect_left(claimed_later, rank[pk]))
+            insort(claimed_later, rank[pk])
+        # Concurrent claims can be stamped slightly out of order; the optimistic claim also picks within its candidates
+        allowed = len(users)
+        if strategy == support_queue.OPTIMISTIC:
+            allowed += getattr(settings, 'SUPPORT_QUEUE_CANDIDATES', 20)
+
+        self.stdout.write(f'{strategy}: {len(users)} volunteers claimed {len(claimed_ids)} of {expected} requests '
+                          f'in {elapsed:.2f}s ({len(claimed_ids) / elapsed:.0f} claims/s)')
+        self.stdout.write(f'  per volunteer      min {min(per_claimer)}, max {max(per_claimer)}')
+        self.stdout.write(f'  lost races         {support_queue.get_metrics()["conflicts"] - conflicts_before}')
+        self.stdout.write(f'  claimed twice      {len(claimed_ids) - len(set(claimed_ids))}')
+        self.stdout.write(f'  wrong assignee     {mismatched}')
+        self.stdout.write(f'  queue order        at most {overtaken} more urgent requests still open at a claim '
+                          f'(allowed {allowed})')
+        if len(set(claimed_ids)) != len(claimed_ids) or len(claimed_ids) != expected or mismatched:
+            raise CommandError('Claims were lost or duplicated')
+        if overtaken > allowed:
+            raise CommandError('Requests were claimed far out of queue order')
+
+    def cleanup(self):
+        SupportRequest.objects.filter(user_name=BENCHMARK_NAME).delete()
+        User.objects.filter(username__startswith=BENCHMARK_USERNAME.format('')).delete()
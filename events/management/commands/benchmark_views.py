@@ -0,0 +1,72 @@
+# events/management/commands/benchmark_views.py
+
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncRequestFactory
+
+from events import async_views, views
+from events.models import Community, Event
+
+VIEWS = ['home', 'index', 'event_list_view', 'event_details_view', 'community_details_view', 'interfaith_networking']
+
+
+class Command(BaseCommand):
+    help = 'Compare sync and async read-view throughput under concurrent ASGI-style requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', choices=VIEWS, action='append', help='Views to benchmark (default: all)')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per view and mode')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once')
+
+    def handle(self, *args, **options):
+        event = Event.objects.order_by('pk').first()
+        community = Community.objects.order_by('pk').first()
+        if event is None or community is None:
+            raise CommandError('Benchmark needs at least one community and one event')
+        kwargs = {
+            'event_details_view': {'event_id': event.pk},
+            'community_details_view': {'community_id': community.pk},
+        }
+
+        for name in options['view'] or VIEWS:
+            results = {}
+            for mode, module in (('sync', views), ('async', async_views)):
+                view = getattr(module, name)
+                if mode == 'sync':
+                    # This is how Django's ASGI handler runs a sync view
+                    view = sync_to_async(view, thread_sensitive=True)
+                results[mode] = asyncio.run(
+                    self.run(view, kwargs.get(name, {}), options['requests'], options['concurrency'])
+                )
+            speedup = results['async'] / results['sync'] if results['sync'] else 0
+            self.stdout.write(
+                f'{name:24} sync {results["sync"]:8.1f} req/s   async {results["async"]:8.1f} req/s   '
+                f'x{speedup:.2f}'
+            )
+
+    async def run(self, view, kwargs, total, concurrency):
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                request = factory.get('/')
+                request.session = SessionStore()
+                request.user = AnonymousUser()
+                request.auser = _anonymous
+                request._messages = FallbackStorage(request)
+                await view(request, **kwargs)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - started)
+
+
+async def _anonymous():
+    return AnonymousUser()
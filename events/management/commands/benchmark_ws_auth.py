@@ -0,0 +1,93 @@
+# events/management/commands/benchmark_ws_auth.py
+
+import time
+from http.cookies import SimpleCookie
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.auth import AuthMiddlewareStack
+from channels.routing import URLRouter
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import import_string
+
+from events import routing
+from events.ws_auth import CachedAuthMiddlewareStack
+
+STACKS = {
+    'uncached': AuthMiddlewareStack,
+    'cached': CachedAuthMiddlewareStack,
+}
+BENCHMARK_USERNAME = 'ws-benchmark-{}'
+
+
+class Command(BaseCommand):
+    help = 'Simulate a WebSocket reconnect storm and report DB queries per connect with and without the auth cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Distinct logged-in sessions')
+        parser.add_argument('--rounds', type=int, default=5, help='Times every session reconnects')
+
+    def handle(self, *args, **options):
+        User.objects.filter(username__startswith=BENCHMARK_USERNAME.format('')).delete()  # Left by an aborted run
+        # bulk_create skips the post_save signals, which aren't needed for throwaway accounts
+        User.objects.bulk_create([
+            User(username=BENCHMARK_USERNAME.format(n), password=make_password(None))
+            for n in range(options['users'])
+        ])
+        users = list(User.objects.filter(username__startswith=BENCHMARK_USERNAME.format('')))
+        cookies = [self.login_cookie(user) for user in users]
+        try:
+            for name, stack in STACKS.items():
+                self.benchmark(name, stack(URLRouter(routing.websocket_urlpatterns)), cookies, options['rounds'])
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def login_cookie(self, user):
+        # The session a browser would hold after logging in
+        store = import_string(settings.SESSION_ENGINE + '.SessionStore')()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.save()
+        cookie = SimpleCookie()
+        cookie[settings.SESSION_COOKIE_NAME] = store.session_key
+        return cookie.output(header='', sep='; ').strip().encode()
+
+    def benchmark(self, name, application, cookies, rounds):
+        connects = queries = 0
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            # async_to_sync keeps the consumers' DB calls on this thread, where the queries are captured
+            for _ in range(rounds):
+                for cookie in cookies:
+                    async_to_sync(self.connect)(application, cookie)
+                    connects += 1
+            queries = len(captured.captured_queries)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name:10} {connects} connects   {queries / connects:5.2f} queries/connect   '
+            f'{elapsed / connects * 1000:6.2f} ms/connect'
+        )
+
+    @staticmethod
+    async def connect(application, cookie):
+        scope = {
+            'type': 'websocket',
+            'path': '/ws/interfaith/',
+            'headers': [(b'cookie', cookie)],
+            'query_string': b'',
+            'subprotocols': [],
+        }
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'websocket.connect'})
+        message = await communicator.receive_output(timeout=5)
+        if message['type'] != 'websocket.accept':
+            raise RuntimeError(f'Connection was not accepted: {message}')
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(timeout=5)
@@ -0,0 +1,17 @@
+# events/management/commands/build_recommendations.py
+
+from django.core.management.base import BaseCommand
+
+from events.recommender import DEFAULT_TOP_K, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the similar-communities table used for event recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help='Neighbours stored per community')
+
+    def handle(self, *args, **options):
+        # Run periodically (e.g. nightly from cron); serving only reads the stored table
+        rows, seconds = rebuild(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f'Stored {rows} community neighbours in {seconds:.2f}s'))
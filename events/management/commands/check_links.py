@@ -0,0 +1,56 @@
+# events/management/commands/check_links.py
+
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+
+from events.linkcheck import SAVE_BATCH, LinkChecker, links_due, store_results
+
+
+class Command(BaseCommand):
+    help = 'Check resource links that are due and store their HTTP status on Resource'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, help='Seconds after which a checked link is due again')
+        parser.add_argument('--limit', type=int, help='Check at most this many distinct links')
+        parser.add_argument('--all', action='store_true', help='Check every link, however recently checked')
+        parser.add_argument('--concurrency', type=int, help='Checks running at once')
+        parser.add_argument('--per-host', type=int, help='Connections kept open to one host')
+        parser.add_argument('--rate', type=float, help='Requests a second to one host (0: unlimited)')
+        parser.add_argument('--timeout', type=float, help='Seconds allowed for connecting and for each response')
+
+    def handle(self, *args, **options):
+        links = links_due(interval=0 if options['all'] else options['interval'], limit=options['limit'])
+        if not links:
+            self.stdout.write('No links are due')
+            return
+        checker = LinkChecker(concurrency=options['concurrency'], per_host=options['per_host'],
+                              rate=options['rate'], timeout=options['timeout'])
+        started = time.perf_counter()
+        asyncio.run(self.check_links(checker, links))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            '{checked} links checked in {elapsed:.1f}s ({rate:.1f}/s): {ok} ok, {broken} broken, '
+            '{failed} unreachable; {connections} connections opened'.format(
+                elapsed=elapsed, rate=checker.stats['checked'] / elapsed,
+                connections=checker.connections_opened, **checker.stats)
+        ))
+
+    async def check_links(self, checker, links):
+        pending = []
+        save = sync_to_async(store_results)
+
+        async def on_result(url, status, error):
+            pending.append((url, status, error))
+            if len(pending) >= SAVE_BATCH:
+                batch = pending[:]
+                pending.clear()
+                await save(batch)
+
+        try:
+            await checker.run(links, on_result)
+        finally:
+            if pending:
+                await save(pending)  # Keep what was checked before an interruption
@@ -0,0 +1,47 @@
+# events/management/commands/export_data.py
+
+import sys
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from events.exports import EXPORTS, FORMATS, export_chunks
+
+
+class Command(BaseCommand):
+    help = 'Stream feedback, support requests, events or partnerships to a CSV/JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('path', help='Output file, or - for stdout')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output on the fly')
+        parser.add_argument('--trace-memory', action='store_true',
+                            help='Report peak Python memory used while exporting')
+
+    def handle(self, *args, **options):
+        if options['trace_memory']:
+            tracemalloc.start()
+        started = time.monotonic()
+
+        chunks = export_chunks(options['dataset'], options['format'], options['gzip'])
+        total = 0
+        if options['path'] == '-':
+            output = sys.stdout.buffer
+            for chunk in chunks:
+                output.write(chunk)
+                total += len(chunk)
+            output.flush()
+        else:
+            with open(options['path'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+                    total += len(chunk)
+
+        elapsed = time.monotonic() - started
+        self.stderr.write(f'Wrote {total} bytes in {elapsed:.2f}s')
+        if options['trace_memory']:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stderr.write(f'Peak traced memory: {peak / 1024 / 1024:.1f} MiB')
@@ -0,0 +1,34 @@
+# events/management/commands/geocode_events.py
+
+from django.core.management.base import BaseCommand
+
+from events.geo import apply_geocode
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Fill in coordinates and grid cells for events saved before geocoding existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help='Recompute every event, not just missing cells')
+
+    def handle(self, *args, **options):
+        events = Event.objects.only('id', 'location', 'latitude', 'longitude', 'geo_cell').order_by('id')
+        if not options['all']:
+            events = events.filter(geo_cell__isnull=True)
+
+        batch = []
+        located = 0
+        for event in events.iterator(chunk_size=options['batch_size']):
+            apply_geocode(event)
+            if event.geo_cell:
+                located += 1
+                batch.append(event)
+            if len(batch) >= options['batch_size']:
+                Event.objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+                batch = []
+        if batch:
+            Event.objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+
+        self.stdout.write(self.style.SUCCESS(f'Located {located} events'))
@@ -0,0 +1,60 @@
+# events/management/commands/import_data.py
+
+import csv
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from events.importers import DEFAULT_BATCH_SIZE, IMPORTERS, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import communities or events from a CSV, JSON or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(IMPORTERS), help='Kind of rows in the file')
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'],
+                            help='Input format (defaults to the file extension)')
+        parser.add_argument('--user', help='Username used as created_by for rows that do not name one')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--errors', help='Where to write rejected rows (defaults to <path>.errors.csv); '
+                                             'each has its error and the row itself as JSON, to fix and re-import')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in ('csv', 'json', 'jsonl'):
+            raise CommandError('Cannot guess the format, pass --format csv|json|jsonl')
+
+        default_user = None
+        if options['user']:
+            try:
+                default_user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["user"]}" does not exist')
+
+        error_path = options['errors'] or f'{path}.errors.csv'
+        with open(path, newline='', encoding='utf-8-sig') as source, \
+                open(error_path, 'w', newline='', encoding='utf-8') as error_file:
+            error_writer = csv.writer(error_file)
+            error_writer.writerow(['position', 'error', 'row'])
+            importer = IMPORTERS[options['model']](
+                default_user=default_user,
+                batch_size=options['batch_size'],
+                error_writer=error_writer,
+            )
+            try:
+                report = importer.run(iter_rows(source, fmt))
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} {options["model"]} rows in {report.elapsed:.2f}s '
+            f'({report.rows_per_second:.0f} rows/sec)'
+        ))
+        if report.failed:
+            self.stdout.write(self.style.WARNING(f'{report.failed} rows rejected, see {error_path}'))
+        else:
+            os.remove(error_path)  # Nothing to report
@@ -0,0 +1,38 @@
+# events/management/commands/loadtest_chat.py
+
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+
+from events import wire
+from events.loadtest import ChatLoadTest, format_report
+
+
+class Command(BaseCommand):
+    help = 'Drive simulated WebSocket clients against ChatConsumer in-process and report latency and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--rate', type=float, default=20, help='Chat messages per second across all clients')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds of sending')
+        parser.add_argument('--protocol', choices=[wire.JSON, wire.MSGPACK], help='Subprotocol the clients ask for')
+        parser.add_argument('--connect-concurrency', type=int, default=100, help='Clients connecting at once')
+        parser.add_argument('--drain', type=float, default=2.0, help='Seconds to wait for deliveries after sending')
+        parser.add_argument('--slow-clients', type=int, default=0, help='Clients that read slowly and never send')
+        parser.add_argument('--slow-delay', type=float, default=0.5, help='Seconds a slow client takes per frame')
+        parser.add_argument('--json', action='store_true', help='Print the raw results as JSON')
+
+    def handle(self, *args, **options):
+        # Uses CHANNEL_LAYERS as configured, so it measures the layer this worker really runs on
+        result = asyncio.run(ChatLoadTest(
+            clients=options['clients'],
+            rate=options['rate'],
+            duration=options['duration'],
+            protocol=options['protocol'],
+            connect_concurrency=options['connect_concurrency'],
+            drain=options['drain'],
+            slow_clients=options['slow_clients'],
+            slow_delay=options['slow_delay'],
+        ).run())
+        self.stdout.write(json.dumps(result, indent=2) if options['json'] else format_report(result))
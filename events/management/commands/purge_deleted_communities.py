@@ -0,0 +1,41 @@
+# events/management/commands/purge_deleted_communities.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.models import Community
+from events.purge import DEFAULT_CHUNK_SIZE, purge_community
+
+
+class Command(BaseCommand):
+    help = 'Delete soft-deleted communities and their related rows in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between chunks')
+        parser.add_argument('--loop', type=float, metavar='SECONDS',
+                            help='Keep running, checking for new deletions every SECONDS')
+
+    def handle(self, *args, **options):
+        while True:
+            pending = Community.all_objects.filter(is_deleted=True).order_by('deleted_at', 'pk')
+            for community_id, name in pending.values_list('pk', 'name'):
+                self.stdout.write(f'Purging community {community_id} ({name})')
+                started = time.monotonic()
+                deleted = purge_community(
+                    community_id,
+                    chunk_size=options['chunk_size'],
+                    progress=self.report_progress,
+                    pause=options['pause'],
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f'Purged community {community_id}: {sum(deleted.values())} related rows '
+                    f'in {time.monotonic() - started:.2f}s'
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
+
+    def report_progress(self, model, deleted):
+        self.stdout.write(f'  {model._meta.verbose_name_plural}: {deleted} deleted')
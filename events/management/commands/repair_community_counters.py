@@ -0,0 +1,17 @@
+# events/management/commands/repair_community_counters.py
+
+from django.core.management.base import BaseCommand
+
+from events.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized event/resource/feedback counts and next event for every community'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Run periodically (e.g. from cron): also moves next_event on once its date has passed
+        repaired = reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired {repaired} communities'))
@@ -0,0 +1,42 @@
+# events/management/commands/run_reminders.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = 'Send event and RSVP-deadline reminders as they fall due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send what is due now and exit (for cron)')
+        parser.add_argument('--tick', type=float, default=1.0, help='Seconds between checks for due reminders')
+        parser.add_argument('--reload', type=float, default=300,
+                            help='Seconds between loads of the upcoming window into the timing wheel')
+        parser.add_argument('--window', type=int, help='Seconds of upcoming reminders held in memory')
+        parser.add_argument('--workers', type=int, help='Threads sending reminder emails')
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(window=options['window'], workers=options['workers'])
+        try:
+            scheduler.load()
+            next_load = time.monotonic() + options['reload']
+            while True:
+                sent = scheduler.run_once()
+                if sent:
+                    self.stdout.write(f'Sent {sent} reminders')
+                if options['once']:
+                    break
+                if time.monotonic() >= next_load:
+                    scheduler.load()
+                    next_load = time.monotonic() + options['reload']
+                time.sleep(options['tick'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.shutdown()  # Let queued emails finish
+        self.stdout.write(self.style.SUCCESS(
+            'Reminders: {loaded} loaded, {notified} sent, {emailed} emailed, {skipped} skipped'.format(**scheduler.stats)
+        ))
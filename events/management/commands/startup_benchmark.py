@@ -0,0 +1,75 @@
+# events/management/commands/startup_benchmark.py
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is already imported
+CHILD_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+from django.conf import settings
+from django.utils.module_loading import import_string
+import_string(settings.ASGI_APPLICATION)
+asgi_done = time.perf_counter()
+print(json.dumps({
+    'django.setup()': setup_done - started,
+    'URLconf': urls_done - setup_done,
+    'ASGI application': asgi_done - urls_done,
+    'total': asgi_done - started,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure worker boot time (django.setup, URLconf, ASGI app) and which imports dominate it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list in the import breakdown')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE))
+        phases = defaultdict(list)
+        self_times = defaultdict(list)  # top-level package -> self import time (us) per run
+
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT],
+                capture_output=True, text=True, env=env, cwd=getattr(settings, 'BASE_DIR', None),
+            )
+            if result.returncode != 0:
+                raise CommandError(f'Worker boot failed:\n{result.stderr[-2000:]}')
+            for phase, seconds in json.loads(result.stdout.strip().splitlines()[-1]).items():
+                phases[phase].append(seconds)
+
+            run_totals = defaultdict(int)
+            for line in result.stderr.splitlines():
+                # "import time:       self [us] |      cumulative | imported package"
+                if not line.startswith('import time:') or 'imported package' in line:
+                    continue
+                own, _, module = line[len('import time:'):].split('|')
+                run_totals[module.strip().split('.')[0]] += int(own)
+            for package, micros in run_totals.items():
+                self_times[package].append(micros)
+
+        self.stdout.write(f'Median over {options["runs"]} runs:')
+        for phase, samples in phases.items():
+            self.stdout.write(f'  {phase:18} {statistics.median(samples) * 1000:8.1f} ms')
+
+        self.stdout.write('\nSlowest packages to import (self time, median):')
+        ranked = sorted(self_times.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for package, samples in ranked[:options['top']]:
+            self.stdout.write(f'  {package:30} {statistics.median(samples) / 1000:8.1f} ms')
@@ -0,0 +1,24 @@
+# events/management/commands/update_rollups.py
+
+from django.core.management.base import BaseCommand
+
+from events import rollups
+
+
+class Command(BaseCommand):
+    help = 'Count events, feedback and support requests added since the last run into the analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Drop the rollups and count everything again')
+        parser.add_argument('--settle', type=float, default=None,
+                            help='Leave rows younger than this many seconds for the next run')
+
+    def handle(self, *args, **options):
+        # Run every few minutes (e.g. from cron); it also picks up bulk-imported rows, which send no signals
+        if options['rebuild']:
+            counted = rollups.rebuild(options['settle'])
+        else:
+            counted = rollups.catch_up_all(options['settle'])
+        for source, rows in counted.items():
+            self.stdout.write(f'{source}: {rows} rows counted')
+        self.stdout.write(self.style.SUCCESS('Rollups are up to date'))
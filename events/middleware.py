@@ -0,0 +1,230 @@
+# events/middleware.py
+
+import threading
+import time
+import zlib
+from collections import deque
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Bodies of these types are already compressed; running them through gzip again wastes CPU
+INCOMPRESSIBLE_TYPES = ('image/', 'video/', 'audio/', 'font/woff', 'application/gzip', 'application/zip',
+                        'application/x-gzip', 'application/pdf', 'application/octet-stream')
+RECENT_SAMPLES = 1000  # Per-response samples kept for the metrics view
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+
+def accepted_encodings(accept_encoding):
+    """Content codings an Accept-Encoding value allows, leaving out any refused with q=0.
+
+    A ``*`` with a non-zero q-value allows gzip and br unless they are listed
+    themselves; an unparseable q-value counts as a refusal.
+    """
+    qualities = {}
+    for part in accept_encoding.lower().split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    accepted = {coding for coding, quality in qualities.items() if quality > 0 and coding != '*'}
+    if qualities.get('*', 0) > 0:
+        accepted.update(coding for coding in ('br', 'gzip') if coding not in qualities)
+    return accepted
+
+
+class _CompressionMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = {}  # encoding -> {'responses', 'bytes_in', 'bytes_out', 'cpu_seconds'}
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def record(self, path, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            totals = self.totals.setdefault(
+                encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0}
+            )
+            totals['responses'] += 1
+            totals['bytes_in'] += bytes_in
+            totals['bytes_out'] += bytes_out
+            totals['cpu_seconds'] += cpu_seconds
+            self.recent.append({
+                'path': path,
+                'encoding': encoding,
+                'bytes_in': bytes_in,
+                'bytes_out': bytes_out,
+                'ratio': bytes_out / bytes_in if bytes_in else 1.0,
+                'cpu_ms': cpu_seconds * 1000,
+            })
+
+    def snapshot(self):
+        with self._lock:
+            totals = {
+                encoding: dict(values, ratio=values['bytes_out'] / values['bytes_in'] if values['bytes_in'] else 1.0)
+                for encoding, values in self.totals.items()
+            }
+            return {'totals': totals, 'recent': list(self.recent)}
+
+
+compression_metrics = _CompressionMetrics()
+
+
+class _GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        # Z_SYNC_FLUSH lets a streamed chunk reach the client without waiting for the next one
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with brotli (when installed) or gzip, including streaming ones.
+
+    Small bodies, responses that already have a Content-Encoding and types that
+    are compressed by nature are left alone. Every compressed response records
+    its size ratio and the CPU time spent compressing in ``compression_metrics``.
+
+    Responses that may carry secrets are sent uncompressed too, as the BREACH
+    mitigation: an attacker who can inject guesses into a compressed page next
+    to a secret can read the secret off the compressed length. See
+    ``carries_secrets``.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not 200 <= response.status_code < 300:
+            return response
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(INCOMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 200):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if self.carries_secrets(request, response, content_type):
+            return response
+        encoder_class = self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoder_class is None:
+            return response
+        level = getattr(settings, 'COMPRESSION_LEVEL', 6)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async(request.path, response.streaming_content,
+                                                                 encoder_class(level))
+            else:
+                response.streaming_content = self.compress_stream(request.path, response.streaming_content,
+                                                                  encoder_class(level))
+            del response.headers['Content-Length']
+        else:
+            started = time.process_time()
+            encoder = encoder_class(level)
+            compressed = encoder.compress(response.content) + encoder.finish()
+            cpu_seconds = time.process_time() - started
+            if len(compressed) >= len(response.content):
+                return response
+            compression_metrics.record(request.path, encoder.name, len(response.content), len(compressed), cpu_seconds)
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag  # The bytes differ from the uncompressed representation
+        response.headers['Content-Encoding'] = encoder_class.name
+        return response
+
+    @staticmethod
+    def carries_secrets(request, response, content_type):
+        # The CSRF token was rendered into the body (get_token() marks the request), or a cookie such as the
+        # session or CSRF cookie is being set. Django masks the CSRF token afresh per response, but other
+        # secrets on the page get no such protection.
+        if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or response.cookies:
+            return True
+        # Signed-in pages show personal data next to input echoed back from the request (search terms, form
+        # values), the setting BREACH needs; COMPRESSION_AUTHENTICATED_HTML = True opts back in
+        user = getattr(request, 'user', None)
+        return (user is not None and user.is_authenticated and content_type.startswith(HTML_TYPES)
+                and not getattr(settings, 'COMPRESSION_AUTHENTICATED_HTML', False))
+
+    @staticmethod
+    def negotiate(accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        if brotli is not None and 'br' in accepted:
+            return _BrotliEncoder
+        if 'gzip' in accepted:
+            return _GzipEncoder
+        return None
+
+    @staticmethod
+    def compress_stream(path, chunks, encoder):
+        bytes_in = bytes_out = 0
+        cpu_seconds = 0.0
+        for chunk in chunks:
+            started = time.process_time()
+            data = encoder.compress(chunk) + encoder.flush()
+            cpu_seconds += time.process_time() - started
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        started = time.process_time()
+        tail = encoder.finish()
+        cpu_seconds += time.process_time() - started
+        compression_metrics.record(path, encoder.name, bytes_in, bytes_out + len(tail), cpu_seconds)
+        yield tail
+
+    @staticmethod
+    async def compress_async(path, chunks, encoder):
+        bytes_in = bytes_out = 0
+        cpu_seconds = 0.0
+        async for chunk in chunks:
+            started = time.process_time()
+            data = encoder.compress(chunk) + encoder.flush()
+            cpu_seconds += time.process_time() - started
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        started = time.process_time()
+        tail = encoder.finish()
+        cpu_seconds += time.process_time() - started
+        compression_metrics.record(path, encoder.name, bytes_in, bytes_out + len(tail), cpu_seconds)
+        yield tail
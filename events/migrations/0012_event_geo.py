@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_remove_userprofile_two_fa_secret'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='geo_cell',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1 on 2026-10-19 15:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def backfill_counters(apps, schema_editor):
+    Community = apps.get_model('events', 'Community')
+    updates = {}
+    for model_name, field in (('Event', 'event_count'), ('Resource', 'resource_count'), ('Feedback', 'feedback_count')):
+        model = apps.get_model('events', model_name)
+        counts = (
+            model.objects.filter(community=OuterRef('pk'))
+            .order_by()
+            .values('community')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updates[field] = Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    Event = apps.get_model('events', 'Event')
+    updates['next_event'] = Subquery(
+        Event.objects.filter(community=OuterRef('pk'), date__gte=timezone.now()).order_by('date', 'pk').values('pk')[:1]
+    )
+    Community.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_event_geo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='event_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='feedback_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='next_event',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='events.event'),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='resource_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['community', 'date'], name='events_even_communi_43c60a_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
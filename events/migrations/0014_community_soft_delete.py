@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_community_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='is_deleted',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+    ]
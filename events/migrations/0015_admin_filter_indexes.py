@@ -0,0 +1,53 @@
+# Generated by Django 5.1 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_community_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='community',
+            name='is_interfaith',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='type',
+            field=models.CharField(choices=[('public', 'Public'), ('private', 'Private'), ('interfaith', 'Interfaith')], db_index=True, default='public', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='feedback_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='partnership',
+            name='partnership_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='supportrequest',
+            name='request_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='unifiednight',
+            name='date',
+            field=models.DateField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommunitySimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('community', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar', to='events.community')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='events.community')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['community', '-score'], name='events_comm_communi_82bc2f_idx')],
+            },
+        ),
+    ]
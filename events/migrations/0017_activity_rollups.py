@@ -0,0 +1,43 @@
+# Generated by Django 5.1 on 2026-10-19 16:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_community_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20, unique=True)),
+                ('high_water', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('events', 'Events'), ('feedback', 'Feedback'), ('support_requests', 'Support requests')], max_length=20)),
+                ('month', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('community', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='events.community')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['source', 'month'], name='events_acti_source_f399b3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'community', 'month'), name='unique_activity_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, unique=True)),
+                ('high_water', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='date',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='rsvp_deadline',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
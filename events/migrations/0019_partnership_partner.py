@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-19 15:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def resolve_partners(apps, schema_editor):
+    # Link existing partnerships whose partner_name is the name of a community (ignoring case)
+    Community = apps.get_model('events', 'Community')
+    Partnership = apps.get_model('events', 'Partnership')
+    by_name = {name.casefold(): pk for pk, name in Community.objects.values_list('pk', 'name').iterator(chunk_size=5000)}
+    batch = []
+    for partnership in Partnership.objects.only('pk', 'partner_name').iterator(chunk_size=2000):
+        partner_id = by_name.get(partnership.partner_name.strip().casefold())
+        if partner_id is not None:
+            partnership.partner_id = partner_id
+            batch.append(partnership)
+        if len(batch) >= 2000:
+            Partnership.objects.bulk_update(batch, ['partner'])
+            batch = []
+    Partnership.objects.bulk_update(batch, ['partner'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0018_event_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partnership',
+            name='partner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='partnered_by', to='events.community'),
+        ),
+        migrations.RunPython(resolve_partners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0020_support_request_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='link_checked_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='link_error',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='link_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0021_resource_link_check'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feedback',
+            name='user_name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -3,7 +3,6 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models.signals import post_save
-import pyotp  # You'll need to install the pyotp package for generating TOTP
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -22,12 +21,35 @@ def create_user_profile(sender, instance, created, **kwargs):
 post_save.connect(create_user_profile, sender=User)
 
 
+class ActiveCommunityManager(models.Manager):
+    # Hides communities that are waiting for the background purge
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class ActiveCommunityChildManager(models.Manager):
+    # Hides the rows (events, support requests, resources, ...) of communities waiting for the background purge
+    def get_queryset(self):
+        return super().get_queryset().filter(community__is_deleted=False)
+
+
 # Model representing a Community
 class Community(models.Model):
     name = models.CharField(max_length=100, unique=True)  # Community name, must be unique
     description = models.TextField()  # Description of the community
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)  # User who created the community
-    is_interfaith = models.BooleanField(default=False)  # Flag to identify interfaith communities
+    is_interfaith = models.BooleanField(default=False, db_index=True)  # Flag to identify interfaith communities
+    # Denormalized stats kept up to date by signals (see events/counters.py) and
+    # the repair_community_counters command, so lists don't aggregate per community
+    event_count = models.PositiveIntegerField(default=0, editable=False)
+    resource_count = models.PositiveIntegerField(default=0, editable=False)
+    feedback_count = models.PositiveIntegerField(default=0, editable=False)
+    next_event = models.ForeignKey('Event', null=True, blank=True, on_delete=models.SET_NULL, related_name='+', editable=False)
+    is_deleted = models.BooleanField(default=False, db_index=True, editable=False)  # Soft delete, purged by purge_deleted_communities
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ActiveCommunityManager()
+    all_objects = models.Manager()  # Includes soft-deleted communities
 
     def __str__(self):
         return self.name  # Display community name in the admin interface and other uses
@@ -43,14 +65,26 @@ class Event(models.Model):
 
     community = models.ForeignKey(Community, on_delete=models.CASCADE)  # Event belongs to a community
     title = models.CharField(max_length=200)  # Event title
-    date = models.DateTimeField(null=True, blank=True)  # Date and time of the event
+    date = models.DateTimeField(null=True, blank=True, db_index=True)  # Date and time of the event
     location = models.CharField(max_length=200)  # Location of the event
     description = models.TextField()  # Detailed description of the event
     organizer = models.CharField(max_length=100)  # Name of the event organizer
     max_participants = models.PositiveIntegerField(null=True, blank=True)  # Maximum participants, can be null
-    rsvp_deadline = models.DateTimeField(null=True, blank=True)  # Deadline for RSVPs, optional
+    rsvp_deadline = models.DateTimeField(null=True, blank=True, db_index=True)  # Deadline for RSVPs, optional
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)  # User who created the event
-    type = models.CharField(max_length=10, choices=EVENT_TYPE_CHOICES, default='public')  # Event type (public/private)
+    type = models.CharField(max_length=10, choices=EVENT_TYPE_CHOICES, default='public', db_index=True)  # Event type (public/private)
+    latitude = models.FloatField(null=True, blank=True)  # Set explicitly or geocoded from location
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.CharField(max_length=12, null=True, blank=True, db_index=True, editable=False)  # Geohash of lat/lon for nearby queries
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, editable=False)  # High-water mark for the analytics rollups
+
+    objects = ActiveCommunityChildManager()
+    all_objects = models.Manager()  # Includes rows of soft-deleted communities
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['community', 'date']),  # Upcoming events per community
+        ]
 
     def clean(self):
         # Validate that the event date is not in the past
@@ -68,7 +102,7 @@ class Event(models.Model):
 # Model representing a Unified Night event (if applicable)
 class UnifiedNight(models.Model):
     name = models.CharField(max_length=100)  # Name of the unified night event
-    date = models.DateField()  # Date of the event
+    date = models.DateField(db_index=True)  # Date of the event
     location = models.CharField(max_length=255)  # Location where the event takes place
     description = models.TextField(blank=True)  # Optional description of the event
 
@@ -79,7 +113,7 @@ class UnifiedNight(models.Model):
 # Model representing an Activity
 class Activity(models.Model):
     name = models.CharField(max_length=100)  # Name of the activity
-    date = models.DateField()  # Date when the activity will take place
+    date = models.DateField(db_index=True)  # Date when the activity will take place
     description = models.TextField(blank=True)  # Optional description of the activity
 
     def __str__(self):
@@ -90,19 +124,56 @@ class Activity(models.Model):
 class Partnership(models.Model):
     community = models.ForeignKey(Community, related_name='partnerships', on_delete=models.CASCADE)
     partner_name = models.CharField(max_length=100)
-    partnership_date = models.DateField()
+    # The partner when it is a community here too; resolved from partner_name on save (see events/partnership_graph.py)
+    partner = models.ForeignKey(Community, null=True, blank=True, related_name='partnered_by', on_delete=models.SET_NULL)
+    partnership_date = models.DateField(db_index=True)
     description = models.TextField()
 
+    objects = ActiveCommunityChildManager()
+    all_objects = models.Manager()  # Includes rows of soft-deleted communities
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'partner_name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'partner'}  # A new name may resolve to another partner
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.partner_name
 
 
 # Model representing a Support Request
 class SupportRequest(models.Model):
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('claimed', 'Claimed'),
+        ('resolved', 'Resolved'),
+    ]
+    PRIORITY_CHOICES = [
+        (1, 'Urgent'),
+        (2, 'High'),
+        (3, 'Normal'),
+        (4, 'Low'),
+    ]
+
     community = models.ForeignKey(Community, related_name='support_requests', on_delete=models.CASCADE)
     user_name = models.CharField(max_length=100)
-    request_date = models.DateTimeField(auto_now_add=True)
+    request_date = models.DateTimeField(auto_now_add=True, db_index=True)
     request_details = models.TextField()
+    # Volunteer work queue (see events/support_queue.py); lower priority numbers are handled first
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=3)
+    assignee = models.ForeignKey(User, null=True, blank=True, related_name='assigned_support_requests', on_delete=models.SET_NULL)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveCommunityChildManager()
+    all_objects = models.Manager()  # Includes rows of soft-deleted communities
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'priority', 'request_date']),  # Next open request to claim
+        ]
 
     def __str__(self):
         return f"Support Request by {self.user_name}"
@@ -114,16 +185,31 @@ class Resource(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     link = models.URLField()
+    # Last result of the check_links command (events/linkcheck.py)
+    link_status = models.PositiveSmallIntegerField(null=True, blank=True)  # Final HTTP status; None if unreachable
+    link_error = models.CharField(max_length=100, blank=True)  # Why the link couldn't be fetched
+    link_checked_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = ActiveCommunityChildManager()
+    all_objects = models.Manager()  # Includes rows of soft-deleted communities
 
     def __str__(self):
         return self.title
 
+    @property
+    def link_broken(self):
+        # Unknown until checked
+        return self.link_checked_at is not None and (self.link_status is None or self.link_status >= 400)
+
 
 # Model representing a Notification
 class Notification(models.Model):
     community = models.ForeignKey(Community, related_name='notifications', on_delete=models.CASCADE)
     message = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = ActiveCommunityChildManager()
+    all_objects = models.Manager()  # Includes rows of soft-deleted communities
 
     def __str__(self):
         return self.message[:50]  # Display first 50 characters
@@ -132,9 +218,72 @@ class Notification(models.Model):
 # Model representing Feedback
 class Feedback(models.Model):
     community = models.ForeignKey(Community, related_name='feedbacks', on_delete=models.CASCADE)
-    user_name = models.CharField(max_length=100)
-    feedback_date = models.DateTimeField(auto_now_add=True)
+    user_name = models.CharField(max_length=100, db_index=True)  # Looked up per user by the recommender
+    feedback_date = models.DateTimeField(auto_now_add=True, db_index=True)
     feedback_text = models.TextField()
 
+    objects = ActiveCommunityChildManager()
+    all_objects = models.Manager()  # Includes rows of soft-deleted communities
+
     def __str__(self):
         return f"Feedback from {self.user_name}"
+
+
+# Precomputed top-K similar communities, rebuilt by the build_recommendations command
+class CommunitySimilarity(models.Model):
+    community = models.ForeignKey(Community, related_name='similar', on_delete=models.CASCADE)
+    neighbour = models.ForeignKey(Community, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()  # Cosine similarity of the two communities' member interactions
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['community', '-score']),  # Neighbours of a community, best first
+        ]
+
+    def __str__(self):
+        return f"{self.community_id} -> {self.neighbour_id} ({self.score:.3f})"
+
+
+# Per-community monthly counts, maintained incrementally by events/rollups.py
+class ActivityRollup(models.Model):
+    SOURCE_CHOICES = [
+        ('events', 'Events'),
+        ('feedback', 'Feedback'),
+        ('support_requests', 'Support requests'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    community = models.ForeignKey(Community, related_name='+', on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'community', 'month'], name='unique_activity_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['source', 'month']),  # Dashboard totals per month
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.community_id} {self.month:%Y-%m}: {self.count}"
+
+
+# How far each rollup source has been counted
+class RollupWatermark(models.Model):
+    source = models.CharField(max_length=20, unique=True)
+    high_water = models.DateTimeField(null=True, blank=True)  # Rows stamped at or before this are counted
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.high_water}"
+
+
+# Reminders of each kind due at or before high_water have been sent (see events/reminders.py)
+class ReminderWatermark(models.Model):
+    kind = models.CharField(max_length=20, unique=True)
+    high_water = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} @ {self.high_water}"
@@ -0,0 +1,63 @@
+# events/otp.py
+#
+# Short-lived one-time passwords for the login flow. Codes live in a Django
+# cache (OTP_CACHE_ALIAS, in-process LocMemCache by default) with a TTL instead
+# of in the session, so issuing and checking a code never writes to the DB.
+
+import hmac
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+
+OTP_DIGITS = 6
+
+
+def _cache():
+    return caches[getattr(settings, 'OTP_CACHE_ALIAS', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'OTP_TTL', 300)
+
+
+def _keys(username):
+    return f'otp:code:{username}', f'otp:attempts:{username}'
+
+
+def issue_otp(username):
+    """Create a fresh code for ``username``, replacing any pending one."""
+    code = f'{secrets.randbelow(10 ** OTP_DIGITS):0{OTP_DIGITS}d}'
+    code_key, attempts_key = _keys(username)
+    cache = _cache()
+    cache.set_many({code_key: code, attempts_key: 0}, _ttl())
+    return code
+
+
+def check_otp(username, code):
+    """Return True if ``code`` matches the pending code for ``username``.
+
+    Every check counts as an attempt; after OTP_MAX_ATTEMPTS the code is
+    discarded. A successful check also discards it, so codes are single use.
+    """
+    if not username or not code:
+        return False
+    code_key, attempts_key = _keys(username)
+    cache = _cache()
+    stored = cache.get(code_key)
+    if stored is None:
+        return False
+
+    try:
+        attempts = cache.incr(attempts_key)  # Atomic, unlike a read-modify-write of the session
+    except ValueError:
+        return False  # Expired between the two reads
+    if attempts > getattr(settings, 'OTP_MAX_ATTEMPTS', 5):
+        cache.delete_many([code_key, attempts_key])
+        return False
+
+    if hmac.compare_digest(stored.encode(), str(code).strip().encode()):
+        cache.delete_many([code_key, attempts_key])
+        return True
+    return False
+
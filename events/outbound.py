@@ -0,0 +1,156 @@
+# events/outbound.py
+#
+# Bounded per-connection send queues for the chat. Group messages are put on
+# the connection's queue and a writer task sends them, so a client that reads
+# slowly no longer stalls its consumer (which then stops draining its channel
+# layer queue) and can never hold more than CHAT_OUTBOUND_QUEUE_SIZE frames.
+# What happens when the queue is full is CHAT_OUTBOUND_POLICY:
+#
+#   drop_oldest  discard the oldest queued frame
+#   coalesce     as drop_oldest, but a frame that supersedes a queued one of the
+#                same kind (presence counts) replaces it in place
+#   disconnect   close the connection with 1013 (try again later); the client
+#                reconnects and starts from a clean queue
+
+import asyncio
+import threading
+from collections import deque
+
+from django.conf import settings
+
+DROP_OLDEST = 'drop_oldest'
+COALESCE = 'coalesce'
+DISCONNECT = 'disconnect'
+POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+DEPTH_BUCKETS = (0, 1, 10, 50, 100, 500)  # Lower bounds of the queue-depth histogram in the metrics
+
+
+class _QueueMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = set()
+        self.totals = {'queued': 0, 'sent': 0, 'dropped': 0, 'coalesced': 0, 'disconnected': 0}
+        self.high_water = 0  # Deepest any queue has been
+
+    def register(self, queue):
+        with self._lock:
+            self._queues.add(queue)
+
+    def unregister(self, queue):
+        with self._lock:
+            self._queues.discard(queue)
+
+    def count(self, name, depth=None):
+        with self._lock:
+            self.totals[name] += 1
+            if depth is not None and depth > self.high_water:
+                self.high_water = depth
+
+    def snapshot(self):
+        with self._lock:
+            depths = [len(queue) for queue in self._queues]
+            histogram = {str(bound): 0 for bound in DEPTH_BUCKETS}
+            for depth in depths:
+                bound = max(bound for bound in DEPTH_BUCKETS if bound <= depth)
+                histogram[str(bound)] += 1
+            return {
+                'connections': len(depths),
+                'queued_now': sum(depths),
+                'deepest_now': max(depths, default=0),
+                'high_water': self.high_water,
+                'depth_histogram': histogram,
+                'size': _size(),
+                'policy': _policy(),
+                **self.totals,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.totals = dict.fromkeys(self.totals, 0)
+            self.high_water = 0
+
+
+queue_metrics = _QueueMetrics()
+
+
+def _size():
+    return getattr(settings, 'CHAT_OUTBOUND_QUEUE_SIZE', 100)
+
+
+def _policy():
+    return getattr(settings, 'CHAT_OUTBOUND_POLICY', COALESCE)
+
+
+class OutboundQueue:
+    """Frames waiting to be sent on one WebSocket, at most ``size`` of them."""
+
+    def __init__(self, send, close, size=None, policy=None):
+        self._send = send  # AsyncWebsocketConsumer.send
+        self._close = close  # AsyncWebsocketConsumer.close
+        self.size = size or _size()
+        self.policy = policy or _policy()
+        if self.policy not in POLICIES:
+            raise ValueError(f'Unknown outbound queue policy: {self.policy}')
+        self._frames = deque()  # [key, send kwargs], oldest first
+        self._keyed = {}  # key -> its entry in _frames, for coalescing
+        self._ready = asyncio.Event()
+        self._writer = None
+        self.closed = False
+
+    def __len__(self):
+        return len(self._frames)
+
+    def start(self):
+        self._writer = asyncio.create_task(self._drain())
+        queue_metrics.register(self)
+
+    def stop(self):
+        self.closed = True
+        queue_metrics.unregister(self)
+        if self._writer is not None:
+            self._writer.cancel()
+        self._frames.clear()
+        self._keyed.clear()
+
+    async def put(self, frame, key=None):
+        """Queue the kwargs for ``send``; frames sharing a ``key`` supersede each other under coalesce."""
+        if self.closed:
+            return
+        if key is not None and self.policy == COALESCE:
+            entry = self._keyed.get(key)
+            if entry is not None:
+                entry[1] = frame
+                queue_metrics.count('coalesced')
+                return
+
+        if len(self._frames) >= self.size:
+            if self.policy == DISCONNECT:
+                queue_metrics.count('disconnected')
+                self.stop()
+                await self._close(code=SLOW_CONSUMER_CLOSE_CODE)
+                return
+            self._pop()
+            queue_metrics.count('dropped')
+
+        entry = [key, frame]
+        self._frames.append(entry)
+        if key is not None and self.policy == COALESCE:
+            self._keyed[key] = entry
+        queue_metrics.count('queued', len(self._frames))
+        self._ready.set()
+
+    def _pop(self):
+        key, frame = entry = self._frames.popleft()
+        if key is not None and self._keyed.get(key) is entry:
+            del self._keyed[key]
+        return frame
+
+    async def _drain(self):
+        while True:
+            while not self._frames:
+                self._ready.clear()
+                await self._ready.wait()
+            # Blocks for as long as the client takes to read; put() keeps accepting meanwhile
+            await self._send(**self._pop())
+            queue_metrics.count('sent')
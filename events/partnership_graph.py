@@ -0,0 +1,305 @@
+# events/partnership_graph.py
+#
+# Which communities are linked by partnerships, and how closely. The graph is
+# kept in memory in compressed sparse row form: a sorted array of community
+# ids, an offsets array and parallel arrays of neighbour positions and
+# partnership counts (stdlib arrays, a few bytes per edge). Saves and deletes
+# of partnerships are applied as a small overlay of count changes, folded into
+# the arrays once it grows past PARTNERSHIP_GRAPH_OVERLAY_LIMIT edges. Each
+# worker also reloads after PARTNERSHIP_GRAPH_TTL seconds, so other workers'
+# changes show up too.
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Community, Partnership
+
+MAX_SEPARATION = 6  # Default search depth for separation(); beyond this two communities count as unconnected
+
+
+def resolve_partner(name):
+    """The id of the community called ``name`` (any case), or None."""
+    name = (name or '').strip()
+    if not name:
+        return None
+    return Community.objects.filter(name__iexact=name).values_list('pk', flat=True).first()
+
+
+class CompactGraph:
+    """Undirected multigraph over community ids; edge weights count the partnerships between a pair."""
+
+    def __init__(self, edges=()):
+        counts = {}
+        for a, b in edges:
+            if a != b:
+                key = (a, b) if a < b else (b, a)
+                counts[key] = counts.get(key, 0) + 1
+        self._build(counts)
+
+    def _build(self, counts):
+        nodes = sorted({node for pair in counts for node in pair})
+        position = {node: i for i, node in enumerate(nodes)}
+        degrees = [0] * (len(nodes) + 1)
+        for a, b in counts:
+            degrees[position[a] + 1] += 1
+            degrees[position[b] + 1] += 1
+        for i in range(1, len(degrees)):
+            degrees[i] += degrees[i - 1]
+
+        indices = array('i', bytes(4 * degrees[-1]))
+        weights = array('I', bytes(4 * degrees[-1]))
+        cursor = degrees[:-1]
+        for (a, b), count in sorted(counts.items()):  # Leaves every row sorted
+            for source, target in ((position[a], position[b]), (position[b], position[a])):
+                indices[cursor[source]] = target
+                weights[cursor[source]] = count
+                cursor[source] += 1
+
+        self._nodes = array('q', nodes)
+        self._offsets = array('q', degrees)
+        self._indices = indices
+        self._weights = weights
+        self._overlay = {}  # id -> {neighbour id: change in partnership count}
+        self._overlay_edges = 0
+        self._labels = None  # Component of each node, worked out on demand
+        self._sizes = None
+
+    def _row(self, node):
+        i = bisect_left(self._nodes, node)
+        if i < len(self._nodes) and self._nodes[i] == node:
+            return i
+        return None
+
+    def _stored(self, node):
+        # {neighbour: count} from the arrays, before the overlay
+        i = self._row(node)
+        if i is None:
+            return {}
+        start, end = self._offsets[i], self._offsets[i + 1]
+        nodes = self._nodes
+        return {nodes[j]: w for j, w in zip(self._indices[start:end], self._weights[start:end])}
+
+    def neighbours(self, node):
+        changes = self._overlay.get(node)
+        if not changes:
+            i = self._row(node)
+            if i is None:
+                return []
+            nodes = self._nodes
+            return [nodes[j] for j in self._indices[self._offsets[i]:self._offsets[i + 1]]]
+        counts = self._stored(node)
+        for other, delta in changes.items():
+            counts[other] = counts.get(other, 0) + delta
+        return sorted(other for other, count in counts.items() if count > 0)
+
+    def degree(self, node):
+        if not self._overlay.get(node):
+            i = self._row(node)
+            return 0 if i is None else self._offsets[i + 1] - self._offsets[i]
+        return len(self.neighbours(node))
+
+    def change(self, a, b, delta):
+        """Add ``delta`` partnerships between ``a`` and ``b`` (negative to remove)."""
+        if a == b or not delta:
+            return
+        for source, target in ((a, b), (b, a)):
+            changes = self._overlay.setdefault(source, {})
+            total = changes.get(target, 0) + delta
+            if total:
+                if target not in changes:
+                    self._overlay_edges += 1
+                changes[target] = total
+            elif target in changes:
+                del changes[target]
+                self._overlay_edges -= 1
+        self._labels = self._sizes = None
+        if self._overlay_edges > getattr(settings, 'PARTNERSHIP_GRAPH_OVERLAY_LIMIT', 10000):
+            self.compact()
+
+    def compact(self):
+        """Fold the overlay into the arrays."""
+        if not self._overlay:
+            return
+        counts = {}
+        nodes = self._nodes
+        for i, node in enumerate(nodes):
+            for j, w in zip(self._indices[self._offsets[i]:self._offsets[i + 1]],
+                            self._weights[self._offsets[i]:self._offsets[i + 1]]):
+                if node < nodes[j]:
+                    counts[(node, nodes[j])] = w
+        for node, changes in self._overlay.items():
+            for other, delta in changes.items():
+                if node < other:
+                    key = (node, other)
+                    total = counts.get(key, 0) + delta
+                    if total > 0:
+                        counts[key] = total
+                    else:
+                        counts.pop(key, None)
+        self._build(counts)
+
+    def path(self, a, b, max_depth=MAX_SEPARATION):
+        """A shortest chain of partnerships from ``a`` to ``b`` as a list of ids, or None if none is that short."""
+        if a == b:
+            return [a]
+        if not self.degree(a) or not self.degree(b):
+            return None
+        # Bidirectional breadth-first search, always growing the smaller side
+        sides = [({a: None}, {a: 0}, [a]), ({b: None}, {b: 0}, [b])]
+        for _ in range(max_depth):
+            if not sides[0][2] or not sides[1][2]:
+                return None
+            grow = 0 if len(sides[0][2]) <= len(sides[1][2]) else 1
+            parents, depths, frontier = sides[grow]
+            other_depths = sides[1 - grow][1]
+            next_frontier, best = [], None
+            for node in frontier:
+                depth = depths[node] + 1
+                for neighbour in self.neighbours(node):
+                    if neighbour in parents:
+                        continue
+                    parents[neighbour] = node
+                    depths[neighbour] = depth
+                    next_frontier.append(neighbour)
+                    if neighbour in other_depths:
+                        length = depth + other_depths[neighbour]
+                        if best is None or length < best[0]:
+                            best = (length, neighbour)
+            sides[grow] = (parents, depths, next_frontier)
+            if best is not None:
+                meeting = best[1]
+                forward, backward = [], []
+                node = meeting
+                while node is not None:
+                    forward.append(node)
+                    node = sides[0][0][node]
+                node = sides[1][0][meeting]
+                while node is not None:
+                    backward.append(node)
+                    node = sides[1][0][node]
+                return forward[::-1] + backward
+        return None
+
+    def separation(self, a, b, max_depth=MAX_SEPARATION):
+        """Degrees of separation between two communities: 1 for direct partners, None if further than max_depth."""
+        found = self.path(a, b, max_depth)
+        return None if found is None else len(found) - 1
+
+    def _label_components(self):
+        self.compact()
+        count = len(self._nodes)
+        labels = array('i', [-1]) * count
+        sizes = array('i')
+        offsets, indices = self._offsets, self._indices
+        for start in range(count):
+            if labels[start] != -1:
+                continue
+            label = len(sizes)
+            labels[start] = label
+            stack, size = [start], 0
+            while stack:
+                i = stack.pop()
+                size += 1
+                for j in indices[offsets[i]:offsets[i + 1]]:
+                    if labels[j] == -1:
+                        labels[j] = label
+                        stack.append(j)
+            sizes.append(size)
+        self._labels, self._sizes = labels, sizes
+
+    def component_size(self, node):
+        """Communities reachable from ``node`` through partnerships, itself included."""
+        if self._labels is None:
+            self._label_components()
+        i = self._row(node)
+        return 1 if i is None else self._sizes[self._labels[i]]
+
+    def components(self, min_size=2):
+        """Connected groups of communities, largest first, as lists of ids."""
+        if self._labels is None:
+            self._label_components()
+        groups = {}
+        for node, label in zip(self._nodes, self._labels):
+            if self._sizes[label] >= min_size:
+                groups.setdefault(label, []).append(node)
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def stats(self):
+        return {
+            'communities': len(self._nodes),
+            'partnered_pairs': len(self._indices) // 2,
+            'overlay_edges': self._overlay_edges,
+            'bytes': sum(a.itemsize * len(a) for a in (self._nodes, self._offsets, self._indices, self._weights)),
+        }
+
+
+class PartnershipGraph:
+    """The CompactGraph of active communities' partnerships, loaded lazily and kept current by signals."""
+
+    def __init__(self):
+        self._graph = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._graph = None
+
+    def _current(self):
+        ttl = getattr(settings, 'PARTNERSHIP_GRAPH_TTL', 600)
+        if self._graph is None or time.monotonic() - self._loaded_at >= ttl:
+            edges = Partnership.objects.filter(
+                partner__isnull=False, community__is_deleted=False, partner__is_deleted=False,
+            ).order_by().values_list('community_id', 'partner_id').iterator(chunk_size=10000)
+            self._graph = CompactGraph(edges)
+            self._loaded_at = time.monotonic()
+        return self._graph
+
+    def query(self, method, *args, **kwargs):
+        with self._lock:
+            return getattr(self._current(), method)(*args, **kwargs)
+
+    def partnership_changed(self, previous, current):
+        """Apply a saved or deleted partnership, given its (community_id, partner_id) before and after."""
+        def apply():
+            with self._lock:
+                if self._graph is None:
+                    return  # Not loaded yet; the next load reads the change from the table
+                if previous and previous[1] is not None:
+                    self._graph.change(previous[0], previous[1], -1)
+                if current and current[1] is not None:
+                    self._graph.change(current[0], current[1], 1)
+        if previous != current:
+            transaction.on_commit(apply)
+
+
+graph = PartnershipGraph()
+
+
+def neighbours(community_id):
+    return graph.query('neighbours', community_id)
+
+
+def degree(community_id):
+    return graph.query('degree', community_id)
+
+
+def path(a, b, max_depth=MAX_SEPARATION):
+    return graph.query('path', a, b, max_depth)
+
+
+def separation(a, b, max_depth=MAX_SEPARATION):
+    return graph.query('separation', a, b, max_depth)
+
+
+def component_size(community_id):
+    return graph.query('component_size', community_id)
+
+
+def components(min_size=2):
+    return graph.query('components', min_size)
@@ -0,0 +1,103 @@
+# events/presence.py
+#
+# Who is connected to each chat room, kept up to date by the consumers on
+# connect/disconnect and heartbeats rather than worked out per request. A user
+# with several tabs open counts once. Connections that vanish without a
+# disconnect (killed browser, dropped network) expire after PRESENCE_TTL
+# seconds without a heartbeat. State is per process, like the in-memory
+# channel layer the chat runs on.
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+CHAT_ROOM = 'interfaith_chat'  # The room ChatConsumer joins
+
+
+def _ttl():
+    return getattr(settings, 'PRESENCE_TTL', 60)
+
+
+def user_key(scope, channel_name):
+    # Signed-in users are tracked across tabs; anonymous visitors per connection
+    user = scope.get('user')
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'anon:{channel_name}'
+
+
+class PresenceTracker:
+    def __init__(self):
+        self._rooms = {}  # room -> {user key: set of channel names}
+        self._last_seen = OrderedDict()  # (room, user key, channel name) -> time, least recent first
+        self._lock = threading.Lock()
+
+    def join(self, room, user, channel_name):
+        """Register a connection; returns the rooms whose online count changed."""
+        with self._lock:
+            changed = self._sweep(time.monotonic())
+            channels = self._rooms.setdefault(room, {}).setdefault(user, set())
+            if not channels:
+                changed.add(room)
+            channels.add(channel_name)
+            self._touch(room, user, channel_name)
+            return changed
+
+    def leave(self, room, user, channel_name):
+        with self._lock:
+            changed = self._sweep(time.monotonic())
+            self._last_seen.pop((room, user, channel_name), None)
+            if self._remove(room, user, channel_name):
+                changed.add(room)
+            return changed
+
+    def heartbeat(self, room, user, channel_name):
+        # Same as join, so a live connection that was swept during a stall comes back
+        return self.join(room, user, channel_name)
+
+    def count(self, room):
+        """Distinct users online in ``room``."""
+        with self._lock:
+            self._sweep(time.monotonic())
+            return len(self._rooms.get(room, ()))
+
+    def users(self, room):
+        with self._lock:
+            self._sweep(time.monotonic())
+            return set(self._rooms.get(room, ()))
+
+    def _touch(self, room, user, channel_name):
+        key = (room, user, channel_name)
+        self._last_seen[key] = time.monotonic()
+        self._last_seen.move_to_end(key)
+
+    def _remove(self, room, user, channel_name):
+        # True when that was the user's last connection to the room
+        members = self._rooms.get(room)
+        if not members or user not in members:
+            return False
+        members[user].discard(channel_name)
+        if members[user]:
+            return False
+        del members[user]
+        if not members:
+            del self._rooms[room]
+        return True
+
+    def _sweep(self, now):
+        # Oldest heartbeats come first, so this stops at the first live connection
+        changed = set()
+        deadline = now - _ttl()
+        while self._last_seen:
+            (room, user, channel_name), seen = next(iter(self._last_seen.items()))
+            if seen > deadline:
+                break
+            self._last_seen.popitem(last=False)
+            if self._remove(room, user, channel_name):
+                changed.add(room)
+        return changed
+
+
+presence = PresenceTracker()
@@ -0,0 +1,47 @@
+# events/purge.py
+
+import time
+
+from django.db import transaction
+
+from . import counters
+from .models import Community, Event, Feedback, Notification, Partnership, Resource, SupportRequest
+
+DEFAULT_CHUNK_SIZE = 500  # Rows deleted per transaction
+
+# Dependents are removed before the community row itself, so the final
+# community.delete() has nothing left to collect.
+DEPENDENT_MODELS = [Notification, Feedback, Resource, SupportRequest, Partnership, Event]
+
+
+def purge_community(community_id, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, pause=0):
+    """Delete a soft-deleted community and everything that belongs to it.
+
+    Each chunk is a bounded primary-key range deleted in its own short
+    transaction, so the write lock is released between chunks instead of being
+    held while the ORM collects the whole community. ``progress`` is called as
+    ``progress(model, deleted_so_far)`` after every chunk. Returns the number
+    of rows deleted per model.
+    """
+    Community.all_objects.filter(pk=community_id).update(next_event=None)
+    deleted = {}
+    with counters.paused():
+        for model in DEPENDENT_MODELS:
+            total = 0
+            rows = model.all_objects.filter(community_id=community_id)  # The default managers hide these rows
+            while True:
+                ids = list(rows.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    rows.filter(pk__gte=ids[0], pk__lte=ids[-1]).delete()
+                total += len(ids)
+                if progress:
+                    progress(model, total)
+                if pause:
+                    time.sleep(pause)  # Let other writers in between chunks
+            deleted[model] = total
+
+        with transaction.atomic():
+            Community.all_objects.filter(pk=community_id, is_deleted=True).delete()
+    return deleted
@@ -0,0 +1,150 @@
+# events/ratelimit.py
+#
+# Token-bucket admission control for the expensive auth endpoints (password
+# hashing, user inserts, OTP emails). Requests are checked per client IP and per
+# username before the view runs, and rejected with a 429 when either bucket is
+# empty; a rejected request takes no token from any bucket. The username bucket
+# has its own, lower limit (the '<scope>_user' entries) and is shared by every
+# address, so guessing one account's password from many IPs is throttled too.
+# The price is that such an attack also holds back that user's own attempts
+# until it stops. Buckets live in process memory by default;
+# set RATE_LIMIT_BACKEND = 'cache' to share them between workers through the
+# default cache.
+
+import heapq
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+# scope -> (bucket capacity, seconds to refill an empty bucket)
+DEFAULT_RATE_LIMITS = {
+    'login': (10, 60),
+    'register': (5, 300),
+    'otp': (10, 300),
+    # Per username, whatever the address
+    'login_user': (5, 300),
+    'register_user': (5, 300),
+    'otp_user': (5, 300),
+}
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, last refill, time the bucket is full again)
+        self._expiry = []  # Heap of (time full again, key), one entry per bucket
+        self._lock = threading.Lock()
+
+    def consume(self, buckets):
+        """Take a token from each of ``buckets`` [(key, capacity, period)] if all have one, else from none."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            levels = []
+            for key, capacity, period in buckets:
+                tokens, last, _ = self._buckets.get(key, (capacity, now, now))
+                levels.append(min(capacity, tokens + (now - last) * capacity / period))
+            if any(tokens < 1 for tokens in levels):
+                return False
+            for (key, capacity, period), tokens in zip(buckets, levels):
+                full_at = now + (capacity - tokens + 1) * period / capacity
+                if key not in self._buckets:
+                    heapq.heappush(self._expiry, (full_at, key))
+                self._buckets[key] = (tokens - 1, now, full_at)
+        return True
+
+    def _expire(self, now):
+        # A bucket that is full again carries no state worth keeping. Entries are only looked at once due, so
+        # each request does O(log n) work however many clients are being tracked.
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            _, key = heapq.heappop(expiry)
+            full_at = self._buckets[key][2]
+            if full_at <= now:
+                del self._buckets[key]
+            else:
+                heapq.heappush(expiry, (full_at, key))  # Used again since; due later
+
+
+class CacheBackend:
+    # Shared between workers; the read-modify-write is not atomic, so bursts
+    # racing across workers can be admitted slightly over the limit.
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def consume(self, buckets):
+        cache = caches[self.alias]
+        now = time.time()
+        stored = cache.get_many([f'ratelimit:{key}' for key, _, _ in buckets])
+        levels = []
+        for key, capacity, period in buckets:
+            tokens, last = stored.get(f'ratelimit:{key}', (capacity, now))
+            levels.append(min(capacity, tokens + (now - last) * capacity / period))
+        if any(tokens < 1 for tokens in levels):
+            return False
+        cache.set_many(
+            {f'ratelimit:{key}': (tokens - 1, now) for (key, _, _), tokens in zip(buckets, levels)},
+            timeout=int(max(period for _, _, period in buckets)) + 1,
+        )
+        return True
+
+
+_memory_backend = MemoryBackend()
+_metrics = Counter()  # (scope, 'admitted' | 'rejected') -> count
+_metrics_lock = threading.Lock()
+
+
+def get_backend():
+    if getattr(settings, 'RATE_LIMIT_BACKEND', 'memory') == 'cache':
+        return CacheBackend(getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default'))
+    return _memory_backend
+
+
+def get_limit(scope):
+    return getattr(settings, 'RATE_LIMITS', {}).get(scope, DEFAULT_RATE_LIMITS[scope])
+
+
+def _client_buckets(request, scope):
+    # [(key, capacity, period)] of the buckets a request draws on
+    buckets = [(f"{scope}:ip:{request.META.get('REMOTE_ADDR', '')}", *get_limit(scope))]
+    username = request.POST.get('username') or request.session.get('otp_username')
+    if username:
+        buckets.append((f'{scope}:user:{username.lower()}', *get_limit(f'{scope}_user')))
+    return buckets
+
+
+def admit(request, scope):
+    """Take one token from every bucket for this request; False, taking none, if any is empty."""
+    allowed = get_backend().consume(_client_buckets(request, scope))
+    with _metrics_lock:
+        _metrics[scope, 'admitted' if allowed else 'rejected'] += 1
+    return allowed
+
+
+def rate_limit(scope):
+    """Decorator rejecting POSTs over the ``scope`` limit before the view does any work."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST' and getattr(settings, 'RATE_LIMIT_ENABLED', True) \
+                    and not admit(request, scope):
+                capacity, period = get_limit(scope)
+                response = HttpResponse('Too many attempts. Please wait a moment and try again.', status=429)
+                response['Retry-After'] = str(max(1, round(period / capacity)))
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_metrics():
+    """Admitted/rejected counts per scope for this process."""
+    with _metrics_lock:
+        metrics = {}
+        for (scope, outcome), count in _metrics.items():
+            metrics.setdefault(scope, {'admitted': 0, 'rejected': 0})[outcome] = count
+        return metrics
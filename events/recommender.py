@@ -0,0 +1,185 @@
+# events/recommender.py
+#
+# Item-item recommendations over communities. The batch job (build_recommendations)
+# turns community creation, event creation and feedback into a sparse
+# user x community matrix, computes cosine similarity between communities with
+# NumPy and stores the top K neighbours of each in CommunitySimilarity. Serving
+# a user reads their own interactions (three grouped, indexed queries) and the
+# neighbours of the communities they interacted with.
+
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Community, CommunitySimilarity, Event, Feedback
+
+# How strongly each kind of interaction ties a user to a community
+INTERACTION_WEIGHTS = {
+    'created_community': 3.0,
+    'created_event': 2.0,
+    'feedback': 1.0,
+}
+DEFAULT_TOP_K = 20
+MAX_SEEDS = 50  # Communities of one user considered when serving
+PAIR_CHUNK = 2_000_000  # Co-occurrence pairs materialized at once by the batch job
+
+
+def _feedback_user_ids():
+    # Feedback only stores a free-text name; count it when it matches a username
+    return Subquery(User.objects.filter(username=OuterRef('user_name')).values('pk')[:1])
+
+
+def iter_interactions():
+    """Yield (user_id, community_id, weight) for every interaction, for the batch job."""
+    communities = Community.objects.all()
+    events = Event.objects.all()  # The default managers leave out soft-deleted communities
+    feedback = Feedback.objects.annotate(user_id=_feedback_user_ids())
+
+    weight = INTERACTION_WEIGHTS['created_community']
+    for user_id, community_id in communities.values_list('created_by_id', 'pk').iterator(chunk_size=5000):
+        yield user_id, community_id, weight
+    weight = INTERACTION_WEIGHTS['created_event']
+    for user_id, community_id in events.values_list('created_by_id', 'community_id').iterator(chunk_size=5000):
+        yield user_id, community_id, weight
+    weight = INTERACTION_WEIGHTS['feedback']
+    for user_id, community_id in (feedback.exclude(user_id=None)
+                                  .values_list('user_id', 'community_id').iterator(chunk_size=5000)):
+        yield user_id, community_id, weight
+
+
+def user_interactions(user):
+    """{community_id: summed interaction weight} for one user, grouped in the database."""
+    seeds = defaultdict(float)
+    for community_id in Community.objects.filter(created_by=user).values_list('pk', flat=True):
+        seeds[community_id] += INTERACTION_WEIGHTS['created_community']
+    grouped = (
+        ('created_event', Event.objects.filter(created_by=user)),
+        ('feedback', Feedback.objects.filter(user_name=user.username)),  # Indexed; no per-row username lookup
+    )
+    for kind, queryset in grouped:
+        rows = queryset.order_by().values('community_id').annotate(total=Count('pk'))
+        for community_id, total in rows.values_list('community_id', 'total'):
+            seeds[community_id] += INTERACTION_WEIGHTS[kind] * total
+    return seeds
+
+
+def _interaction_matrix(np):
+    """Sparse matrix as COO arrays (user row, item column, weight), one entry per (user, item)."""
+    rows = list(iter_interactions())
+    if not rows:
+        return None
+    user_ids, item_ids, weights = (np.asarray(column) for column in zip(*rows))
+    _, user_rows = np.unique(user_ids, return_inverse=True)
+    items, item_cols = np.unique(item_ids, return_inverse=True)
+
+    # Repeated interactions add up, with diminishing returns
+    keys, inverse = np.unique(user_rows.astype(np.int64) * len(items) + item_cols, return_inverse=True)
+    values = np.log1p(np.bincount(inverse, weights=weights))
+    return items, keys // len(items), keys % len(items), values
+
+
+def compute_similarities(top_k=DEFAULT_TOP_K):
+    """Return (community ids, neighbour ids, scores) holding the top ``top_k`` neighbours per community."""
+    import numpy as np  # Only the batch job needs NumPy
+
+    matrix = _interaction_matrix(np)
+    if matrix is None:
+        return [], [], []
+    items, rows, cols, values = matrix
+    n_items = len(items)
+
+    # Cosine similarity: normalize every item column, then S = X^T X
+    norms = np.sqrt(np.bincount(cols, weights=values ** 2, minlength=n_items))
+    values = values / norms[cols]
+
+    # X^T X accumulated from the per-user co-occurring pairs (rows are sorted by user)
+    row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    row_sizes = np.diff(np.r_[row_starts, len(rows)])
+    pair_keys, pair_sums = [], []
+    start = 0
+    while start < len(row_starts):
+        # Take users until the chunk holds about PAIR_CHUNK pairs
+        pairs = np.cumsum(row_sizes[start:] ** 2)
+        stop = start + max(1, int(np.searchsorted(pairs, PAIR_CHUNK, side='right')))
+        begin = row_starts[start]
+        end = row_starts[stop] if stop < len(row_starts) else len(rows)
+        sizes = row_sizes[start:stop]
+        starts = row_starts[start:stop] - begin
+
+        # Every ordered pair (i, j) of entries of the same user, without i == j
+        owner = np.repeat(np.arange(len(sizes)), sizes ** 2)
+        position = np.arange(len(owner)) - np.repeat(np.cumsum(sizes ** 2) - sizes ** 2, sizes ** 2)
+        left = starts[owner] + position // sizes[owner]
+        right = starts[owner] + position % sizes[owner]
+        keep = left != right
+        left, right = left[keep], right[keep]
+
+        chunk_cols, chunk_values = cols[begin:end], values[begin:end]
+        keys, inverse = np.unique(chunk_cols[left].astype(np.int64) * n_items + chunk_cols[right],
+                                  return_inverse=True)
+        pair_keys.append(keys)
+        pair_sums.append(np.bincount(inverse, weights=chunk_values[left] * chunk_values[right]))
+        start = stop
+
+    keys, inverse = np.unique(np.concatenate(pair_keys), return_inverse=True)
+    scores = np.bincount(inverse, weights=np.concatenate(pair_sums))
+    a, b = keys // n_items, keys % n_items
+
+    # Top K per item: sort by item, then score descending, and keep each item's first K
+    order = np.lexsort((-scores, a))
+    a, b, scores = a[order], b[order], scores[order]
+    group_starts = np.flatnonzero(np.r_[True, a[1:] != a[:-1]])
+    rank = np.arange(len(a)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(a)]))
+    keep = rank < top_k
+    return items[a[keep]].tolist(), items[b[keep]].tolist(), scores[keep].tolist()
+
+
+def rebuild(top_k=DEFAULT_TOP_K, batch_size=5000):
+    """Recompute and replace the whole CommunitySimilarity table. Returns (rows, seconds)."""
+    started = time.monotonic()
+    communities, neighbours, scores = compute_similarities(top_k)
+    with transaction.atomic():
+        CommunitySimilarity.objects.all().delete()
+        CommunitySimilarity.objects.bulk_create(
+            (CommunitySimilarity(community_id=c, neighbour_id=n, score=s)
+             for c, n, s in zip(communities, neighbours, scores)),
+            batch_size=batch_size,
+        )
+    return len(communities), time.monotonic() - started
+
+
+def recommend_communities(user, limit=10):
+    """Community ids ranked for ``user`` from the precomputed neighbour table.
+
+    Each seed community costs one indexed read of at most K neighbours; the
+    communities the user already interacts with are left out.
+    """
+    seeds = user_interactions(user)
+    if not seeds:
+        return []
+    seeds = dict(sorted(seeds.items(), key=lambda item: -item[1])[:MAX_SEEDS])
+
+    ranked = defaultdict(float)
+    neighbours = CommunitySimilarity.objects.filter(community__in=seeds, neighbour__is_deleted=False)
+    for community_id, neighbour_id, score in neighbours.values_list('community_id', 'neighbour_id', 'score'):
+        if neighbour_id not in seeds:
+            ranked[neighbour_id] += seeds[community_id] * score
+    return sorted(ranked, key=lambda community_id: -ranked[community_id])[:limit]
+
+
+def recommend_events(user, limit=10):
+    """Upcoming interfaith events in the communities recommended for ``user``."""
+    if not user.is_authenticated:
+        return []
+    community_ids = recommend_communities(user)
+    if not community_ids:
+        return []
+    rank = {community_id: position for position, community_id in enumerate(community_ids)}
+    events = Event.objects.filter(
+        community_id__in=community_ids, type='interfaith', date__gte=timezone.now()
+    ).select_related('community').order_by('date')
+    return sorted(events[:limit * 3], key=lambda event: rank[event.community_id])[:limit]
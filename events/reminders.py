@@ -0,0 +1,201 @@
+# events/reminders.py
+#
+# Reminders ahead of Event.date and Event.rsvp_deadline, run by the
+# run_reminders command. Instead of scanning every event each minute, the
+# scheduler loads only the reminders due in the next REMINDER_WINDOW seconds
+# with an indexed range query, parks them in a hierarchical timing wheel and
+# pops them as they fall due. Notifications are written in the same transaction
+# that moves the kind's ReminderWatermark forward, so a restart neither repeats
+# nor loses them; emails go out afterwards through a small thread pool.
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from heapq import heappop, heappush
+from itertools import count
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Event, Notification, ReminderWatermark
+
+logger = logging.getLogger(__name__)
+
+# kind -> (Event field the reminder is relative to, default seconds before it)
+REMINDER_KINDS = {
+    'event': ('date', 24 * 3600),
+    'rsvp': ('rsvp_deadline', 6 * 3600),
+}
+MESSAGES = {
+    'event': 'Reminder: "{title}" starts on {when:%Y-%m-%d %H:%M}.',
+    'rsvp': 'Reminder: RSVPs for "{title}" close on {when:%Y-%m-%d %H:%M}.',
+}
+
+
+class TimingWheel:
+    """Hierarchical timing wheel of ``levels`` wheels with ``slots`` slots each.
+
+    Level 0 covers the next ``slots`` ticks one tick per slot, level 1 the next
+    ``slots ** 2`` ticks ``slots`` ticks per slot, and so on; entries further out
+    wait in an overflow heap. Adding is O(1), and advancing only touches the
+    slots that are passed, moving a higher-level slot's entries down once as
+    its turn comes.
+    """
+
+    def __init__(self, start, tick=1.0, slots=60, levels=3):
+        self.tick = tick
+        self.slots = slots
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.current = int(start // tick)  # Next tick to expire
+        self.overflow = []  # (tick, sequence, item) beyond the top wheel
+        self._sequence = count()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, due, item):
+        self._size += 1
+        self._place(max(int(due // self.tick), self.current), item)
+
+    def _place(self, due_tick, item):
+        delta = due_tick - self.current
+        for level, wheel in enumerate(self.wheels):
+            if delta < self.slots ** (level + 1):
+                wheel[(due_tick // self.slots ** level) % self.slots].append((due_tick, item))
+                return
+        heappush(self.overflow, (due_tick, next(self._sequence), item))
+
+    def advance(self, now):
+        """Remove and return the items due at or before ``now``, earliest first."""
+        target = int(now // self.tick)
+        expired = []
+        while self.current <= target:
+            slot = self.current % self.slots
+            bucket, self.wheels[0][slot] = self.wheels[0][slot], []
+            expired.extend(item for _, item in bucket)
+            self.current += 1
+            self._cascade()
+        self._size -= len(expired)
+        return expired
+
+    def _cascade(self):
+        # Entering a new turn of a higher wheel: spread its current slot over the wheels below
+        levels = len(self.wheels)
+        if self.current % self.slots ** levels == 0:
+            horizon = self.current + self.slots ** levels
+            while self.overflow and self.overflow[0][0] < horizon:
+                due_tick, _, item = heappop(self.overflow)
+                self._place(due_tick, item)
+        for level in range(levels - 1, 0, -1):
+            if self.current % self.slots ** level == 0:
+                slot = (self.current // self.slots ** level) % self.slots
+                bucket, self.wheels[level][slot] = self.wheels[level][slot], []
+                for due_tick, item in bucket:
+                    self._place(due_tick, item)
+
+
+def _offset(kind):
+    return timedelta(seconds=getattr(settings, 'REMINDER_OFFSETS', {}).get(kind, REMINDER_KINDS[kind][1]))
+
+
+class ReminderScheduler:
+    def __init__(self, window=None, batch_size=None, workers=None):
+        self.window = timedelta(seconds=window or getattr(settings, 'REMINDER_WINDOW', 3600))
+        self.batch_size = batch_size or getattr(settings, 'REMINDER_BATCH_SIZE', 200)
+        self.pool = ThreadPoolExecutor(max_workers=workers or getattr(settings, 'REMINDER_WORKERS', 4))
+        self.wheel = TimingWheel(time.time())
+        self.pending = {}  # (kind, event id) -> due timestamp, for what is in the wheel
+        self.stats = {'loaded': 0, 'notified': 0, 'emailed': 0, 'skipped': 0}
+
+    def high_waters(self):
+        # A fresh install starts from now rather than reminding about everything in the past
+        now = timezone.now()
+        marks = dict(ReminderWatermark.objects.values_list('kind', 'high_water'))
+        for kind in REMINDER_KINDS:
+            if kind not in marks:
+                watermark, _ = ReminderWatermark.objects.get_or_create(kind=kind, defaults={'high_water': now})
+                marks[kind] = watermark.high_water
+        return marks
+
+    def _add_range(self, kind, after, until):
+        # Indexed range query on the reminder's field, shifted by its offset
+        field, _ = REMINDER_KINDS[kind]
+        offset = _offset(kind)
+        rows = Event.objects.filter(**{f'{field}__gt': after + offset, f'{field}__lte': until + offset})
+        for event_id, when in rows.values_list('pk', field).iterator(chunk_size=2000):
+            due = (when - offset).timestamp()
+            if self.pending.get((kind, event_id)) != due:
+                self.pending[kind, event_id] = due
+                self.wheel.add(due, (kind, event_id, due))
+                self.stats['loaded'] += 1
+
+    def load(self):
+        """Put every reminder due between its high-water mark and the end of the window into the wheel."""
+        horizon = timezone.now() + self.window
+        for kind, high_water in self.high_waters().items():
+            self._add_range(kind, high_water, horizon)
+
+    def run_once(self):
+        """Send every reminder that has fallen due; returns how many notifications were written."""
+        now = timezone.now()
+        marks = self.high_waters()
+        for kind, high_water in marks.items():
+            # Events created or moved since the last load() may already be due
+            self._add_range(kind, high_water, now)
+
+        by_kind = {kind: [] for kind in REMINDER_KINDS}
+        for kind, event_id, due in self.wheel.advance(now.timestamp()):
+            if self.pending.get((kind, event_id)) == due:  # Otherwise superseded by a newer entry
+                del self.pending[kind, event_id]
+                by_kind[kind].append((event_id, due))
+
+        written = 0
+        for kind, entries in by_kind.items():
+            emails = []
+            with transaction.atomic():
+                for start in range(0, len(entries), self.batch_size):
+                    notifications, batch_emails = self.build(kind, entries[start:start + self.batch_size])
+                    Notification.objects.bulk_create(notifications)
+                    emails.append(batch_emails)
+                    written += len(notifications)
+                # Committed together with the notifications: a restart resumes exactly here
+                ReminderWatermark.objects.filter(kind=kind, high_water__lt=now).update(high_water=now)
+            for batch_emails in emails:
+                if batch_emails:
+                    self.pool.submit(self._send, batch_emails)
+        self.stats['notified'] += written
+        return written
+
+    def build(self, kind, entries):
+        """Notifications and emails for a batch of (event id, due timestamp)."""
+        field, _ = REMINDER_KINDS[kind]
+        offset = _offset(kind)
+        wanted = dict(entries)
+        events = Event.objects.filter(pk__in=wanted).values('pk', 'title', 'community_id', 'created_by__email', field)
+
+        notifications, emails = [], []
+        for event in events:
+            when = event[field]
+            # Moved since it was loaded; the new time has its own entry
+            if when is None or (when - offset).timestamp() != wanted[event['pk']]:
+                self.stats['skipped'] += 1
+                continue
+            message = MESSAGES[kind].format(title=event['title'], when=timezone.localtime(when))
+            notifications.append(Notification(community_id=event['community_id'], message=message))
+            if event['created_by__email']:
+                emails.append(('Event reminder', message, settings.DEFAULT_FROM_EMAIL, [event['created_by__email']]))
+        return notifications, emails
+
+    def _send(self, emails):
+        try:
+            with get_connection() as connection:  # One SMTP session per batch
+                self.stats['emailed'] += send_mass_mail(emails, connection=connection)
+        except Exception:
+            logger.exception('Sending %d reminder emails failed', len(emails))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,183 @@
+# events/rollups.py
+#
+# Monthly per-community counts of events, feedback and support requests, so the
+# analytics dashboard reads a small ActivityRollup table instead of scanning the
+# raw tables. Every source has a high-water mark on its insert timestamp:
+# catch_up() counts the rows stamped after the mark and moves it forward, and it
+# runs shortly after saves as well as from the update_rollups command (which
+# also covers bulk inserts). Only rows older than ROLLUP_SETTLE_SECONDS are
+# counted, so a transaction that commits a little late is not skipped. Updates
+# and deletes of rows that are already counted adjust the rollups through
+# signals.
+
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import ActivityRollup, Event, Feedback, RollupWatermark, SupportRequest
+
+# source -> (model, insert timestamp used as the high-water mark, date the row is bucketed by)
+SOURCES = {
+    'events': (Event, 'created_at', 'date'),
+    'feedback': (Feedback, 'feedback_date', 'feedback_date'),
+    'support_requests': (SupportRequest, 'request_date', 'request_date'),
+}
+MODEL_SOURCES = {model: source for source, (model, _, _) in SOURCES.items()}
+
+_last_catch_up = {}  # source -> monotonic time of this process's last on-save catch-up
+_catch_up_lock = threading.Lock()
+
+
+def _settle_seconds():
+    return getattr(settings, 'ROLLUP_SETTLE_SECONDS', 5)
+
+
+def month_of(value):
+    if value is None:
+        return None
+    if hasattr(value, 'hour'):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+        value = value.date()
+    return value.replace(day=1)
+
+
+def first_of_month(months_back=0):
+    today = timezone.localdate()
+    index = today.year * 12 + today.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def apply_deltas(source, deltas):
+    """Add {(community_id, month): delta} to the rollup rows, creating them as needed."""
+    for (community_id, month), delta in deltas.items():
+        if not delta or month is None:
+            continue
+        rollup = ActivityRollup.objects.filter(source=source, community_id=community_id, month=month)
+        if rollup.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                ActivityRollup.objects.create(source=source, community_id=community_id, month=month, count=delta)
+        except IntegrityError:
+            rollup.update(count=F('count') + delta)  # Created concurrently
+
+
+def catch_up(source, settle=None):
+    """Count the rows of ``source`` stamped since its high-water mark. Returns the number counted."""
+    model, stamp_field, bucket_field = SOURCES[source]
+    cutoff = timezone.now() - timedelta(seconds=_settle_seconds() if settle is None else settle)
+
+    with transaction.atomic():
+        # select_for_update() makes concurrent catch-ups queue up where row locks exist; it is a no-op on SQLite
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(source=source)
+        previous = watermark.high_water
+        if previous is not None and previous >= cutoff:
+            return 0
+        # Claim the range by moving the mark only if it is still where we read it; a catch-up that lost the race
+        # (another worker moved it meanwhile) counts nothing, so no range is folded in twice
+        unchanged = {'high_water': previous} if previous is not None else {'high_water__isnull': True}
+        if not RollupWatermark.objects.filter(pk=watermark.pk, **unchanged).update(
+                high_water=cutoff, updated_at=timezone.now()):
+            return 0
+
+        rows = model.objects.filter(**{f'{stamp_field}__lte': cutoff})
+        if previous is not None:
+            rows = rows.filter(**{f'{stamp_field}__gt': previous})
+        grouped = (
+            rows.exclude(**{bucket_field: None})
+            .order_by()
+            .annotate(month=TruncMonth(bucket_field))
+            .values('community_id', 'month')
+            .annotate(rows=Count('pk'))
+        )
+        deltas = Counter()
+        for row in grouped:
+            deltas[row['community_id'], month_of(row['month'])] += row['rows']
+        apply_deltas(source, deltas)
+    return sum(deltas.values())
+
+
+def catch_up_all(settle=None):
+    return {source: catch_up(source, settle) for source in SOURCES}
+
+
+def rebuild(settle=None):
+    """Drop every rollup and count all sources again from scratch."""
+    with transaction.atomic():
+        ActivityRollup.objects.all().delete()
+        RollupWatermark.objects.all().delete()
+        return catch_up_all(settle)
+
+
+def schedule_catch_up(source):
+    # After a commit, at most once per ROLLUP_CATCH_UP_INTERVAL per process, so saves stay cheap. Robust: the save
+    # is already committed, so a failing catch-up is logged and left to update_rollups rather than raised
+    interval = getattr(settings, 'ROLLUP_CATCH_UP_INTERVAL', 10)
+    now = time.monotonic()
+    with _catch_up_lock:
+        if now - _last_catch_up.get(source, float('-inf')) < interval:
+            return
+        _last_catch_up[source] = now
+    transaction.on_commit(lambda: catch_up(source), robust=True)
+
+
+def _is_counted(source, stamp):
+    high_water = RollupWatermark.objects.filter(source=source).values_list('high_water', flat=True).first()
+    return high_water is not None and stamp is not None and stamp <= high_water
+
+
+def snapshot(model, instance):
+    """(stamp, community_id, month) of the stored row, read before it is changed."""
+    _, stamp_field, bucket_field = SOURCES[MODEL_SOURCES[model]]
+    row = model._base_manager.filter(pk=instance.pk).values_list(stamp_field, 'community_id', bucket_field).first()
+    if row is None:
+        return None
+    return row[0], row[1], month_of(row[2])
+
+
+def record_update(model, instance, previous):
+    """Move an already counted row to its new bucket when its community or date changed."""
+    source = MODEL_SOURCES[model]
+    bucket_field = SOURCES[source][2]
+    if previous is None or not _is_counted(source, previous[0]):
+        return
+    current = (instance.community_id, month_of(getattr(instance, bucket_field)))
+    if current != previous[1:]:
+        apply_deltas(source, {previous[1:]: -1, current: 1})
+
+
+def record_delete(model, instance):
+    source = MODEL_SOURCES[model]
+    _, stamp_field, bucket_field = SOURCES[source]
+    if _is_counted(source, getattr(instance, stamp_field)):
+        apply_deltas(source, {(instance.community_id, month_of(getattr(instance, bucket_field))): -1})
+
+
+def monthly_totals(since=None, community_id=None):
+    """[{'month', 'events', 'feedback', 'support_requests'}] from the rollup table only."""
+    rollups = ActivityRollup.objects.filter(community__is_deleted=False)
+    if since is not None:
+        rollups = rollups.filter(month__gte=since)
+    if community_id is not None:
+        rollups = rollups.filter(community_id=community_id)
+
+    by_month = {}
+    for row in rollups.values('month', 'source').annotate(total=Sum('count')).order_by('month'):
+        by_month.setdefault(row['month'], dict.fromkeys(SOURCES, 0))[row['source']] = row['total']
+    return [dict(counts, month=month) for month, counts in by_month.items()]
+
+
+def top_communities(source, since=None, limit=10):
+    rollups = ActivityRollup.objects.filter(source=source, community__is_deleted=False)
+    if since is not None:
+        rollups = rollups.filter(month__gte=since)
+    return list(
+        rollups.values('community_id', 'community__name').annotate(total=Sum('count')).order_by('-total')[:limit]
+    )
@@ -1,9 +1,16 @@
 # signals.py
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from django.contrib.auth.signals import user_logged_out
+from .autocomplete import SOURCES
+from .counters import adjust_counts, is_paused, refresh_next_event
+from .geo import apply_geocode
+from . import partnership_graph, rollups, timeline, ws_auth
+from .models import (
+    Activity, Community, Event, Feedback, Partnership, Resource, SupportRequest, UnifiedNight, UserProfile,
+)
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -13,3 +20,177 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.userprofile.save()
+
+@receiver(pre_save, sender=Event)
+def geocode_event(sender, instance, update_fields=None, **kwargs):
+    # Coordinates given explicitly win; otherwise look the location up in the gazetteer
+    previous = None
+    if not instance._state.adding and (update_fields is None or 'location' in update_fields):
+        previous = sender._base_manager.filter(pk=instance.pk).values_list('location', 'latitude', 'longitude').first()
+    apply_geocode(instance, previous)
+
+
+# Denormalized community counters
+
+@receiver(pre_save, sender=Event)
+@receiver(pre_save, sender=Resource)
+@receiver(pre_save, sender=Feedback)
+def remember_previous_community(sender, instance, update_fields=None, **kwargs):
+    # Only needed when an existing row may be moved to another community
+    if instance._state.adding or (update_fields is not None and 'community' not in update_fields):
+        return
+    instance._previous_community_id = (
+        sender._base_manager.filter(pk=instance.pk).values_list('community_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Resource)
+@receiver(post_save, sender=Feedback)
+def count_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_community_id', None)
+    if created:
+        adjust_counts(sender, {instance.community_id: 1})
+    elif previous is not None and previous != instance.community_id:
+        adjust_counts(sender, {previous: -1, instance.community_id: 1})
+        if sender is Event:
+            refresh_next_event([previous])
+    if sender is Event:
+        refresh_next_event([instance.community_id])
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Resource)
+@receiver(post_delete, sender=Feedback)
+def count_deleted(sender, instance, origin=None, **kwargs):
+    # Nothing to maintain when the community itself is being deleted
+    if is_paused() or isinstance(origin, Community) or getattr(origin, 'model', None) is Community:
+        return
+    adjust_counts(sender, {instance.community_id: -1})
+    if sender is Event:
+        refresh_next_event([instance.community_id])
+
+
+# Autocomplete indexes
+
+@receiver(post_save, sender=Community)
+@receiver(post_delete, sender=Community)
+def invalidate_community_index(sender, **kwargs):
+    SOURCES['communities'].invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_index(sender, update_fields=None, **kwargs):
+    # Logins save last_login only; that doesn't change the index
+    if update_fields is not None and not {'username', 'is_active'} & set(update_fields):
+        return
+    SOURCES['users'].invalidate()
+
+
+# Analytics rollups
+
+@receiver(pre_save, sender=Event)
+@receiver(pre_save, sender=Feedback)
+@receiver(pre_save, sender=SupportRequest)
+def remember_rollup_bucket(sender, instance, update_fields=None, **kwargs):
+    bucket_field = rollups.SOURCES[rollups.MODEL_SOURCES[sender]][2]
+    if instance._state.adding or (update_fields is not None and not {'community', bucket_field} & set(update_fields)):
+        return
+    instance._rollup_previous = rollups.snapshot(sender, instance)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Feedback)
+@receiver(post_save, sender=SupportRequest)
+def rollup_saved(sender, instance, created, **kwargs):
+    if created:
+        rollups.schedule_catch_up(rollups.MODEL_SOURCES[sender])  # New rows are counted by the catch-up
+    else:
+        rollups.record_update(sender, instance, getattr(instance, '_rollup_previous', None))
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Feedback)
+@receiver(post_delete, sender=SupportRequest)
+def rollup_deleted(sender, instance, origin=None, **kwargs):
+    # Rollups of a deleted community go with it (on_delete=CASCADE)
+    if is_paused() or isinstance(origin, Community) or getattr(origin, 'model', None) is Community:
+        return
+    rollups.record_delete(sender, instance)
+
+
+# Cached calendar months
+
+@receiver(pre_save, sender=Event)
+@receiver(pre_save, sender=UnifiedNight)
+@receiver(pre_save, sender=Activity)
+def remember_timeline_month(sender, instance, update_fields=None, **kwargs):
+    # The month the row is cached under now, in case the save moves it to another one
+    if instance._state.adding or (update_fields is not None and not timeline.DISPLAY_FIELDS[sender] & set(update_fields)):
+        return
+    previous = sender._base_manager.filter(pk=instance.pk).values_list('date', flat=True).first()
+    instance._timeline_previous_month = timeline.month_of_value(previous)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=UnifiedNight)
+@receiver(post_save, sender=Activity)
+def timeline_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not timeline.DISPLAY_FIELDS[sender] & set(update_fields):
+        return
+    timeline.invalidate(timeline.month_of_value(instance.date), getattr(instance, '_timeline_previous_month', None))
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=UnifiedNight)
+@receiver(post_delete, sender=Activity)
+def timeline_deleted(sender, instance, **kwargs):
+    timeline.invalidate(timeline.month_of_value(instance.date))
+
+
+# Partnership graph
+
+@receiver(pre_save, sender=Partnership)
+def resolve_partnership(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'partner', 'partner_name', 'community'} & set(update_fields):
+        return
+    stored = None
+    if not instance._state.adding:
+        stored = (
+            sender._base_manager.filter(pk=instance.pk).values_list('community_id', 'partner_id', 'partner_name').first()
+        )
+        instance._graph_previous = stored[:2] if stored else None
+    # A renamed partner is looked up again unless the partner itself was changed in the same save
+    renamed = stored is not None and stored[2] != instance.partner_name and instance.partner_id == stored[1]
+    if instance.partner_id is None or renamed:
+        instance.partner_id = partnership_graph.resolve_partner(instance.partner_name)
+
+
+@receiver(post_save, sender=Partnership)
+def partnership_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'partner', 'partner_name', 'community'} & set(update_fields):
+        return
+    previous = None if created else getattr(instance, '_graph_previous', None)
+    partnership_graph.graph.partnership_changed(previous, (instance.community_id, instance.partner_id))
+
+
+@receiver(post_delete, sender=Partnership)
+def partnership_deleted(sender, instance, **kwargs):
+    partnership_graph.graph.partnership_changed((instance.community_id, instance.partner_id), None)
+
+
+# Cached WebSocket authentication
+
+@receiver(user_logged_out)
+def forget_ws_session(sender, request, **kwargs):
+    ws_auth.forget_session(request.session.session_key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_ws_user(sender, instance, update_fields=None, **kwargs):
+    # Password, is_active or deletion; a login only touches last_login
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    ws_auth.forget_user(instance.pk)
@@ -0,0 +1,43 @@
+// events/static/events/js/autocomplete.js
+// Type-ahead for AutocompleteWidget: queries the autocomplete endpoint as the user types
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.autocomplete[data-autocomplete-url]').forEach(function(container) {
+        const url = container.dataset.autocompleteUrl;
+        const hidden = container.querySelector('[data-autocomplete-value]');
+        const input = container.querySelector('[data-autocomplete-input]');
+        const list = container.querySelector('.autocomplete-results');
+        let timer = null;
+
+        input.addEventListener('input', function() {
+            hidden.value = '';  // Typing invalidates the previous pick
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                list.hidden = true;
+                return;
+            }
+            timer = setTimeout(function() {
+                fetch(url + '?q=' + encodeURIComponent(query), {credentials: 'same-origin'})
+                    .then(function(response) { return response.json(); })
+                    .then(function(data) {
+                        list.innerHTML = '';
+                        data.results.forEach(function(item) {
+                            const option = document.createElement('li');
+                            option.textContent = item.text;
+                            option.addEventListener('mousedown', function() {
+                                hidden.value = item.id;
+                                input.value = item.text;
+                                list.hidden = true;
+                            });
+                            list.appendChild(option);
+                        });
+                        list.hidden = data.results.length === 0;
+                    });
+            }, 150);
+        });
+
+        input.addEventListener('blur', function() {
+            list.hidden = true;
+        });
+    });
+});
@@ -0,0 +1,105 @@
+# events/static_asgi.py
+#
+# ASGI wrapper that serves collected static files straight from STATIC_ROOT,
+# picking the precompressed .br/.gz variant written by
+# events.storage.CompressedManifestStaticFilesStorage when the client accepts
+# it. Fingerprinted names get far-future cache headers. Anything it can't find
+# falls through to the wrapped Django application.
+
+import asyncio
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+
+from .middleware import accepted_encodings
+
+CHUNK_SIZE = 64 * 1024
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')  # name.<md5[:12]>.ext from ManifestStaticFilesStorage
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]  # In order of preference
+MAX_CACHED_PATHS = 4096
+MISS_TTL = 5  # Seconds a missing path is remembered, so files collected after startup are picked up soon
+
+_variant_cache = {}  # path -> (variants or None, monotonic time the entry expires)
+
+
+def _variants(path):
+    # Stat each existing file once per process; collected files don't change under a running worker
+    cached = _variant_cache.get(path)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    available = _stat_variants(path)
+    if len(_variant_cache) >= MAX_CACHED_PATHS:
+        _variant_cache.clear()
+    _variant_cache[path] = (available, float('inf') if available else time.monotonic() + MISS_TTL)
+    return available
+
+
+def _stat_variants(path):
+    if not os.path.isfile(path):
+        return None
+    available = {'identity': (path, os.path.getsize(path))}
+    for encoding, suffix in ENCODINGS:
+        if os.path.isfile(path + suffix):
+            available[encoding] = (path + suffix, os.path.getsize(path + suffix))
+    return available
+
+
+def _accepted_encodings(headers):
+    for name, value in headers:
+        if name == b'accept-encoding':
+            return accepted_encodings(value.decode('latin-1'))
+    return set()
+
+
+class PrecompressedStaticFiles:
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD') and settings.STATIC_ROOT:
+            static_url = settings.STATIC_URL
+            if scope['path'].startswith(static_url):
+                name = scope['path'][len(static_url):]
+                try:
+                    path = safe_join(settings.STATIC_ROOT, name)
+                except SuspiciousFileOperation:
+                    path = None
+                variants = _variants(path) if path else None
+                if variants:
+                    return await self.serve(scope, send, name, variants)
+        return await self.application(scope, receive, send)
+
+    async def serve(self, scope, send, name, variants):
+        accepted = _accepted_encodings(scope['headers'])
+        encoding = next((enc for enc, _ in ENCODINGS if enc in variants and enc in accepted), 'identity')
+        path, size = variants[encoding]
+
+        content_type, _ = mimetypes.guess_type(name)
+        headers = [
+            (b'content-type', (content_type or 'application/octet-stream').encode()),
+            (b'content-length', str(size).encode()),
+            (b'cache-control', (IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(name) else DEFAULT_CACHE_CONTROL).encode()),
+        ]
+        if len(variants) > 1:
+            headers.append((b'vary', b'Accept-Encoding'))
+        if encoding != 'identity':
+            headers.append((b'content-encoding', encoding.encode()))
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+        if scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        with open(path, 'rb') as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+                more = len(chunk) == CHUNK_SIZE
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                if not more:
+                    break
@@ -0,0 +1,54 @@
+# events/storage.py
+
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.svg', '.html', '.txt', '.json', '.xml', '.ico'}
+MIN_COMPRESS_SIZE = 256  # Bytes; smaller files aren't worth the extra request negotiation
+MIN_SAVING = 0.05  # Keep a variant only if it is at least 5% smaller
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes .gz (and .br when brotli is installed) next to each file.
+
+    Runs at collectstatic time so requests never pay for compression; the
+    variants are served by ``events.static_asgi.PrecompressedStaticFiles``.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        # Both the fingerprinted copies and the originals end up in STATIC_ROOT
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            for variant in self.compress(name):
+                yield name, variant, True
+
+    def compress(self, name):
+        path = self.path(name)
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not os.path.isfile(path):
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+        for suffix, encode in encoders:
+            compressed = encode(data)
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                yield name + suffix
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)  # Stale variant from an earlier run
@@ -0,0 +1,117 @@
+# events/support_queue.py
+#
+# The volunteer work queue over SupportRequest. claim() hands out the most
+# urgent, oldest open request to exactly one volunteer however many ask at
+# once. On databases with SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL,
+# MySQL 8, Oracle) each claimer locks the first row nobody else has locked and
+# never waits on another claimer. Elsewhere (SQLite) it falls back to an
+# optimistic claim: read the first SUPPORT_QUEUE_CANDIDATES open requests,
+# then UPDATE ... WHERE status = 'open' on one of them at a time, moving on
+# when another volunteer won that row first. Without contention requests go
+# strictly in queue order; under contention the losers of a race scatter over
+# the candidates, so the head of the queue is handed out in roughly that
+# order. Both read the (status, priority, request_date) index.
+
+import random
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import SupportRequest
+
+OPEN = 'open'
+CLAIMED = 'claimed'
+RESOLVED = 'resolved'
+SKIP_LOCKED = 'skip_locked'
+OPTIMISTIC = 'optimistic'
+QUEUE_ORDER = ('priority', 'request_date', 'pk')
+
+_metrics = Counter()  # 'claimed' | 'empty' | 'conflicts' -> count
+_metrics_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _metrics_lock:
+        _metrics[name] += amount
+
+
+def get_metrics():
+    """Claims, empty-queue polls and lost optimistic races in this process."""
+    with _metrics_lock:
+        return {name: _metrics[name] for name in ('claimed', 'empty', 'conflicts')}
+
+
+def default_strategy():
+    connection = connections[router.db_for_write(SupportRequest)]
+    return SKIP_LOCKED if connection.features.has_select_for_update_skip_locked else OPTIMISTIC
+
+
+def open_requests(community=None):
+    requests = SupportRequest.objects.filter(status=OPEN)
+    if community is not None:
+        requests = requests.filter(community=community)
+    return requests.order_by(*QUEUE_ORDER)
+
+
+def claim(user, community=None, strategy=None):
+    """Assign the next open request (optionally of one community) to ``user``; None when the queue is empty."""
+    strategy = strategy or default_strategy()
+    claimed = _claim_skip_locked(user, community) if strategy == SKIP_LOCKED else _claim_optimistic(user, community)
+    _count('claimed' if claimed is not None else 'empty')
+    return claimed
+
+
+def _claim_skip_locked(user, community):
+    with transaction.atomic():
+        request = open_requests(community).select_for_update(skip_locked=True).first()
+        if request is None:
+            return None
+        request.status = CLAIMED
+        request.assignee = user
+        request.claimed_at = timezone.now()
+        request.save(update_fields=['status', 'assignee', 'claimed_at'])
+        return request
+
+
+def _claim_optimistic(user, community):
+    candidates = getattr(settings, 'SUPPORT_QUEUE_CANDIDATES', 20)
+    while True:
+        head = list(open_requests(community).values_list('pk', flat=True)[:candidates])
+        if not head:
+            return None
+        # The head of the queue first; a claimer that loses it goes on from a random one of the next few, so
+        # concurrent claimers spread out instead of all racing for the same row
+        rest = head[1:]
+        first = random.randrange(len(rest)) if rest else 0
+        for pk in head[:1] + rest[first:] + rest[:first]:
+            # Only one concurrent UPDATE can still see the row as open
+            if SupportRequest.objects.filter(pk=pk, status=OPEN).update(
+                    status=CLAIMED, assignee=user, claimed_at=timezone.now()):
+                return SupportRequest.objects.get(pk=pk)
+            _count('conflicts')
+        # Every candidate was taken by someone else meanwhile; read the head of the queue again
+
+
+def release(request_id, user):
+    """Put a request ``user`` claimed back on the queue. False if it isn't theirs (any more)."""
+    return bool(SupportRequest.objects.filter(pk=request_id, status=CLAIMED, assignee=user).update(
+        status=OPEN, assignee=None, claimed_at=None))
+
+
+def resolve(request_id, user):
+    """Mark a request ``user`` claimed as done. False if it isn't theirs (any more)."""
+    return bool(SupportRequest.objects.filter(pk=request_id, status=CLAIMED, assignee=user).update(
+        status=RESOLVED, resolved_at=timezone.now()))
+
+
+def depth():
+    """Open requests per priority label."""
+    counts = dict(
+        SupportRequest.objects.filter(status=OPEN).order_by().values('priority').annotate(total=Count('pk'))
+        .values_list('priority', 'total')
+    )
+    return {label: counts.get(value, 0) for value, label in SupportRequest.PRIORITY_CHOICES}
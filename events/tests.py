@@ -0,0 +1,629 @@
+# events/tests.py
+
+import csv
+import datetime
+import gzip
+import io
+import json
+import math
+import random
+import threading
+import tracemalloc
+from collections import deque
+from unittest import mock
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import QuerySet, Sum
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import exports, geo, partnership_graph, purge, ratelimit, rollups, support_queue, wire
+from .consumers import ChatConsumer
+from .importers import BulkImporter, CommunityImporter, EventImporter, iter_rows
+from .linkcheck import LinkChecker
+from .loadtest import ChatLoadTest
+from .middleware import CompressionMiddleware
+from .management.commands.benchmark_link_checker import StubServer
+from .models import (
+    ActivityRollup, Community, Event, Feedback, Notification, Partnership, RollupWatermark, SupportRequest,
+)
+from .outbound import COALESCE, DISCONNECT, DROP_OLDEST
+from .partnership_graph import CompactGraph
+
+
+def make_user(username, **fields):
+    # bulk_create skips post_save, where events.models and events.signals would both create the profile
+    return User.objects.bulk_create([User(username=username, **fields)])[0]
+
+
+def make_community(name, user, **fields):
+    return Community.objects.create(name=name, description=name, created_by=user, **fields)
+
+
+def make_event(community, title, **fields):
+    return Event.objects.create(community=community, title=title, location=fields.pop('location', ''),
+                                description=title, organizer='Organizer', created_by=community.created_by, **fields)
+
+
+class ChatFrameTests(SimpleTestCase):
+    async def connect(self, subprotocols):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), '/ws/interfaith/', subprotocols=subprotocols)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_from()  # Presence count for the new connection
+        return communicator
+
+    async def assert_still_open(self, communicator, send, decode):
+        # A well-formed message after the bad frame still comes back, so the consumer survived it
+        await send({'message': 'hello'})
+        self.assertEqual(decode(await communicator.receive_from()), {'message': 'hello'})
+        await communicator.disconnect()
+
+    async def test_mistyped_json_fields_are_dropped(self):
+        communicator = await self.connect([wire.JSON])
+        for payload in ('{"message": ["a"]}', '{"message": "a", "type": 1}', '[1]', 'not json'):
+            await communicator.send_to(text_data=payload)
+        await self.assert_still_open(
+            communicator, lambda payload: communicator.send_json_to(payload), json.loads)
+
+    async def test_bytes_message_is_dropped(self):
+        if wire.msgpack is None:
+            self.skipTest('msgpack is not installed')
+        communicator = await self.connect([wire.MSGPACK])
+        await communicator.send_to(bytes_data=wire.msgpack.packb({'message': b'\xff\x00'}))
+        await communicator.send_to(bytes_data=wire.msgpack.packb({'message': 'a', 'room': b'x'}))
+        await self.assert_still_open(
+            communicator, lambda payload: communicator.send_to(bytes_data=wire.msgpack.packb(payload)),
+            wire.msgpack.unpackb)
+
+
+class NearbyEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        community = make_community('Neighbours', make_user('geo'))
+        rng = random.Random(28)
+        for i in range(200):
+            make_event(community, f'Event {i}', latitude=17.4 + rng.uniform(-0.5, 0.5),
+                       longitude=78.5 + rng.uniform(-0.5, 0.5))
+
+    def test_matches_distance_to_every_event(self):
+        for radius in (2, 10, 40):
+            expected = sorted(
+                (distance, event.pk) for event in Event.objects.all()
+                if (distance := self.distance(17.4, 78.5, event.latitude, event.longitude)) <= radius
+            )
+            found = geo.nearby_events(Event.objects.all(), 17.4, 78.5, radius)
+            self.assertEqual([event.pk for event in found], [pk for _, pk in expected])
+            for event, (distance, _) in zip(found, expected):
+                self.assertAlmostEqual(event.distance_km, distance, places=6)
+
+    def test_prunes_with_the_geo_cell_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Checks the SQLite query plan')
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            geo.nearby_events(Event.objects.all(), 17.4, 78.5, 5)
+        sql, params = queries[0]  # The pruned candidate query
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('SEARCH events_event USING INDEX events_event_geo_cell', plan)
+        self.assertNotIn('SCAN events_event', plan)
+
+    @staticmethod
+    def distance(lat1, lon1, lat2, lon2):
+        lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * geo.EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={'login': (3, 300), 'login_user': (2, 300)})
+class RateLimitTests(SimpleTestCase):
+    view = staticmethod(ratelimit.rate_limit('login')(lambda request: HttpResponse()))
+
+    def setUp(self):
+        patcher = mock.patch.object(ratelimit, '_memory_backend', ratelimit.MemoryBackend())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+    def post(self, ip, username=None):
+        request = RequestFactory().post('/login/', {'username': username} if username else {}, REMOTE_ADDR=ip)
+        request.session = {}
+        return self.view(request).status_code
+
+    def test_username_is_limited_across_addresses(self):
+        for backend in ('memory', 'cache'):
+            with self.subTest(backend=backend), override_settings(RATE_LIMIT_BACKEND=backend):
+                codes = [self.post(f'10.0.0.{i}', f'victim-{backend}') for i in range(4)]
+                self.assertEqual(codes, [200, 200, 429, 429])
+                self.assertEqual(self.post('10.0.0.9', f'other-{backend}'), 200)
+
+    def test_rejected_attempts_spend_no_tokens(self):
+        for i, backend in enumerate(('memory', 'cache')):
+            with self.subTest(backend=backend), override_settings(RATE_LIMIT_BACKEND=backend):
+                ip = f'10.0.1.{i}'
+                codes = [self.post(ip, f'target-{backend}') for _ in range(5)]
+                self.assertEqual(codes, [200, 200, 429, 429, 429])
+                # The three rejected attempts left the address its last token
+                self.assertEqual([self.post(ip) for _ in range(2)], [200, 429])
+
+
+class SoftDeletedCommunityTests(TestCase):
+    def setUp(self):
+        self.volunteer = make_user('volunteer')
+        self.community = make_community('Leaving', self.volunteer)
+        for i in range(3):
+            SupportRequest.objects.create(community=self.community, user_name=f'member{i}', request_details='Help')
+            Notification.objects.create(community=self.community, message='Hello')
+        Community.all_objects.filter(pk=self.community.pk).update(is_deleted=True)
+
+    def test_support_requests_leave_the_queue(self):
+        self.assertIsNone(support_queue.claim(self.volunteer, strategy=support_queue.OPTIMISTIC))
+        self.assertEqual(sum(support_queue.depth().values()), 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_purge_removes_hidden_rows(self):
+        deleted = purge.purge_community(self.community.pk, chunk_size=2)
+        self.assertEqual((deleted[SupportRequest], deleted[Notification]), (3, 3))
+        self.assertFalse(SupportRequest.all_objects.exists() or Notification.all_objects.exists())
+        self.assertFalse(Community.all_objects.filter(pk=self.community.pk).exists())
+
+
+class SupportQueueConcurrencyTests(TransactionTestCase):
+    claimers = 8
+    requests = 120
+
+    def setUp(self):
+        self.volunteers = [make_user(f'volunteer{i}') for i in range(self.claimers)]
+        community = make_community('Helpers', self.volunteers[0])
+        SupportRequest.objects.bulk_create([
+            SupportRequest(community=community, user_name=f'member{i}', request_details='Help', priority=i % 4 + 1)
+            for i in range(self.requests)
+        ])
+
+    def claim_all(self, strategy):
+        claimed = [[] for _ in self.volunteers]
+        errors = []
+        start = threading.Barrier(len(self.volunteers))
+
+        def work(volunteer, mine):
+            try:
+                start.wait()
+                while (request := support_queue.claim(volunteer, strategy=strategy)) is not None:
+                    mine.append(request.pk)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work, args=args) for args in zip(self.volunteers, claimed)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return claimed
+
+    def assert_claimed_once(self, claimed):
+        pks = [pk for mine in claimed for pk in mine]
+        self.assertEqual(len(pks), len(set(pks)), 'A request was claimed twice')
+        self.assertEqual(set(pks), set(SupportRequest.objects.values_list('pk', flat=True)))
+        self.assertFalse(SupportRequest.objects.filter(status=support_queue.OPEN).exists())
+        for volunteer, mine in zip(self.volunteers, claimed):
+            self.assertEqual(
+                set(SupportRequest.objects.filter(assignee=volunteer).values_list('pk', flat=True)), set(mine))
+
+    def test_optimistic_claims_each_request_once(self):
+        self.assert_claimed_once(self.claim_all(support_queue.OPTIMISTIC))
+
+    def test_skip_locked_claims_each_request_once(self):
+        if not connection.features.has_select_for_update_skip_locked:
+            self.skipTest('The database has no SELECT ... FOR UPDATE SKIP LOCKED')
+        self.assert_claimed_once(self.claim_all(support_queue.SKIP_LOCKED))
+
+
+class LinkCheckerTests(SimpleTestCase):
+    # Each of these used to raise out of check() and end the whole run
+    async def run_with_good_link(self, url):
+        server = StubServer(latency=0)
+        await server.start()
+        base = f'http://127.0.0.1:{server.port}'
+        urls = [url.format(base=base), f'{base}/ok/']
+        results = {}
+
+        async def on_result(url, status, error):
+            results[url] = (status, error)
+
+        try:
+            await LinkChecker(concurrency=2, per_host=2, rate=0, timeout=2).run(urls, on_result)
+        finally:
+            await server.stop()
+        self.assertEqual(results[urls[1]], (200, ''))
+        return results[urls[0]]
+
+    async def test_non_ascii_path(self):
+        self.assertEqual(await self.run_with_good_link('{base}/ok/caf\u4e2d?q=\u00e9'), (200, ''))
+
+    async def test_bad_chunk_size(self):
+        self.assertEqual(await self.run_with_good_link('{base}/bad-chunk/'), (None, 'Malformed response'))
+
+    async def test_short_body(self):
+        self.assertEqual(await self.run_with_good_link('{base}/short-body/'), (None, 'Connection closed mid-response'))
+
+    async def test_bad_port(self):
+        self.assertEqual(await self.run_with_good_link('http://127.0.0.1:99999/'), (None, 'Invalid URL'))
+
+
+class SlowChatConsumerTests(SimpleTestCase):
+    size = 20
+
+    async def run_with_slow_client(self, policy):
+        # One client reads a frame every 0.2s while ~75 messages arrive; the others read as fast as they can
+        with override_settings(CHAT_OUTBOUND_POLICY=policy, CHAT_OUTBOUND_QUEUE_SIZE=self.size):
+            result = await ChatLoadTest(clients=10, slow_clients=1, slow_delay=0.2, rate=50, duration=1.5,
+                                        drain=0.5).run()
+        self.assertLessEqual(result['outbound']['high_water'], self.size)
+        self.assertEqual(result['delivered'], result['expected_deliveries'])  # The slow client held nobody up
+        self.assertEqual(result['closed_by_server'], 0)
+        return result
+
+    async def test_disconnect_closes_the_slow_client(self):
+        result = await self.run_with_slow_client(DISCONNECT)
+        self.assertEqual(result['slow_closed'], 1)
+        self.assertEqual(result['outbound']['disconnected'], 1)
+
+    async def test_drop_oldest_keeps_the_slow_client(self):
+        result = await self.run_with_slow_client(DROP_OLDEST)
+        self.assertEqual(result['slow_closed'], 0)
+        self.assertGreater(result['outbound']['dropped'], 0)
+
+    async def test_coalesce_keeps_the_slow_client(self):
+        result = await self.run_with_slow_client(COALESCE)
+        self.assertEqual(result['slow_closed'], 0)
+        self.assertGreater(result['outbound']['dropped'], 0)
+
+
+class CompactGraphTests(SimpleTestCase):
+    nodes = range(1, 41)
+
+    def setUp(self):
+        self.rng = random.Random(48)
+        self.counts = {}  # (low id, high id) -> partnerships, the brute-force model of the graph
+        edges = [tuple(self.rng.sample(self.nodes, 2)) for _ in range(45)]
+        for a, b in edges:
+            self.record(a, b, 1)
+        self.graph = CompactGraph(edges)
+
+    def record(self, a, b, delta):
+        key = (min(a, b), max(a, b))
+        self.counts[key] = self.counts.get(key, 0) + delta
+        if not self.counts[key]:
+            del self.counts[key]
+
+    def adjacency(self):
+        adjacent = {node: set() for node in self.nodes}
+        for (a, b), count in self.counts.items():
+            if count > 0:
+                adjacent[a].add(b)
+                adjacent[b].add(a)
+        return adjacent
+
+    def distances(self, adjacent, start):
+        found, queue = {start: 0}, deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbour in adjacent[node]:
+                if neighbour not in found:
+                    found[neighbour] = found[node] + 1
+                    queue.append(neighbour)
+        return found
+
+    def assert_matches(self):
+        adjacent = self.adjacency()
+        for node in self.nodes:
+            self.assertEqual(self.graph.neighbours(node), sorted(adjacent[node]))
+            self.assertEqual(self.graph.degree(node), len(adjacent[node]))
+        for a in self.nodes:
+            distances = self.distances(adjacent, a)
+            self.assertEqual(self.graph.component_size(a), len(distances))
+            for b in self.nodes:
+                expected = distances.get(b)
+                expected = expected if expected is not None and expected <= 3 else None
+                path = self.graph.path(a, b, max_depth=3)
+                self.assertEqual(None if path is None else len(path) - 1, expected, (a, b))
+                if path is not None:
+                    self.assertEqual((path[0], path[-1]), (a, b))
+                    self.assertTrue(all(y in adjacent[x] for x, y in zip(path, path[1:])), path)
+        groups, seen = [], set()
+        for node in self.nodes:
+            if node not in seen:
+                group = set(self.distances(adjacent, node))
+                seen |= group
+                if len(group) >= 2:
+                    groups.append(group)
+        self.assertCountEqual([set(group) for group in self.graph.components()], groups)
+        self.assertEqual([len(group) for group in self.graph.components()],
+                         sorted((len(group) for group in groups), reverse=True))
+
+    def change_randomly(self, times):
+        for _ in range(times):
+            if self.counts and self.rng.random() < 0.5:
+                a, b = self.rng.choice(sorted(self.counts))
+                delta = -1
+            else:
+                a, b = self.rng.sample(self.nodes, 2)
+                delta = 1
+            self.graph.change(a, b, delta)
+            self.record(a, b, delta)
+
+    def test_built_graph(self):
+        self.assert_matches()
+
+    def test_overlay_and_compact(self):
+        with override_settings(PARTNERSHIP_GRAPH_OVERLAY_LIMIT=10 ** 6):
+            self.change_randomly(60)
+            self.assertGreater(self.graph.stats()['overlay_edges'], 0)
+            self.assert_matches()  # Read through the overlay
+            self.graph.compact()
+            self.assertEqual(self.graph.stats()['overlay_edges'], 0)
+            self.assert_matches()
+
+    def test_overlay_compacts_past_the_limit(self):
+        with override_settings(PARTNERSHIP_GRAPH_OVERLAY_LIMIT=8):
+            for _ in range(10):
+                self.change_randomly(7)
+                self.assertLessEqual(self.graph.stats()['overlay_edges'], 8)
+                self.assert_matches()
+
+
+class PartnershipRenameTests(TestCase):
+    def setUp(self):
+        user = make_user('partners')
+        self.home, self.first, self.second = (make_community(name, user) for name in ('Home', 'First', 'Second'))
+        partnership_graph.graph.invalidate()
+        self.assertEqual(partnership_graph.neighbours(self.home.pk), [])  # Loaded, so saves update it in place
+
+    def partner(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Partnership.objects.create(community=self.home, partnership_date=datetime.date(2026, 1, 1),
+                                              description='Together', **fields)
+
+    def save(self, partnership, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            partnership.save(**kwargs)
+        partnership.refresh_from_db()
+
+    def test_renamed_partner_is_resolved_again(self):
+        partnership = self.partner(partner_name='first')
+        self.assertEqual(partnership.partner_id, self.first.pk)
+        partnership.partner_name = 'Second'
+        self.save(partnership)
+        self.assertEqual(partnership.partner_id, self.second.pk)
+        self.assertEqual(partnership_graph.neighbours(self.home.pk), [self.second.pk])
+        self.assertEqual(partnership_graph.neighbours(self.first.pk), [])
+
+    def test_rename_with_update_fields(self):
+        partnership = self.partner(partner_name='First')
+        partnership.partner_name = 'Nobody here'
+        self.save(partnership, update_fields=['partner_name'])
+        self.assertIsNone(partnership.partner_id)
+        self.assertEqual(partnership_graph.neighbours(self.home.pk), [])
+
+    def test_partner_set_with_the_rename_wins(self):
+        partnership = self.partner(partner_name='First')
+        partnership.partner_name = 'Second (via First)'
+        partnership.partner = self.second
+        self.save(partnership)
+        self.assertEqual(partnership.partner_id, self.second.pk)
+        self.assertEqual(partnership_graph.neighbours(self.home.pk), [self.second.pk])
+
+    def test_unchanged_name_keeps_the_partner(self):
+        partnership = self.partner(partner_name='Someone else', partner=self.first)
+        partnership.description = 'Renewed'
+        self.save(partnership)
+        self.assertEqual(partnership.partner_id, self.first.pk)
+
+
+class ExportTests(TestCase):
+    awkward = 'Comma, "quotes",\nnew line and caf\u00e9 \u4e2d'
+
+    @classmethod
+    def setUpTestData(cls):
+        user = make_user('exporter')
+        community = make_community('Exporters', user)
+        Feedback.objects.bulk_create([
+            Feedback(community=community, user_name=f'member{i}', feedback_text=f'{cls.awkward} {i} ' + 'x' * 200)
+            for i in range(4000)
+        ])
+        SupportRequest.objects.bulk_create([
+            SupportRequest(community=community, user_name=f'member{i}', request_details=cls.awkward) for i in range(20)
+        ])
+        for i in range(5):
+            make_event(community, f'{cls.awkward} {i}', location='Hyderabad',
+                       date=datetime.datetime(2027, 1, i + 1, 18, tzinfo=datetime.timezone.utc),
+                       max_participants=i or None)
+        Partnership.objects.create(community=community, partner_name=cls.awkward,
+                                   partnership_date=datetime.date(2026, 5, 1), description=cls.awkward)
+
+    def expected(self, dataset):
+        model, fields = exports.EXPORTS[dataset]
+        rows = list(model.objects.order_by('pk').values_list(*fields))
+        self.assertTrue(rows)
+        return fields, rows
+
+    def export(self, dataset, fmt, compress=False):
+        return b''.join(exports.export_chunks(dataset, fmt, compress))
+
+    def test_csv(self):
+        for dataset in exports.EXPORTS:
+            with self.subTest(dataset=dataset):
+                fields, rows = self.expected(dataset)
+                parsed = list(csv.reader(io.StringIO(self.export(dataset, 'csv').decode('utf-8'), newline='')))
+                self.assertEqual(parsed[0], fields)
+                self.assertEqual(parsed[1:], [
+                    ['' if value is None else value.isoformat() if isinstance(value, datetime.date) else str(value)
+                     for value in row]
+                    for row in rows
+                ])
+
+    def test_jsonl(self):
+        for dataset in exports.EXPORTS:
+            with self.subTest(dataset=dataset):
+                fields, rows = self.expected(dataset)
+                lines = self.export(dataset, 'jsonl').decode('utf-8').splitlines()
+                self.assertEqual(len(lines), len(rows))
+                for line, row in zip(lines, rows):
+                    record = json.loads(line)
+                    self.assertEqual(list(record), fields)
+                    for field, value in zip(fields, row):
+                        if isinstance(value, datetime.datetime):  # Sent with millisecond precision
+                            self.assertEqual(parse_datetime(record[field]),
+                                             value.replace(microsecond=value.microsecond // 1000 * 1000))
+                        elif isinstance(value, datetime.date):
+                            self.assertEqual(parse_date(record[field]), value)
+                        else:
+                            self.assertEqual(record[field], value)
+
+    def test_gzip(self):
+        for dataset in exports.EXPORTS:
+            for fmt in exports.FORMATS:
+                with self.subTest(dataset=dataset, format=fmt):
+                    compressed = self.export(dataset, fmt, compress=True)
+                    self.assertEqual(compressed[:2], b'\x1f\x8b')
+                    self.assertEqual(gzip.decompress(compressed), self.export(dataset, fmt))
+
+    def test_streams_in_bounded_chunks(self):
+        chunks = list(exports.export_chunks('feedback', 'csv'))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) < exports.OUTPUT_CHUNK_SIZE + 1024 for chunk in chunks))
+
+    def test_memory_stays_below_the_output_size(self):
+        # Memory follows the rows fetched per round trip and the output chunk size, not the number of rows
+        self.enterContext(mock.patch.object(exports, 'ITERATOR_CHUNK_SIZE', 100))
+        tracemalloc.start()
+        try:
+            written = sum(len(chunk) for chunk in exports.export_chunks('feedback', 'jsonl'))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, written / 4, f'peak {peak} bytes for {written} bytes of output')
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.community = make_community('Counted', make_user('rollups'))
+        self.enterContext(mock.patch.dict(rollups._last_catch_up, clear=True))
+
+    def add_feedback(self, count):
+        for i in range(count):
+            Feedback.objects.create(community=self.community, user_name=f'member{i}', feedback_text='Thanks')
+
+    def counted(self):
+        return ActivityRollup.objects.filter(source='feedback').aggregate(total=Sum('count'))['total']
+
+    def test_failing_catch_up_keeps_the_save(self):
+        with mock.patch.object(rollups, 'catch_up', side_effect=RuntimeError('Rollups unavailable')) as catch_up, \
+                self.assertLogs(level='ERROR'), self.captureOnCommitCallbacks(execute=True):
+            self.add_feedback(1)
+        catch_up.assert_called_once_with('feedback')
+        self.assertEqual(Feedback.objects.count(), 1)
+
+    def test_stale_catch_up_counts_nothing(self):
+        self.add_feedback(3)
+        self.assertEqual(rollups.catch_up('feedback', settle=0), 3)
+        stale = RollupWatermark.objects.get(source='feedback')  # What a slower worker read
+        self.add_feedback(2)
+        self.assertEqual(rollups.catch_up('feedback', settle=0), 2)
+        with mock.patch.object(QuerySet, 'get_or_create', return_value=(stale, False)):
+            self.assertEqual(rollups.catch_up('feedback', settle=0), 0)
+        self.assertEqual(self.counted(), 5)
+
+
+class CompressionSecretsTests(SimpleTestCase):
+    page = '<p>Community news</p>' * 50
+
+    def respond(self, view, user=None):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        request.user = user or AnonymousUser()
+        return CompressionMiddleware(view)(request)
+
+    def test_anonymous_page_is_compressed(self):
+        response = self.respond(lambda request: HttpResponse(self.page))
+        self.assertIn(response['Content-Encoding'], ('gzip', 'br'))
+
+    def test_page_with_csrf_token_is_not_compressed(self):
+        response = self.respond(lambda request: HttpResponse(f'{self.page}<input value="{get_token(request)}">'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_response_setting_a_cookie_is_not_compressed(self):
+        def view(request):
+            response = HttpResponse(self.page)
+            response.set_cookie('sessionid', 'secret')
+            return response
+        self.assertFalse(self.respond(view).has_header('Content-Encoding'))
+
+    def test_authenticated_html_is_not_compressed(self):
+        user = User(username='member')
+        self.assertFalse(self.respond(lambda request: HttpResponse(self.page), user).has_header('Content-Encoding'))
+        response = self.respond(lambda request: JsonResponse({'page': self.page}), user)
+        self.assertTrue(response.has_header('Content-Encoding'))
+        with override_settings(COMPRESSION_AUTHENTICATED_HTML=True):
+            self.assertTrue(self.respond(lambda request: HttpResponse(self.page), user).has_header('Content-Encoding'))
+
+
+class ImporterTests(TestCase):
+    def setUp(self):
+        self.user = make_user('importer')
+        make_community('Existing', self.user)
+        self.errors = io.StringIO()
+
+    def rejected(self):
+        return list(csv.reader(io.StringIO(self.errors.getvalue())))
+
+    def test_build_is_abstract(self):
+        with self.assertRaises(TypeError):
+            BulkImporter()
+
+    def test_database_rejects_only_the_bad_rows(self):
+        class StaleImporter(CommunityImporter):
+            def prepare_batch(self, rows):
+                # As if another import inserted 'Existing' after the names were looked up
+                return dict(super().prepare_batch(rows), existing_names=set())
+
+        rows = [{'name': name, 'description': name} for name in ('First', 'Existing', 'Second')]
+        report = StaleImporter(self.user, error_writer=csv.writer(self.errors)).run(enumerate(rows, start=1))
+        self.assertEqual((report.created, report.failed), (2, 1))
+        self.assertEqual(set(Community.objects.values_list('name', flat=True)), {'Existing', 'First', 'Second'})
+        [(position, error, row)] = self.rejected()
+        self.assertEqual(position, '2')
+        self.assertIn('Rejected by the database', error)
+        self.assertEqual(json.loads(row), rows[1])
+
+    def test_error_file_holds_the_raw_rows(self):
+        lines = [
+            '{"community": "Existing", "title": "Good", "location": "Hyderabad", "description": "d", "organizer": "o"}',
+            '{"community": "Nowhere", "title": "Lost", "location": "", "description": "d", "organizer": "o"}',
+            '{"community": "Existing", "title":',
+            '["not", "an", "object"]',
+        ]
+        importer = EventImporter(self.user, error_writer=csv.writer(self.errors))
+        report = importer.run(iter_rows(io.StringIO('\n'.join(lines)), 'jsonl'))
+        self.assertEqual((report.created, report.failed), (1, 3))
+        rejected = self.rejected()
+        self.assertEqual([position for position, _, _ in rejected], ['3', '4', '2'])  # Decoding errors come first
+        raw = {position: row for position, _, row in rejected}
+        self.assertEqual(json.loads(raw['2']), json.loads(lines[1]))
+        self.assertEqual(raw['3'], lines[2])
+        self.assertEqual(json.loads(raw['4']), ['not', 'an', 'object'])
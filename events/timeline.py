@@ -0,0 +1,140 @@
+# events/timeline.py
+#
+# One date-ordered timeline of events, unified nights and activities for the
+# calendar views. A window is a single UNION ALL query over the three tables,
+# each side filtered on its indexed date column and projected to the same few
+# columns, so no model instances are built. Months are cached (one cache entry
+# per month, TIMELINE_CACHE_TTL seconds) and dropped by signals when an item in
+# them is saved or deleted; weeks are cut from the one or two cached months
+# they touch.
+
+import calendar
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import CharField, DateTimeField, F, IntegerField, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Activity, Event, UnifiedNight
+
+# Fields shown on the timeline; saves that touch none of them leave the cache alone
+DISPLAY_FIELDS = {
+    Event: {'title', 'date', 'location', 'community'},
+    UnifiedNight: {'name', 'date', 'location'},
+    Activity: {'name', 'date'},
+}
+COLUMNS = ('kind', 'item_id', 'label', 'day', 'at', 'place', 'community_pk')
+
+
+def _ttl():
+    return getattr(settings, 'TIMELINE_CACHE_TTL', 3600)
+
+
+def _start_of(day):
+    # Event.date is a datetime; calendar days are in the current time zone
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _projections(start, end):
+    no_time = Value(None, output_field=DateTimeField())
+    no_community = Value(None, output_field=IntegerField())
+    events = Event.objects.filter(date__gte=_start_of(start), date__lt=_start_of(end)).annotate(
+        kind=Value('event', output_field=CharField()),
+        item_id=F('pk'),
+        label=F('title'),
+        day=TruncDate('date'),
+        at=F('date'),
+        place=F('location'),
+        community_pk=F('community_id'),
+    )
+    nights = UnifiedNight.objects.filter(date__gte=start, date__lt=end).annotate(
+        kind=Value('unified_night', output_field=CharField()),
+        item_id=F('pk'),
+        label=F('name'),
+        day=F('date'),
+        at=no_time,
+        place=F('location'),
+        community_pk=no_community,
+    )
+    activities = Activity.objects.filter(date__gte=start, date__lt=end).annotate(
+        kind=Value('activity', output_field=CharField()),
+        item_id=F('pk'),
+        label=F('name'),
+        day=F('date'),
+        at=no_time,
+        place=Value('', output_field=CharField()),
+        community_pk=no_community,
+    )
+    return [queryset.values_list(*COLUMNS) for queryset in (events, nights, activities)]
+
+
+def window(start, end):
+    """Everything dated in [start, end), ordered by day and then time (all-day items first)."""
+    events, nights, activities = _projections(start, end)
+    rows = events.union(nights, activities, all=True).order_by('day', F('at').asc(nulls_first=True), 'kind')
+    return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def _month_key(year, month):
+    return f'timeline:{year:04d}-{month:02d}'
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def month(year, month_number):
+    """The timeline of one calendar month, from the cache when possible."""
+    key = _month_key(year, month_number)
+    items = cache.get(key)
+    if items is None:
+        items = window(date(year, month_number, 1), date(*next_month(year, month_number), 1))
+        cache.set(key, items, _ttl())
+    return items
+
+
+def by_day(items):
+    days = {}
+    for item in items:
+        days.setdefault(item['day'], []).append(item)
+    return days
+
+
+def month_grid(year, month_number):
+    """Weeks of the month as lists of (day, items); days outside the month have no items."""
+    days = by_day(month(year, month_number))
+    weeks = calendar.Calendar(firstweekday=calendar.MONDAY).monthdatescalendar(year, month_number)
+    return [
+        [(day, days.get(day, []) if day.month == month_number else []) for day in week]
+        for week in weeks
+    ]
+
+
+def week(year, week_number):
+    """(day, items) for the seven days of an ISO week."""
+    monday = date.fromisocalendar(year, week_number, 1)
+    sunday = monday + timedelta(days=6)
+    items = month(monday.year, monday.month)
+    if (sunday.year, sunday.month) != (monday.year, monday.month):
+        items = items + month(sunday.year, sunday.month)
+    days = by_day(items)
+    return [(monday + timedelta(days=n), days.get(monday + timedelta(days=n), [])) for n in range(7)]
+
+
+def month_of_value(value):
+    """(year, month) a stored date or datetime falls in on the calendar."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+    return value.year, value.month
+
+
+def invalidate(*months):
+    keys = [_month_key(*ym) for ym in set(months) if ym is not None]
+    if keys:
+        # After commit, so a request that reads in between can't cache the old rows again
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -4,6 +4,7 @@ from .views import (
     index,  # Ensure this matches the function name in views.py
     register,
     user_login,
+    verify_otp,
     user_logout,
     community_list_view,
     community_details_view,
@@ -15,25 +16,64 @@ from .views import (
     CustomLoginView,
     about_us,
     contact,
-    
+    export_view,
+    rate_limit_metrics_view,
+    compression_metrics_view,
+    chat_queue_metrics_view,
+    autocomplete_view,
+    analytics_dashboard_view,
+    presence_view,
+    calendar_month_view,
+    calendar_week_view,
+    community_partners_view,
+    support_queue_view,
+    support_claim_view,
+    support_request_action_view,
 )
+from django.conf import settings
+from . import async_views
+
+if getattr(settings, 'ASYNC_READ_VIEWS', False):
+    # Async-native read views for the ASGI deployment (see events/async_views.py)
+    home = async_views.home
+    index = async_views.index
+    community_details_view = async_views.community_details_view
+    event_list_view = async_views.event_list_view
+    event_details_view = async_views.event_details_view
+    interfaith_networking = async_views.interfaith_networking
 
 urlpatterns = [
     path('', home, name='home'),
     path('index/', index, name='index'),  # Ensure the function name matches
     path('register/', register, name='register'),
     path('login/', user_login, name='login'),
+    path('login/verify/', verify_otp, name='verify_otp'),
     path('login/', CustomLoginView.as_view(), name='login'),
     path('logout/', user_logout, name='logout'),
     path('communities/', community_list_view, name='community_list'),
     path('communities/<int:community_id>/', community_details_view, name='community_details'),  # Ensure consistent naming
     path('communities/create/', community_create_view, name='community_create'),
+    path('communities/<int:community_id>/partners/', community_partners_view, name='community_partners'),  # ?to=<id>
     path('events/', event_list_view, name='event_list'),
     path('events/<int:event_id>/', event_details_view, name='event_details'),  # Use 'event_details' for consistency
     path('events/create/', event_create_view, name='event_create'),
     path('interfaith_networking/', interfaith_networking, name='interfaith_networking'),
     path('about/', about_us, name='about_us'),  # Example pattern
     path('contact/', contact, name='contact'),  # Example pattern
+    path('export/<str:dataset>/', export_view, name='export'),  # ?format=csv|jsonl&gzip=1
+    path('ratelimit/metrics/', rate_limit_metrics_view, name='rate_limit_metrics'),
+    path('compression/metrics/', compression_metrics_view, name='compression_metrics'),
+    path('chat/metrics/', chat_queue_metrics_view, name='chat_queue_metrics'),
+    path('support/queue/', support_queue_view, name='support_queue'),
+    path('support/queue/claim/', support_claim_view, name='support_claim'),  # POST
+    path('support/<int:support_request_id>/<str:action>/', support_request_action_view, name='support_request_action'),  # POST release|resolve
+    path('autocomplete/<str:source>/', autocomplete_view, name='autocomplete'),  # ?q=<prefix>
+    path('presence/', presence_view, name='presence'),  # Online count for the interfaith chat
+    path('presence/<str:room>/', presence_view, name='room_presence'),
+    path('analytics/', analytics_dashboard_view, name='analytics_dashboard'),  # ?months=12&community=<id>&format=json
+    path('calendar/', calendar_month_view, name='calendar'),  # ?format=json on any calendar page
+    path('calendar/<int:year>/<int:month>/', calendar_month_view, name='calendar_month'),
+    path('calendar/<int:year>/week/<int:week>/', calendar_week_view, name='calendar_week'),  # ISO week
 
 
 ]
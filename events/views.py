@@ -1,12 +1,24 @@
 # events/views.py
 
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from .models import Community, Event, UnifiedNight, Activity, Partnership, SupportRequest, Resource, Notification, Feedback, UserProfile  # Import your UserProfile model
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, SOURCES
+from .exports import EXPORTS, FORMATS, export_chunks
+from .geo import geocode, nearby_events
+from .otp import check_otp, issue_otp
+from .presence import CHAT_ROOM, presence
+from .middleware import compression_metrics
+from .outbound import queue_metrics
+from .ratelimit import get_metrics, rate_limit
+from .recommender import recommend_events
+from . import partnership_graph, rollups, support_queue, timeline
 from .forms import CommunityForm, EventForm, UserRegistrationForm, PartnershipForm, SupportForm, FeedbackForm  # Import your forms
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required  # Import login_required
+from django.contrib.auth.decorators import login_required, permission_required  # Import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_POST
 from features.models import Feature  # Import your Feature model
 from django.contrib.auth.views import LoginView
 from django.utils import timezone
@@ -18,8 +30,8 @@ from django.contrib.auth.models import User  # Import the User model
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import send_mail
 
-import openai  # Assuming OpenAI API is used for AI-powered features
 import random
+from datetime import date, timedelta
 
 def send_otp(email, otp):
     subject = 'Your OTP Code'
@@ -27,20 +39,22 @@ def send_otp(email, otp):
     send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
 
 
+@rate_limit('otp')
 def verify_otp(request):
+    username = request.session.get('otp_username')
+    if not username:
+        return redirect('login')
+
     if request.method == 'POST':
-        user_otp = request.POST.get('otp')
-        stored_otp = request.session.get('otp')
-        username = request.session.get('username')
+        user_otp = request.POST.get('otp', '')
 
-        if user_otp and stored_otp and int(user_otp) == int(stored_otp):
-            # If OTP is valid, log the user in
-            user = authenticate(request, username=username)
+        if check_otp(username, user_otp):
+            # If OTP is valid, log the user in (the password was checked in user_login)
+            user = User.objects.filter(username=username, is_active=True).first()
             if user:
-                login(request, user)
+                login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+                request.session.pop('otp_username', None)
                 messages.success(request, f'Welcome back, {username}!')
-                del request.session['otp']  # Remove OTP from session
-                del request.session['username']  # Remove username from session
                 return redirect('home')  # Redirect to home
             else:
                 messages.error(request, 'Authentication failed.')
@@ -101,6 +115,7 @@ class CustomLoginView(LoginView):
             messages.error(request, message)
         return super().get(request, *args, **kwargs)
 
+@rate_limit('register')
 def register(request):
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -121,6 +136,7 @@ def register(request):
 
     return render(request, 'events/register.html')
 
+@rate_limit('login')
 def user_login(request):
     if request.method == 'POST':
         username = request.POST['username']
@@ -130,6 +146,11 @@ def user_login(request):
         user = authenticate(request, username=username, password=password)
 
         if user is not None:
+            if UserProfile.objects.filter(user=user, is_2fa_enabled=True).exists():
+                # Second step: the code lives in the OTP cache, only the username goes in the session
+                send_otp(user.email, issue_otp(user.username))
+                request.session['otp_username'] = user.username
+                return redirect('verify_otp')
             # Log the user in and redirect to home
             login(request, user)
             return redirect('home')  # Redirect to the home page after login
@@ -156,12 +177,13 @@ def profile(request):
 
  # Ensure only logged-in users can create communities
 def community_list_view(request):
-    communities = Community.objects.all()
+    # Counts and the next event are denormalized onto Community, so this is a single query
+    communities = Community.objects.select_related('next_event')
     return render(request, 'events/community_list.html', {'communities': communities})
 
  # Ensure only logged-in users can view community details
 def community_details_view(request, community_id):
-    community = get_object_or_404(Community, id=community_id)
+    community = get_object_or_404(Community.objects.select_related('next_event'), id=community_id)
     events = Event.objects.filter(community=community)
     return render(request, 'events/community_details.html', {'community': community, 'events': events})
 
@@ -181,10 +203,44 @@ def community_create_view(request):
 
 # Event Views
 
+DEFAULT_NEARBY_RADIUS_KM = 25
+
+
+def _nearby_from_request(request, queryset):
+    """Apply ?near=<place> or ?lat=&lon= (with optional &radius= in km) to an event queryset.
+
+    Returns (events nearest first, origin dict) or None when no location was given.
+    """
+    near = request.GET.get('near', '').strip()
+    try:
+        radius = float(request.GET.get('radius', DEFAULT_NEARBY_RADIUS_KM))
+        if near:
+            coords = geocode(near)
+            if coords is None:
+                messages.error(request, f'Unknown location "{near}".')
+                return None
+            latitude, longitude = coords
+        elif request.GET.get('lat') and request.GET.get('lon'):
+            latitude = float(request.GET['lat'])
+            longitude = float(request.GET['lon'])
+        else:
+            return None
+    except ValueError:
+        messages.error(request, 'Invalid location or radius.')
+        return None
+
+    events = nearby_events(queryset, latitude, longitude, radius)
+    origin = {'name': near, 'latitude': latitude, 'longitude': longitude, 'radius': radius}
+    return events, origin
+
   # Ensure only logged-in users can view events
 def event_list_view(request):
     events = Event.objects.all()
-    return render(request, 'events/event_list.html', {'events': events})
+    context = {'events': events}
+    nearby = _nearby_from_request(request, events)
+    if nearby is not None:
+        context['events'], context['near'] = nearby
+    return render(request, 'events/event_list.html', context)
 
   # Ensure only logged-in users can view event details
 def event_details_view(request, event_id):
@@ -217,12 +273,17 @@ def interfaith_networking(request):
         'communities': communities,
         'events': events,
     }
+    nearby = _nearby_from_request(request, events)
+    if nearby is not None:
+        context['events'], context['near'] = nearby
+    context['recommended_events'] = recommend_events(request.user)  # Empty for anonymous users
+    context['online_count'] = presence.count(CHAT_ROOM)  # People in the interfaith chat right now
     
     return render(request, 'events/interfaith_networking.html', context)
 
 
 def create_event_view(request):
-    communities = Community.objects.all()  # Fetch all communities
+    form = EventForm()  # The community picker is an autocomplete, so no community list is loaded
 
     if request.method == 'POST':
         # Handle form submission with some validation checks
@@ -242,7 +303,7 @@ def create_event_view(request):
                 date = timezone.make_aware(timezone.datetime.strptime(date, '%Y-%m-%dT%H:%M'))
             except ValueError:
                 messages.error(request, 'Invalid date format. Please try again.')
-                return render(request, 'events/event_form.html', {'communities': communities})
+                return render(request, 'events/event_form.html', {'form': form})
 
             # Create the new event and save it
             event = Event(title=title, location=location, date=date, description=description, organizer=organizer, community=community)
@@ -252,9 +313,9 @@ def create_event_view(request):
 
         except Community.DoesNotExist:
             messages.error(request, 'Community does not exist.')
-            return render(request, 'events/event_form.html', {'communities': communities})
+            return render(request, 'events/event_form.html', {'form': form})
 
-    return render(request, 'events/create_event.html', {'communities': communities})
+    return render(request, 'events/create_event.html', {'form': form})
 
 def partnership_create_view(request):
     if request.method == 'POST':
@@ -301,7 +362,14 @@ def feedback_view(request):
 def community_delete_view(request, community_id):
     community = get_object_or_404(Community, id=community_id)
     if request.method == 'POST':
-        community.delete()
+        # Hide it right away; related rows are removed in chunks by purge_deleted_communities
+        Community.all_objects.filter(pk=community.pk).update(is_deleted=True, deleted_at=timezone.now())
+        SOURCES['communities'].invalidate()  # update() sends no signal
+        partnership_graph.graph.invalidate()
+        timeline.invalidate(*(  # Cached calendar months still show its events
+            timeline.month_of_value(month)
+            for month in Event.all_objects.filter(community_id=community.pk).datetimes('date', 'month')
+        ))
         messages.success(request, 'Community deleted successfully!')
         return redirect('community_list')  # Adjust the redirect as needed
     return render(request, 'events/community_confirm_delete.html', {'community': community})
@@ -316,6 +384,7 @@ def event_delete_view(request, event_id):
     return render(request, 'events/event_confirm_delete.html', {'event': event})
 
 def ai_response(prompt):
+    import openai  # Imported on first use: it is slow to import and only the AI chat needs it
     try:
         openai.api_key = 'your_openai_api_key'  # Use environment variables for sensitive data
         response = openai.Completion.create(
@@ -349,3 +418,198 @@ def notification_list_view(request):
 def resources_view(request):
     resources = Resource.objects.all()
     return render(request, 'events/resources.html', {'resources': resources})
+
+
+@staff_member_required
+def export_view(request, dataset):
+    # Streams the export row by row so memory use doesn't grow with the table size
+    if dataset not in EXPORTS:
+        raise Http404('Unknown export')
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        fmt = 'csv'
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    filename = f'{dataset}.{fmt}'
+    content_type = FORMATS[fmt]
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+
+    response = StreamingHttpResponse(export_chunks(dataset, fmt, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@staff_member_required
+def rate_limit_metrics_view(request):
+    # Admitted vs rejected auth requests seen by this worker
+    return JsonResponse(get_metrics())
+
+
+@staff_member_required
+def compression_metrics_view(request):
+    # Size ratio and CPU time of responses compressed by this worker
+    return JsonResponse(compression_metrics.snapshot())
+
+
+@staff_member_required
+def chat_queue_metrics_view(request):
+    # Depth of the chat connections' outbound queues in this worker, and what the policy discarded
+    return JsonResponse(queue_metrics.snapshot())
+
+
+def autocomplete_view(request, source):
+    # ?q=<prefix>&limit=<n>; backs AutocompleteWidget
+    index = SOURCES.get(source)
+    if index is None:
+        raise Http404('Unknown autocomplete source')
+    if index.login_required and not request.user.is_authenticated:
+        return JsonResponse({'results': []}, status=403)
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return JsonResponse({'results': index.search(request.GET.get('q', ''), limit)})
+
+
+@staff_member_required
+def analytics_dashboard_view(request):
+    # Reads only the rollup table, so it costs the same however large the raw tables get
+    try:
+        months = min(max(int(request.GET.get('months', 12)), 1), 120)
+    except ValueError:
+        months = 12
+    community_id = request.GET.get('community')
+    community_id = int(community_id) if community_id and community_id.isdigit() else None
+
+    since = rollups.first_of_month(months - 1)
+    monthly = rollups.monthly_totals(since=since, community_id=community_id)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'since': since, 'community': community_id, 'monthly': monthly})
+    context = {
+        'title': 'Community activity',
+        'since': since,
+        'community_id': community_id,
+        'monthly': monthly,
+        'top_communities': [] if community_id else rollups.top_communities('events', since=since),
+    }
+    return render(request, 'events/analytics_dashboard.html', context)
+
+
+def _timeline_json(days):
+    return JsonResponse({'days': [{'day': day, 'items': items} for day, items in days]})
+
+
+def calendar_month_view(request, year=None, month=None):
+    # Events, unified nights and activities together; one cached query per month
+    today = timezone.localdate()
+    year, month = year or today.year, month or today.month
+    if not 1 <= month <= 12 or not 1 <= year <= 9998:
+        raise Http404('No such month')
+    weeks = timeline.month_grid(year, month)
+    if request.GET.get('format') == 'json':
+        return _timeline_json([cell for week in weeks for cell in week if cell[0].month == month])
+    first = date(year, month, 1)
+    context = {
+        'month': first,
+        'weeks': weeks,
+        'previous': first - timedelta(days=1),
+        'next': date(*timeline.next_month(year, month), 1),
+        'today': today,
+    }
+    return render(request, 'events/calendar_month.html', context)
+
+
+def calendar_week_view(request, year, week):
+    try:
+        days = timeline.week(year, week)
+    except ValueError:
+        raise Http404('No such week')
+    if request.GET.get('format') == 'json':
+        return _timeline_json(days)
+    monday = days[0][0]
+    context = {
+        'days': days,
+        'previous': (monday - timedelta(days=7)).isocalendar(),
+        'next': (monday + timedelta(days=7)).isocalendar(),
+        'today': timezone.localdate(),
+    }
+    return render(request, 'events/calendar_week.html', context)
+
+
+def community_partners_view(request, community_id):
+    # Partners and reach from the in-memory partnership graph; ?to=<id> adds how closely two communities are linked
+    community = get_object_or_404(Community, id=community_id)
+    data = {
+        'community': community.pk,
+        'partners': partnership_graph.neighbours(community.pk),
+        'connected_communities': partnership_graph.component_size(community.pk),
+    }
+    other_id = request.GET.get('to', '')
+    if other_id.isdigit():
+        chain = partnership_graph.path(community.pk, int(other_id))
+        data['to'] = int(other_id)
+        data['separation'] = None if chain is None else len(chain) - 1
+        data['path'] = chain
+    ids = set(data['partners']) | set(data.get('path') or [])
+    names = dict(Community.objects.filter(pk__in=ids).values_list('pk', 'name'))
+    data['partners'] = [{'id': pk, 'name': names.get(pk)} for pk in data['partners']]
+    if data.get('path'):
+        data['path'] = [{'id': pk, 'name': names.get(pk)} for pk in data['path']]
+    return JsonResponse(data)
+
+
+def _support_request_json(support_request):
+    return {
+        'id': support_request.pk,
+        'community': support_request.community_id,
+        'user_name': support_request.user_name,
+        'request_details': support_request.request_details,
+        'priority': support_request.get_priority_display(),
+        'request_date': support_request.request_date,
+        'claimed_at': support_request.claimed_at,
+    }
+
+
+# Volunteers need the change permission on support requests, given directly or through a group; an
+# account from open registration alone must not see or claim other people's requests
+SUPPORT_QUEUE_PERMISSION = 'events.change_supportrequest'
+
+
+@login_required
+@permission_required(SUPPORT_QUEUE_PERMISSION, raise_exception=True)
+def support_queue_view(request):
+    # Open requests per priority and the ones this volunteer is working on
+    mine = SupportRequest.objects.filter(status=support_queue.CLAIMED, assignee=request.user).order_by('claimed_at')
+    data = {'open': support_queue.depth(), 'mine': [_support_request_json(item) for item in mine]}
+    if request.user.is_staff:
+        data['metrics'] = support_queue.get_metrics()
+    return JsonResponse(data)
+
+
+@login_required
+@permission_required(SUPPORT_QUEUE_PERMISSION, raise_exception=True)
+@require_POST
+def support_claim_view(request):
+    # The next open request, for this volunteer only; ?community=<id> to take one community's queue
+    community_id = request.POST.get('community', '')
+    claimed = support_queue.claim(request.user, community=int(community_id) if community_id.isdigit() else None)
+    return JsonResponse({'request': _support_request_json(claimed) if claimed else None})
+
+
+@login_required
+@permission_required(SUPPORT_QUEUE_PERMISSION, raise_exception=True)
+@require_POST
+def support_request_action_view(request, support_request_id, action):
+    actions = {'release': support_queue.release, 'resolve': support_queue.resolve}
+    if action not in actions:
+        raise Http404('Unknown action')
+    if not actions[action](support_request_id, request.user):
+        return JsonResponse({'ok': False, 'error': 'This request is not claimed by you.'}, status=409)
+    return JsonResponse({'ok': True})
+
+
+def presence_view(request, room=CHAT_ROOM):
+    # Kept current by the chat consumers, so this is a dictionary lookup
+    return JsonResponse({'room': room, 'online': presence.count(room)})
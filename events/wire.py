@@ -0,0 +1,66 @@
+# events/wire.py
+#
+# Frame encodings for the chat WebSocket. Clients choose one with the
+# Sec-WebSocket-Protocol header: 'chat.msgpack' for binary MessagePack frames
+# (when the optional msgpack package is installed) or 'chat.json' for JSON
+# text frames, which is also what clients that ask for nothing get. Outgoing
+# group messages carry every encoding, produced once by the sender, so each
+# recipient sends ready-made bytes instead of serializing again.
+#
+# Compression is permessage-deflate, negotiated by the ASGI server rather than
+# the application (uvicorn enables it by default; see benchmark_chat_wire).
+
+import json
+
+try:
+    import msgpack  # Optional: pip install msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'chat.json'
+MSGPACK = 'chat.msgpack'
+# What json.loads and msgpack.unpackb raise for frames they can't read
+_DECODE_ERRORS = (ValueError, TypeError) + ((msgpack.UnpackException,) if msgpack is not None else ())
+TEXT_FIELDS = ('type', 'room', 'message')  # Must be strings when present; MessagePack can carry bytes and more
+
+
+def available_protocols():
+    return [MSGPACK, JSON] if msgpack is not None else [JSON]
+
+
+def negotiate(requested):
+    """The subprotocol to accept from the client's list, or None for plain JSON without one."""
+    for protocol in available_protocols():  # In server preference order
+        if protocol in requested:
+            return protocol
+    return None
+
+
+def encode_frames(payload):
+    """Every encoding of ``payload``, keyed by subprotocol; done once per group message."""
+    frames = {JSON: json.dumps(payload)}
+    if msgpack is not None:
+        frames[MSGPACK] = msgpack.packb(payload)
+    return frames
+
+
+def frame(frames, protocol):
+    # Keyword arguments for AsyncWebsocketConsumer.send
+    if protocol == MSGPACK:
+        return {'bytes_data': frames[MSGPACK]}
+    return {'text_data': frames[JSON]}
+
+
+def decode(text_data=None, bytes_data=None):
+    """The object a client frame carries. ValueError for anything else, malformed or mistyped frames included."""
+    if bytes_data is not None and msgpack is None:
+        raise ValueError('Binary frames need the chat.msgpack subprotocol')
+    try:
+        payload = msgpack.unpackb(bytes_data) if bytes_data is not None else json.loads(text_data)
+    except _DECODE_ERRORS as exc:
+        raise ValueError(f'Undecodable frame: {exc}') from exc
+    if not isinstance(payload, dict):
+        raise ValueError('Frames must hold an object')
+    if any(not isinstance(payload.get(field, ''), str) for field in TEXT_FIELDS):
+        raise ValueError(f'{", ".join(TEXT_FIELDS)} must be strings')
+    return payload
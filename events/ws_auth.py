@@ -0,0 +1,84 @@
+# events/ws_auth.py
+#
+# WebSocket authentication that remembers which user a session key belongs to
+# for WS_AUTH_CACHE_TTL seconds, so a storm of reconnects (e.g. after a deploy)
+# doesn't load the session and the User row again for every connection.
+# Entries are dropped on logout, and every cached user carries a version that
+# is bumped whenever the User row changes (password, is_active, deletion), so
+# a stale login is never accepted.
+
+import time
+
+from channels.auth import AuthMiddleware, get_user
+from channels.db import database_sync_to_async
+from channels.sessions import CookieMiddleware, SessionMiddleware
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+
+_ANONYMOUS = 'anonymous'
+
+
+def _cache():
+    return caches[getattr(settings, 'WS_AUTH_CACHE_ALIAS', 'default')]
+
+
+def _session_key(session_key):
+    return f'wsauth:session:{session_key}'
+
+
+def _version_key(user_pk):
+    return f'wsauth:user:{user_pk}'
+
+
+def forget_session(session_key):
+    if session_key:
+        _cache().delete(_session_key(session_key))
+
+
+def forget_user(user_pk):
+    # Invalidates every cached session of this user at once
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_pk))
+    except ValueError:
+        # Evicted or never set: start from a value no cached entry can hold
+        cache.set(_version_key(user_pk), time.time_ns(), None)
+
+
+async def get_cached_user(scope):
+    session_key = scope['cookies'].get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return AnonymousUser()  # No session, nothing to look up
+
+    cache = _cache()
+    entry = await cache.aget(_session_key(session_key))
+    if entry == _ANONYMOUS:
+        return AnonymousUser()
+    if entry is not None:
+        user, version = entry
+        if await cache.aget(_version_key(user.pk), 0) == version:
+            return user
+
+    # The version is read before the User row: a password change or deactivation committed while the user is
+    # being loaded bumps it past the value cached here, so the entry is never accepted
+    user_pk = await database_sync_to_async(scope['session'].get)(SESSION_KEY)
+    version = await cache.aget(_version_key(user_pk), 0) if user_pk is not None else None
+    user = await get_user(scope)  # Session (already loaded) plus User query, as AuthMiddleware does
+    ttl = getattr(settings, 'WS_AUTH_CACHE_TTL', 60)
+    if not user.is_authenticated:
+        await cache.aset(_session_key(session_key), _ANONYMOUS, ttl)
+    elif str(user.pk) == str(user_pk):
+        await cache.aset(_session_key(session_key), (user, version), ttl)
+    return user
+
+
+class CachedAuthMiddleware(AuthMiddleware):
+    async def resolve_scope(self, scope):
+        scope['user']._wrapped = await get_cached_user(scope)
+
+
+def CachedAuthMiddlewareStack(inner):
+    # Drop-in replacement for channels.auth.AuthMiddlewareStack
+    return CookieMiddleware(SessionMiddleware(CachedAuthMiddleware(inner)))